@@ -8,8 +8,7 @@ cp src/test/fuzz/*.py .
 hidden_imports="--hidden-import=yaml \
                --hidden-import=cxxfilt \
                --hidden-import=json \
-               --hidden-import=bs4 \
-               --hidden-import=matplotlib"
+               --hidden-import=numpy"
 fuzzers="fuzz_cfg_load.py fuzz_report_generation.py"
 for fuzzer in $fuzzers; do
   compile_python_fuzzer $fuzzer -F --add-data "src/fuzz_introspector:fuzz_introspector" $hidden_imports
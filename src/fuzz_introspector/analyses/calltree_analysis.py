@@ -13,6 +13,7 @@
 # limitations under the License.
 """Logic related to calltree analysis"""
 
+import heapq
 import os
 import logging
 import json
@@ -21,6 +22,8 @@ import string
 
 from typing import (
     Dict,
+    Iterable,
+    Iterator,
     List,
     Tuple,
     Optional,
@@ -28,22 +31,61 @@ from typing import (
 )
 
 from fuzz_introspector import analysis
+from fuzz_introspector import constants
 from fuzz_introspector import utils
 from fuzz_introspector import cfg_load
 from fuzz_introspector import html_helpers
 from fuzz_introspector.datatypes import project_profile, fuzzer_profile
 
-# For pretty printing the html code:
-from bs4 import BeautifulSoup as bs
-
 from fuzz_introspector.html_report import create_collapsible_element
 
 logger = logging.getLogger(name=__name__)
 
 
+def get_ctx_idx_width(node_count: int) -> int:
+    """Returns the number of digits calltree indices are zero-padded to, such
+    that the indices of a calltree with `node_count` nodes sort in order."""
+    return max(5, len(str(node_count - 1)))
+
+
+def get_calltree_file_name(calltree_file_idx: int) -> str:
+    return f"calltree_view_{calltree_file_idx}.html"
+
+
+def get_free_calltree_file_indices(count: int) -> List[int]:
+    """Returns the `count` lowest calltree file indices that do not have an
+    existing calltree file."""
+    free_indices: List[int] = []
+    calltree_file_idx = 0
+    while len(free_indices) < count:
+        if not os.path.isfile(get_calltree_file_name(calltree_file_idx)):
+            free_indices.append(calltree_file_idx)
+        calltree_file_idx += 1
+    return free_indices
+
+
+def get_project_fuzz_blockers(
+    profiles: List[fuzzer_profile.FuzzerProfile],
+    max_blockers_to_extract: int = 999
+) -> List[Tuple[fuzzer_profile.FuzzerProfile, cfg_load.CalltreeCallsite]]:
+    """Gets the fuzz blockers of all fuzzers with the most uncovered nodes
+    following them, together with the fuzzer of each blocker. Only the top
+    blockers of each fuzzer can be among these."""
+    return heapq.nlargest(
+        max_blockers_to_extract,
+        (
+            (profile, node)
+            for profile in profiles
+            for node in profile.get_fuzz_blockers(max_blockers_to_extract)
+        ),
+        key=lambda blocker: blocker[1].cov_forward_reds
+    )
+
+
 class Analysis(analysis.AnalysisInterface):
     def __init__(self) -> None:
         logger.info("Creating FuzzCalltreeAnalysis")
+        self._calltree_index: Optional[cfg_load.CalltreeIndex] = None
 
     @staticmethod
     def get_name():
@@ -65,13 +107,55 @@ class Analysis(analysis.AnalysisInterface):
         logger.info("Not implemented")
         return ""
 
-    def create_calltree(self, profile: fuzzer_profile.FuzzerProfile) -> str:
+    def create_calltree(
+        self,
+        profile: fuzzer_profile.FuzzerProfile,
+        pretty_html: bool = True,
+        virtual_calltree_threshold: int = constants.VIRTUAL_CALLTREE_THRESHOLD,
+        calltree_file_idx: Optional[int] = None
+    ) -> str:
+        """Writes the calltree page of a fuzzer and returns its filename.
+
+        The page is written to calltree_view_XX.html, where XX is
+        `calltree_file_idx` or, if not given, the lowest index without an
+        existing file.
+
+        Calltrees with more nodes than `virtual_calltree_threshold` are
+        written as a compact data file that the page renders on demand,
+        see `html_create_virtual_calltree_file`. A negative threshold always
+        writes the calltree as plain HTML.
+        """
         logger.info("In calltree")
-        # Generate HTML for the calltree
-        calltree_html_string = "<h1>Fuzzer calltree</h1>"
-        calltree_html_string += "<div id=\"calltree-wrapper\">"
-        calltree_html_string += "<div class='call-tree-section-wrapper'>"
+        if calltree_file_idx is None:
+            calltree_file_idx = get_free_calltree_file_indices(1)[0]
+        calltree_html_file = get_calltree_file_name(calltree_file_idx)
+
         nodes = cfg_load.extract_all_callsites(profile.function_call_depths)
+        if 0 <= virtual_calltree_threshold < len(nodes):
+            self.html_create_virtual_calltree_file(
+                nodes,
+                calltree_html_file,
+                profile,
+                pretty_html
+            )
+        else:
+            self.html_create_dedicated_calltree_file(
+                self.iter_calltree_html(nodes),
+                calltree_html_file,
+                profile,
+                pretty_html,
+                get_ctx_idx_width(len(nodes))
+            )
+        logger.info("Calltree created")
+        return calltree_html_file
+
+    def iter_calltree_html(self, nodes: List[cfg_load.CalltreeCallsite]) -> Iterator[str]:
+        """Generates the HTML of the calltree piece by piece"""
+        # Generate HTML for the calltree
+        yield "<h1>Fuzzer calltree</h1>"
+        yield "<div id=\"calltree-wrapper\">"
+        yield "<div class='call-tree-section-wrapper'>"
+        ctx_idx_width = get_ctx_idx_width(len(nodes))
         for i in range(len(nodes)):
             node = nodes[i]
 
@@ -88,7 +172,7 @@ class Analysis(analysis.AnalysisInterface):
             color_to_be = node.cov_color
             callsite_link = node.cov_callsite_link
             link = node.cov_link
-            ct_idx_str = self.create_str_node_ctx_idx(str(node.cov_ct_idx))
+            ct_idx_str = self.create_str_node_ctx_idx(str(node.cov_ct_idx), ctx_idx_width)
 
             # Only display [function] link if we have, otherwhise show no [function] text.
             if node.dst_function_source_file.replace(" ", "") != "":
@@ -102,14 +186,14 @@ class Analysis(analysis.AnalysisInterface):
             if i > 0:
                 previous_node = nodes[i - 1]
                 if previous_node.depth == node.depth:
-                    calltree_html_string += "</div>"
+                    yield "</div>"
                 depth_diff = previous_node.depth - node.depth
                 if depth_diff >= 1:
                     closing_divs = "</div>"  # To close "calltree-line-wrapper"
                     closing_divs = "</div>" * (int(depth_diff) + 1)
-                    calltree_html_string += closing_divs
+                    yield closing_divs
 
-            calltree_html_string += f"""
+            yield f"""
     <div class="{color_to_be}-background coverage-line">
         <span class="coverage-line-inner" data-calltree-idx="{ct_idx_str}"
         data-paddingleft="{indentation}" style="padding-left: {indentation}">
@@ -129,73 +213,163 @@ class Analysis(analysis.AnalysisInterface):
             if i != len(nodes) - 1:
                 next_node = nodes[i + 1]
                 if next_node.depth > node.depth:
-                    calltree_html_string += f"""<div
+                    yield f"""<div
         class="calltree-line-wrapper open level-{int(node.depth)}"
          data-paddingleft="{indentation}" >"""
                 elif next_node.depth < node.depth:
                     depth_diff = int(node.depth - next_node.depth)
-                    calltree_html_string += "</div>" * depth_diff
+                    yield "</div>" * depth_diff
 
-        calltree_html_string += "</div>"
-        logger.info("Calltree created")
+        yield "</div>"
 
-        # Write the HTML to a file called calltree_view_XX.html where XX is a counter.
-        calltree_file_idx = 0
-        calltree_html_file = f"calltree_view_{calltree_file_idx}.html"
-        while os.path.isfile(calltree_html_file):
-            calltree_file_idx += 1
-            calltree_html_file = f"calltree_view_{calltree_file_idx}.html"
-
-        self.html_create_dedicated_calltree_file(
-            calltree_html_string,
-            calltree_html_file,
-            profile,
-        )
-        return calltree_html_file
+    def html_create_virtual_calltree_file(
+        self,
+        nodes: List[cfg_load.CalltreeCallsite],
+        filename: str,
+        profile: fuzzer_profile.FuzzerProfile,
+        pretty_html: bool = True
+    ) -> None:
+        """
+        Write a calltree page that renders the calltree in the browser. The
+        nodes are written to a .js file next to the page as columns, with the
+        strings stored once in tables that the columns index into. The page
+        only creates elements for the nodes in view, so neither writing nor
+        opening the page depends on the size of the calltree.
+        """
+        data_filename = filename.replace(".html", ".js")
+        ctx_idx_width = get_ctx_idx_width(len(nodes))
+        strings: Dict[str, int] = dict()
+
+        def string_idx(value: str) -> int:
+            if value not in strings:
+                strings[value] = len(strings)
+            return strings[value]
+
+        columns: Dict[str, List[int]] = {
+            "depth": [],
+            "color": [],
+            "name": [],
+            "link": [],
+            "callsite_link": [],
+        }
+        for node in nodes:
+            columns["depth"].append(node.depth)
+            columns["color"].append(string_idx(node.cov_color))
+            columns["name"].append(string_idx(utils.demangle_cpp_func(node.dst_function_name)))
+            # Only display [function] link if we have, otherwhise show no [function] text.
+            if node.dst_function_source_file.replace(" ", "") != "":
+                columns["link"].append(string_idx(node.cov_link))
+            else:
+                columns["link"].append(-1)
+            columns["callsite_link"].append(string_idx(node.cov_callsite_link))
+
+        with open(data_filename, "w") as data_file:
+            data_file.write("var calltree_data = ")
+            json.dump(
+                {
+                    "idx_width": ctx_idx_width,
+                    "strings": list(strings),
+                    "columns": columns
+                },
+                data_file,
+                separators=(",", ":")
+            )
+            data_file.write(";\n")
+
+        calltree_html = [
+            "<h1>Fuzzer calltree</h1>",
+            "<div id=\"calltree-wrapper\">",
+            "<div class='call-tree-section-wrapper virtual-calltree'>",
+            "</div>"
+        ]
+        with html_helpers.HtmlWriter(filename, pretty_html) as html_writer:
+            self._write_dedicated_calltree_file(
+                html_writer,
+                calltree_html,
+                profile,
+                [os.path.basename(data_filename), "calltree_virtual.js"],
+                ctx_idx_width
+            )
+
+    def get_calltree_index(
+        self,
+        func_call_depth: Optional[cfg_load.CalltreeCallsite]
+    ) -> cfg_load.CalltreeIndex:
+        """Returns the index of a calltree. The index of the last calltree is
+        kept, since the blocker tables of a fuzzer use it several times."""
+        if self._calltree_index is None or self._calltree_index.calltree is not func_call_depth:
+            self._calltree_index = cfg_load.CalltreeIndex(func_call_depth)
+        return self._calltree_index
+
+    def get_profile_ctx_idx_width(self, profile: fuzzer_profile.FuzzerProfile) -> int:
+        """Returns the calltree index width of the calltree of a fuzzer"""
+        if profile.function_call_depths is None:
+            return get_ctx_idx_width(0)
+        calltree_index = self.get_calltree_index(profile.function_call_depths)
+        return get_ctx_idx_width(len(calltree_index.nodes))
 
     def collect_calltree_nodes(self, branch_blockers: List[analysis.FuzzBranchBlocker],
                                func_call_depth: Optional[cfg_load.CalltreeCallsite]
                                ) -> Dict[analysis.FuzzBranchBlocker, cfg_load.CalltreeCallsite]:
-        """Map branch blockers to the calltree nodes"""
+        """Map branch blockers to the calltree nodes.
 
-        all_callsites = cfg_load.extract_all_callsites(func_call_depth)
-        nodes_num = len(all_callsites)
-        if nodes_num == 0:
+        A blocker is mapped to the first node of its function, or to the
+        last callee of that node called at or before the blocked branch.
+        """
+        calltree_index = self.get_calltree_index(func_call_depth)
+        if len(calltree_index.nodes) == 0:
             logger.error("Failed to extract callsites, "
                          "the blocker table won't have correct links to calltree.")
 
         blocker_node_map: Dict[analysis.FuzzBranchBlocker, cfg_load.CalltreeCallsite] = dict()
         for blocker in branch_blockers:
-            func_name = blocker.function_name
-            branch_linenumber = int(blocker.branch_line_number)
-            for idx, node in enumerate(all_callsites):
-                if func_name == node.dst_function_name:
-                    depth = node.depth + 1
-                    found_node = node
-                    # Try to adjust the blocker node in the callees of current func
-                    for i in range(idx + 1, nodes_num):
-                        new_node = all_callsites[i]
-                        if depth > new_node.depth:
-                            break  # Reached the caller of the node
-                        if depth == new_node.depth and branch_linenumber >= new_node.src_linenumber:
-                            found_node = new_node
-                    blocker_node_map[blocker] = found_node
-                    break
+            node_idx = calltree_index.get_function_node(blocker.function_name)
+            if node_idx is None:
+                continue
+            # Try to adjust the blocker node in the callees of current func
+            callee_idx = calltree_index.get_last_child_before_line(
+                node_idx,
+                int(blocker.branch_line_number)
+            )
+            if callee_idx is not None:
+                node_idx = callee_idx
+            blocker_node_map[blocker] = calltree_index.nodes[node_idx]
 
         return blocker_node_map
 
     def html_create_dedicated_calltree_file(
         self,
-        calltree_html_string: str,
+        calltree_html: Iterable[str],
         filename: str,
-        profile: fuzzer_profile.FuzzerProfile
+        profile: fuzzer_profile.FuzzerProfile,
+        pretty_html: bool = True,
+        ctx_idx_width: Optional[int] = None
     ) -> None:
         """
         Write a wrapped HTML file with the tags needed from fuzz-introspector
         We use this only for wrapping calltrees at the moment, however, down
         the line it makes sense to have an easy wrapper for other HTML pages too.
+        The calltree HTML is written to the file as it is produced.
         """
-        complete_html_string = ""
+        if ctx_idx_width is None:
+            ctx_idx_width = self.get_profile_ctx_idx_width(profile)
+        with html_helpers.HtmlWriter(filename, pretty_html) as html_writer:
+            self._write_dedicated_calltree_file(
+                html_writer,
+                calltree_html,
+                profile,
+                ["calltree.js"],
+                ctx_idx_width
+            )
+
+    def _write_dedicated_calltree_file(
+        self,
+        html_writer: html_helpers.HtmlWriter,
+        calltree_html: Iterable[str],
+        profile: fuzzer_profile.FuzzerProfile,
+        js_files: List[str],
+        ctx_idx_width: int
+    ) -> None:
         blocker_infos = {}
         # HTML start
         html_header = html_helpers.html_get_header(
@@ -203,7 +377,7 @@ class Analysis(analysis.AnalysisInterface):
             title=f"Fuzz introspector: { profile.identifier }"
         )
         html_header += '<div class="content-section calltree-content-section">'
-        complete_html_string += html_header
+        html_writer.write(html_header)
 
         # Display fuzz blocker at top of page
         if profile.branch_blockers:
@@ -211,7 +385,7 @@ class Analysis(analysis.AnalysisInterface):
                                                             profile.function_call_depths)
             # Record the link to coverage report for the branch blocker.
             for b_blocker, ct_node in blockers_node_map.items():
-                idx = self.create_str_node_ctx_idx(str(ct_node.cov_ct_idx))
+                idx = self.create_str_node_ctx_idx(str(ct_node.cov_ct_idx), ctx_idx_width)
                 blocker_infos[idx] = b_blocker.coverage_report_link
 
             fuzz_blocker_table = self.create_branch_blocker_table(
@@ -235,18 +409,21 @@ class Analysis(analysis.AnalysisInterface):
 
             for node in fuzz_blocker_nodes:
                 # The link to coverage report is not present in this type of blockers.
-                blocker_infos[self.create_str_node_ctx_idx(str(node.cov_ct_idx))] = ""
+                blocker_infos[
+                    self.create_str_node_ctx_idx(str(node.cov_ct_idx), ctx_idx_width)
+                ] = ""
 
         if fuzz_blocker_table is not None:
-            complete_html_string += "<div class=\"report-box\">"
-            complete_html_string += "<h1>Fuzz blockers</h1>"
-            complete_html_string += fuzz_blocker_table
-            complete_html_string += "</div>"
+            html_writer.write("<div class=\"report-box\">")
+            html_writer.write("<h1>Fuzz blockers</h1>")
+            html_writer.write(fuzz_blocker_table)
+            html_writer.write("</div>")
 
         # Display calltree
-        complete_html_string += calltree_html_string
-        complete_html_string += "</div></div></div></div></div>"
-        complete_html_string += "<div id=\"side-overview-wrapper\"></div>"
+        for calltree_html_piece in calltree_html:
+            html_writer.write(calltree_html_piece)
+        html_writer.write("</div></div></div></div></div>")
+        html_writer.write("<div id=\"side-overview-wrapper\"></div>")
 
         # HTML end
         html_end = '</div>'
@@ -259,19 +436,15 @@ class Analysis(analysis.AnalysisInterface):
             html_end += f'var fuzz_blocker_infos = \'{json.dumps(blocker_infos)}\';'
             html_end += "</script>"
 
-        html_end += "<script src=\"calltree.js\"></script>"
-        complete_html_string += html_end
-
-        complete_html_string += "</body></html>"
+        for js_file in js_files:
+            html_end += f"<script src=\"{js_file}\"></script>"
+        html_writer.write(html_end)
 
-        # Beautify and write HTML
-        soup = bs(complete_html_string, "html.parser")
-        pretty_html = soup.prettify()
-        with open(filename, "w+") as cf:
-            cf.write(pretty_html)
+        html_writer.write("</body></html>")
 
-    def create_str_node_ctx_idx(self, cov_ct_idx: str) -> str:
-        prefixed_zeros = "0" * (len("00000") - len(cov_ct_idx))
+    def create_str_node_ctx_idx(self, cov_ct_idx: str, width: int = 5) -> str:
+        """Zero-pads a calltree index to `width` digits, see `get_ctx_idx_width`"""
+        prefixed_zeros = "0" * (width - len(cov_ct_idx))
         return f"{prefixed_zeros}{cov_ct_idx}"
 
     def get_fuzz_blockers(
@@ -279,23 +452,8 @@ class Analysis(analysis.AnalysisInterface):
         profile: fuzzer_profile.FuzzerProfile,
         max_blockers_to_extract: int = 999
     ) -> List[cfg_load.CalltreeCallsite]:
-        """Gets a list of fuzz blockers"""
-        blocker_list: List[cfg_load.CalltreeCallsite] = list()
-
-        # Extract all callsites in calltree and exit early if none
-        all_callsites = cfg_load.extract_all_callsites(profile.function_call_depths)
-        if len(all_callsites) == 0:
-            return blocker_list
-
-        # Filter nodes that has forward reds. Extract maximum max_blockers_to_extract nodes.
-        nodes_sorted_by_red_ahead = sorted(all_callsites,
-                                           key=lambda x: x.cov_forward_reds,
-                                           reverse=True)
-        for node in nodes_sorted_by_red_ahead:
-            if node.cov_forward_reds == 0 or len(blocker_list) >= max_blockers_to_extract:
-                break
-            blocker_list.append(node)
-        return blocker_list
+        """Gets a list of fuzz blockers, see `FuzzerProfile.get_fuzz_blockers`"""
+        return profile.get_fuzz_blockers(max_blockers_to_extract)
 
     def create_fuzz_blocker_table(
         self,
@@ -303,7 +461,8 @@ class Analysis(analysis.AnalysisInterface):
         tables: List[str],
         calltree_file_name: str,
         fuzz_blockers: Optional[List[cfg_load.CalltreeCallsite]] = None,
-        file_link: Optional[str] = None
+        file_link: Optional[str] = None,
+        table_id_prefix: str = "myTable"
     ) -> Optional[str]:
         """
         Creates HTML string for table showing fuzz blockers.
@@ -321,7 +480,7 @@ class Analysis(analysis.AnalysisInterface):
 
         html_table_string = "<p class='no-top-margin'>The followings nodes " \
                             "represent call sites where fuzz blockers occur.</p>"
-        tables.append(f"myTable{len(tables)}")
+        tables.append(f"{table_id_prefix}{len(tables)}")
         html_table_string += html_helpers.html_create_table_head(
             tables[-1],
             [
@@ -341,9 +500,9 @@ class Analysis(analysis.AnalysisInterface):
             sort_by_column=0,
             sort_order="desc"
         )
+        ctx_idx_width = self.get_profile_ctx_idx_width(profile)
         for node in fuzz_blockers:
-            link_prefix = "0" * (5 - len(str(node.cov_ct_idx)))
-            node_id = "%s%s" % (link_prefix, node.cov_ct_idx)
+            node_id = self.create_str_node_ctx_idx(str(node.cov_ct_idx), ctx_idx_width)
             if file_link is not None:
                 cs_link = (
                     "<span class=\"text-link\">"
@@ -372,7 +531,8 @@ class Analysis(analysis.AnalysisInterface):
         profile: fuzzer_profile.FuzzerProfile,
         tables: List[str],
         file_link: str,
-        max_number_of_blockers: int
+        max_number_of_blockers: int,
+        table_id_prefix: str = "myTable"
     ) -> Optional[str]:
         """
         Creates HTML string for table showing branch blockers.
@@ -388,10 +548,11 @@ class Analysis(analysis.AnalysisInterface):
 
         blockers_node_map = self.collect_calltree_nodes(branch_blockers,
                                                         profile.function_call_depths)
+        ctx_idx_width = self.get_profile_ctx_idx_width(profile)
 
         html_table_string = "<p class='no-top-margin'>The followings are " \
                             "the branches where fuzzer fails to bypass.</p>"
-        tables.append(f"myTable{len(tables)}")
+        tables.append(f"{table_id_prefix}{len(tables)}")
         html_table_string += html_helpers.html_create_table_head(
             tables[-1],
             [
@@ -420,8 +581,7 @@ class Analysis(analysis.AnalysisInterface):
             else:
                 logger.error("The calltree index is not valid!")
                 calltree_idx = 0
-            link_prefix = "0" * (5 - len(str(calltree_idx)))
-            node_id = "%s%s" % (link_prefix, calltree_idx)
+            node_id = self.create_str_node_ctx_idx(str(calltree_idx), ctx_idx_width)
             if file_link is not None:
                 cs_link = (
                     "<span class=\"text-link\">"
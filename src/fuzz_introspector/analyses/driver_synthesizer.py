@@ -18,6 +18,7 @@ import logging
 from typing import (
     Dict,
     List,
+    Optional,
     Tuple,
 )
 
@@ -47,27 +48,13 @@ class Analysis(analysis.AnalysisInterface):
     def get_name():
         return "FuzzDriverSynthesizerAnalysis"
 
-    def analysis_func(
+    def get_fuzzer_drivers(
         self,
-        toc_list: List[Tuple[str, str, int]],
-        tables: List[str],
         proj_profile: project_profile.MergedProjectProfile,
-        profiles: List[fuzzer_profile.FuzzerProfile],
-        basefolder: str,
-        coverage_url: str,
-        conclusions: List[html_helpers.HTMLConclusion],
-        fuzz_targets=None
-    ) -> str:
-        logger.info(f" - Running analysis {Analysis.get_name()}")
-        html_string = ""
-        html_string += "<div class=\"report-box\">"
-        html_string += html_helpers.html_add_header_with_link(
-            "Fuzz driver synthesis",
-            1,
-            toc_list
-        )
-        html_string += "<div class=\"collapsible\">"
-
+        fuzz_targets: Optional[List[function_profile.FunctionProfile]] = None
+    ) -> Dict[str, DriverContents]:
+        """Returns a fuzzer template for each source file of `fuzz_targets`,
+        which are the optimal targets of the project by default."""
         if fuzz_targets is None or len(fuzz_targets) == 0:
             A1 = optimal_targets.Analysis()
 
@@ -151,6 +138,30 @@ class Analysis(analysis.AnalysisInterface):
 
         logger.info("Synthesizing drivers for the following optimal functions: { %s }" % (
             str([f.function_name for f in fuzz_targets])))
+        return final_fuzzers
+
+    def analysis_func(
+        self,
+        toc_list: List[Tuple[str, str, int]],
+        tables: List[str],
+        proj_profile: project_profile.MergedProjectProfile,
+        profiles: List[fuzzer_profile.FuzzerProfile],
+        basefolder: str,
+        coverage_url: str,
+        conclusions: List[html_helpers.HTMLConclusion],
+        fuzz_targets=None
+    ) -> str:
+        logger.info(f" - Running analysis {Analysis.get_name()}")
+        html_string = ""
+        html_string += "<div class=\"report-box\">"
+        html_string += html_helpers.html_add_header_with_link(
+            "Fuzz driver synthesis",
+            1,
+            toc_list
+        )
+        html_string += "<div class=\"collapsible\">"
+
+        final_fuzzers = self.get_fuzzer_drivers(proj_profile, fuzz_targets)
 
         # Create the necessary HTML code for displaying the fuzz drivers
         html_string += html_helpers.html_add_header_with_link("New fuzzers", 3, toc_list)
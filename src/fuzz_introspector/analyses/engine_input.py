@@ -13,11 +13,11 @@
 # limitations under the License.
 """Analysis for creating input consumed by a fuzzer, e.g. a dictionary"""
 
-import json
 import logging
 import os
 
 from typing import (
+    Dict,
     List,
     Tuple,
 )
@@ -30,14 +30,67 @@ from fuzz_introspector.analyses import calltree_analysis as cta
 from fuzz_introspector.datatypes import (
     project_profile,
     fuzzer_profile,
+    function_profile,
 )
 
 logger = logging.getLogger(name=__name__)
 
 
+def escape_dictionary_token(token: bytes) -> str:
+    """Escapes a token for a libFuzzer dictionary, in which tokens are
+    quoted and bytes are escaped as \\xNN"""
+    escaped_token = ""
+    for byte in token:
+        if byte in (ord("\\"), ord("\"")):
+            escaped_token += f"\\{chr(byte)}"
+        elif 0x20 <= byte < 0x7f:
+            escaped_token += chr(byte)
+        else:
+            escaped_token += f"\\x{byte:02X}"
+    return escaped_token
+
+
+def get_dictionary_file_name(profile: fuzzer_profile.FuzzerProfile) -> str:
+    return f"{os.path.basename(profile.identifier)}{constants.DICTIONARY_FILE_SUFFIX}"
+
+
+class ConstantTable:
+    """Interned constants touched by functions.
+
+    Each distinct constant is stored once and functions refer to their
+    constants by index, so the constants of functions reached by several
+    fuzzers are only read and encoded once.
+    """
+    def __init__(self) -> None:
+        self.tokens: List[bytes] = []
+        self._token_ids: Dict[bytes, int] = dict()
+        self._function_tokens: Dict[str, Tuple[int, ...]] = dict()
+
+    def get_function_tokens(self, fd: function_profile.FunctionProfile) -> Tuple[int, ...]:
+        """Returns the indices of the distinct tokens of the constants
+        touched by a function. Constants that can not be dictionary tokens
+        are left out."""
+        if fd.function_name in self._function_tokens:
+            return self._function_tokens[fd.function_name]
+
+        token_ids: Dict[int, None] = dict()
+        for const in fd.constants_touched:
+            token = str(const).encode("utf-8", "backslashreplace")
+            if len(token) == 0 or len(token) > constants.MAX_DICTIONARY_TOKEN_SIZE:
+                continue
+            if token not in self._token_ids:
+                self._token_ids[token] = len(self.tokens)
+                self.tokens.append(token)
+            token_ids[self._token_ids[token]] = None
+        function_tokens = tuple(token_ids)
+        self._function_tokens[fd.function_name] = function_tokens
+        return function_tokens
+
+
 class Analysis(analysis.AnalysisInterface):
     def __init__(self) -> None:
         self.display_html = False
+        self.constant_table = ConstantTable()
 
     @staticmethod
     def get_name():
@@ -100,18 +153,48 @@ class Analysis(analysis.AnalysisInterface):
 
         return html_string
 
-    def get_dictionary(self, profile: fuzzer_profile.FuzzerProfile) -> str:
-        """Extracts a fuzzer dictionary"""
-        kn = 0
-        dictionary_content = ""
+    def get_dictionary_tokens(self, profile: fuzzer_profile.FuzzerProfile) -> List[bytes]:
+        """Returns the distinct tokens of the constants touched by the
+        functions a fuzzer reaches. Tokens used by more reachable functions
+        that are not covered at runtime come first, then tokens used by more
+        reachable functions. At most `constants.MAX_DICTIONARY_TOKENS` tokens
+        are returned."""
         if profile.functions_reached_by_fuzzer is None:
-            return ""
+            return []
 
+        uncovered_funcs = set(profile.get_cov_uncovered_reachable_funcs())
+        # Token index to (uncovered use count, use count), in order of first use
+        token_uses: Dict[int, List[int]] = dict()
         for fn in profile.functions_reached_by_fuzzer:
-            fp = profile.all_class_functions[fn]
-            for const in fp.constants_touched:
-                dictionary_content += f"k{kn}=\"{const}\"\n"
-                kn += 1
+            is_uncovered = fn in uncovered_funcs
+            for token_id in self.constant_table.get_function_tokens(
+                profile.all_class_functions[fn]
+            ):
+                uses = token_uses.setdefault(token_id, [0, 0])
+                uses[0] += is_uncovered
+                uses[1] += 1
+
+        ranked_token_ids = sorted(
+            token_uses,
+            key=lambda token_id: token_uses[token_id],
+            reverse=True
+        )
+        return [
+            self.constant_table.tokens[token_id]
+            for token_id in ranked_token_ids[:constants.MAX_DICTIONARY_TOKENS]
+        ]
+
+    def get_dictionary(self, profile: fuzzer_profile.FuzzerProfile) -> str:
+        """Extracts a fuzzer dictionary. The dictionary is also written to
+        the dictionary file of the fuzzer, for use with the libFuzzer -dict
+        flag."""
+        dictionary_content = ""
+        for kn, token in enumerate(self.get_dictionary_tokens(profile)):
+            dictionary_content += f"k{kn}=\"{escape_dictionary_token(token)}\"\n"
+
+        if dictionary_content != "":
+            with open(get_dictionary_file_name(profile), "w") as dictionary_file:
+                dictionary_file.write(dictionary_content)
         return dictionary_content
 
     def get_dictionary_section(
@@ -129,7 +212,10 @@ class Analysis(analysis.AnalysisInterface):
             3,
             toc_list
         )
-        html_string += "<p>Use this with the libFuzzer -dict=DICT.file flag</p>"
+        html_string += (
+            f"<p>Use this with the libFuzzer -dict={get_dictionary_file_name(profile)} "
+            f"flag</p>"
+        )
         html_string += "<pre><code class='language-clike'>"
         html_string += self.get_dictionary(profile)
         html_string += "</code></pre>"
@@ -147,6 +233,23 @@ class Analysis(analysis.AnalysisInterface):
             toc_list
         )
 
+        focus_functions = self.get_focus_functions(profile)
+        if len(focus_functions) == 0:
+            return ""
+
+        html_string += (
+            f"<p>Use one of these functions as input to libfuzzer with flag: "
+            f"-focus_function name </p>"
+            f"<pre><code class='language-clike'>"
+            f"-focus_function={focus_functions}"
+            f"</code></pre><br>"
+        )
+        return html_string
+
+    def get_focus_functions(self, profile: fuzzer_profile.FuzzerProfile) -> List[str]:
+        """Returns the functions in which the fuzz blockers of a fuzzer are,
+        for use with the libFuzzer -focus_function flag. The functions are
+        also added to the engine input file."""
         calltree_analysis = cta.Analysis()
         fuzz_blockers = calltree_analysis.get_fuzz_blockers(
             profile,
@@ -155,11 +258,11 @@ class Analysis(analysis.AnalysisInterface):
 
         if len(fuzz_blockers) == 0:
             logger.info("Found no fuzz blockers and thus no focus function")
-            return ""
+            return []
 
         # Only succeed if we can get the name of the function in which the
         # fuzz blocker callsite resides.
-        focus_functions = []
+        focus_functions: List[str] = []
         for fuzz_blocker in fuzz_blockers:
             ffname = fuzz_blocker.src_function_name
             if ffname is not None and ffname not in focus_functions:
@@ -169,7 +272,7 @@ class Analysis(analysis.AnalysisInterface):
                 logger.info(f"Found focus function: {fuzz_blocker.src_function_name}")
 
         if len(focus_functions) == 0:
-            return ""
+            return []
 
         self.add_to_json_file(
             constants.ENGINE_INPUT_FILE,
@@ -177,15 +280,7 @@ class Analysis(analysis.AnalysisInterface):
             "focus-functions",
             focus_functions
         )
-
-        html_string += (
-            f"<p>Use one of these functions as input to libfuzzer with flag: "
-            f"-focus_function name </p>"
-            f"<pre><code class='language-clike'>"
-            f"-focus_function={focus_functions}"
-            f"</code></pre><br>"
-        )
-        return html_string
+        return focus_functions
 
     def add_to_json_file(
         self,
@@ -194,20 +289,8 @@ class Analysis(analysis.AnalysisInterface):
         key: str,
         val: List[str]
     ) -> None:
-        # Create file if it does not exist
-        if not os.path.isfile(json_file_path):
-            json_data = dict()
-        else:
-            json_fd = open(json_file_path)
-            json_data = json.load(json_fd)
-            json_fd.close()
-        if 'fuzzers' not in json_data:
-            json_data['fuzzers'] = dict()
-
-        if fuzzer_name not in json_data['fuzzers']:
-            json_data['fuzzers'][fuzzer_name] = dict()
-
-        json_data['fuzzers'][fuzzer_name][key] = val
-
-        with open(json_file_path, 'w') as json_file:
-            json.dump(json_data, json_file)
+        # The file is written when the report is done
+        utils.get_json_report_file(json_file_path).set_value(
+            ('fuzzers', fuzzer_name, key),
+            val
+        )
@@ -17,6 +17,8 @@ import logging
 import os
 
 from typing import (
+    Any,
+    Dict,
     List,
     Set,
     Tuple
@@ -47,6 +49,38 @@ class Analysis(analysis.AnalysisInterface):
                 s1.add(prof.all_class_functions[func].function_source_file)
         return s1
 
+    def all_dirs_targeted(self, all_proj_files: Set[str]) -> Set[str]:
+        all_proj_dirs = set()
+        for fnm in all_proj_files:
+            all_proj_dirs.add(fnm.replace(os.path.basename(fnm), ""))
+        return all_proj_dirs
+
+    def get_file_records(
+        self,
+        all_proj_files: Set[str],
+        proj_profile: project_profile.MergedProjectProfile,
+        profiles: List[fuzzer_profile.FuzzerProfile]
+    ) -> List[Dict[str, Any]]:
+        """Returns a record of each file in `all_proj_files` with the fuzzers
+        that reach and cover the file."""
+        # Both checks are lookups in indices of the profiles, see
+        # `FuzzerProfile.get_file_index`.
+        records = []
+        for fnm in all_proj_files:
+            profiles_that_hit = []
+            profiles_that_cover = []
+            for profile in profiles:
+                if profile.reaches_file(fnm, proj_profile.basefolder):
+                    profiles_that_hit.append(profile.identifier)
+                if profile.is_file_covered(fnm, proj_profile.basefolder):
+                    profiles_that_cover.append(profile.identifier)
+            records.append({
+                "source-file": fnm,
+                "reached-by": profiles_that_hit,
+                "covered-by": profiles_that_cover
+            })
+        return records
+
     def analysis_func(
         self,
         toc_list: List[Tuple[str, str, int]],
@@ -60,9 +94,7 @@ class Analysis(analysis.AnalysisInterface):
         logger.info(f" - Running analysis {Analysis.get_name()}")
 
         all_proj_files = self.all_files_targeted(proj_profile)
-        all_proj_dirs = set()
-        for fnm in all_proj_files:
-            all_proj_dirs.add(fnm.replace(os.path.basename(fnm), ""))
+        all_proj_dirs = self.all_dirs_targeted(all_proj_files)
 
         html_string = ""
         html_string += "<div class=\"report-box\">"
@@ -101,26 +133,12 @@ class Analysis(analysis.AnalysisInterface):
                 ("Covered by", "")
             ]
         )
-        for fnm in all_proj_files:
-            profiles_that_hit = []
-            for profile in profiles:
-                if profile.reaches_file(fnm, proj_profile.basefolder):
-                    profiles_that_hit.append(profile.identifier)
-
-            profiles_that_cover = []
-            for profile in profiles:
-                is_file_covered = profile.is_file_covered(
-                    fnm,
-                    proj_profile.basefolder
-                )
-                if is_file_covered:
-                    profiles_that_cover.append(profile.identifier)
-
+        for record in self.get_file_records(all_proj_files, proj_profile, profiles):
             html_string += html_helpers.html_table_add_row(
                 [
-                    f"{fnm}",
-                    f"{str(profiles_that_hit)}",
-                    f"{str(profiles_that_cover)}"
+                    f"{record['source-file']}",
+                    f"{str(record['reached-by'])}",
+                    f"{str(record['covered-by'])}"
                 ]
             )
         html_string += "</table>"
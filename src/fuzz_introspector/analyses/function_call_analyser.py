@@ -14,15 +14,21 @@
 """Analysis plugin for introspection sinks of interest"""
 
 import logging
+import re
 
 from typing import (
+    Any,
     List,
+    Optional,
+    Pattern,
+    Set,
     Tuple,
     Dict
 )
 
 from fuzz_introspector import analysis
 from fuzz_introspector import cfg_load
+from fuzz_introspector import constants
 from fuzz_introspector import html_helpers
 from fuzz_introspector import utils
 from fuzz_introspector.datatypes import (
@@ -30,18 +36,59 @@ from fuzz_introspector.datatypes import (
     fuzzer_profile,
     function_profile
 )
+from fuzz_introspector.exceptions import AnalysisError
 
 logger = logging.getLogger(name=__name__)
 
+# A call site of a sink: (sink, source file, parent function, line number)
+CallsiteKey = Tuple[str, str, str, str]
+
+
+def get_callsite_key(sink: str, location: str) -> CallsiteKey:
+    """Returns the key of a call site with a location of the form
+    "source_file#parent_function:line"."""
+    src_file_and_parent, _, lineno = location.rpartition(":")
+    src_file, _, parent_func = src_file_and_parent.rpartition("#")
+    return sink, src_file, parent_func, lineno
+
 
 class Analysis(analysis.AnalysisInterface):
     """This Analysis aims to analyse and generate html report content table
     to show all occurence of third party function call within the target
     project and if those calls are statically reached or dynamically covered.
+
+    The reported functions are the ones matching `sinks`, regexes matched
+    against the whole demangled function name. They default to
+    `constants.THIRD_PARTY_SINKS`, or to the `SINKS` section of the config
+    file, see `set_config`.
     """
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, sinks: Optional[List[str]] = None) -> None:
+        self.sinks_regex: Optional[Pattern[str]] = None
+        self._is_sink: Dict[str, bool] = dict()
+        self.set_sinks(constants.THIRD_PARTY_SINKS if sinks is None else sinks)
+
+    def set_sinks(self, sinks: List[str]) -> None:
+        self._is_sink = dict()
+        self.sinks_regex = None
+        if len(sinks) == 0:
+            return
+        try:
+            self.sinks_regex = re.compile("|".join(f"(?:{sink})" for sink in sinks))
+        except re.error as e:
+            raise AnalysisError(f"Invalid sink regex: {e}")
+
+    def set_config(self, config: utils.ExclusionConfig) -> None:
+        if config.sinks is not None:
+            self.set_sinks(config.sinks)
+
+    def is_sink(self, func_name: str) -> bool:
+        if func_name not in self._is_sink:
+            self._is_sink[func_name] = (
+                self.sinks_regex is not None
+                and self.sinks_regex.fullmatch(utils.demangle_cpp_func(func_name)) is not None
+            )
+        return self._is_sink[func_name]
 
     @staticmethod
     def get_name():
@@ -75,28 +122,19 @@ class Analysis(analysis.AnalysisInterface):
 
     def add_callsite_record(
         self,
-        target_func_list: List[str],
+        callsites: Dict[str, Dict[CallsiteKey, str]],
         func_name: str,
-        source_file_list: List[str],
-        callsites: Dict[str, List[str]]
-    ) -> List[str]:
-        """This function aims to add all third party function call to its
-        source location and line number mapping to a combined dictionary.
-        """
-        exist_list = []
-        if func_name in target_func_list:
-            if func_name in callsites.keys():
-                func_list = callsites[func_name]
-            else:
-                func_list = []
-            for item in source_file_list:
-                if item not in func_list:
-                    func_list.append(item)
-                else:
-                    exist_list.append(item)
-            callsites.update({func_name: func_list})
-
-        return exist_list
+        location: str
+    ) -> Tuple[CallsiteKey, bool]:
+        """Adds a call site of a sink to the call sites of the sink, in the
+        order they are found. Returns the key of the call site and whether it
+        was already added."""
+        callsite_key = get_callsite_key(func_name, location)
+        sink_callsites = callsites.setdefault(func_name, dict())
+        if callsite_key in sink_callsites:
+            return callsite_key, True
+        sink_callsites[callsite_key] = location
+        return callsite_key, False
 
     def third_party_func_profile(
         self,
@@ -105,60 +143,118 @@ class Analysis(analysis.AnalysisInterface):
         function_list: List[function_profile.FunctionProfile]
     ) -> Tuple[
         List[function_profile.FunctionProfile],
-        Dict[str, List[str]],
-        List[str]
+        Dict[str, Dict[CallsiteKey, str]],
+        Set[CallsiteKey]
     ]:
+        """Returns the sinks, the call sites of each sink and the call sites
+        that are reachable. A call site is reachable if it is both in the
+        calltree of a fuzzer and among the call sites of a function."""
         # Build up target function list
-        target_list = [
-            fd for fd in profile.all_functions.values() if not fd.function_source_file
-        ]
-
-        target_func_list = [
-            func.function_name for func in target_list
-        ]
+        target_funcs: Dict[str, function_profile.FunctionProfile] = dict()
+        for fd in profile.all_functions.values():
+            if not fd.function_source_file and self.is_sink(fd.function_name):
+                target_funcs.setdefault(fd.function_name, fd)
 
         # Add unreachable target functions
         for function in function_list:
-            if function.function_name not in target_func_list:
-                if not function.function_source_file:
-                    target_list.append(function)
-                    target_func_list.append(function.function_name)
+            if (function.function_name not in target_funcs
+                    and not function.function_source_file
+                    and self.is_sink(function.function_name)):
+                target_funcs[function.function_name] = function
 
         # Create list of call site for each funcitons
-        callsite_dict: Dict[str, List[str]] = dict()
-
+        callsite_dict: Dict[str, Dict[CallsiteKey, str]] = dict()
+        calltree_callsites: Set[CallsiteKey] = set()
         for callsite in callsites:
             func_name = callsite.dst_function_name
-            src_file = self.get_source_file(callsite)
-            parent_func = self.get_parent_func_name(callsite)
+            if func_name not in target_funcs:
+                continue
             src_file_with_line = "%s#%s:%s" % (
-                src_file,
-                parent_func,
+                self.get_source_file(callsite),
+                self.get_parent_func_name(callsite),
                 callsite.src_linenumber
             )
-            self.add_callsite_record(
-                target_func_list,
+            callsite_key, _ = self.add_callsite_record(
+                callsite_dict,
                 func_name,
-                [src_file_with_line],
-                callsite_dict
+                src_file_with_line
             )
+            calltree_callsites.add(callsite_key)
 
         # Discover reachable func calls
-        reachable_func_list = []
-
+        reachable_callsites: Set[CallsiteKey] = set()
         for function in function_list:
-            for func_name in function.callsite.keys():
-
-                reachable_func_list.extend(
-                    self.add_callsite_record(
-                        target_func_list,
+            for func_name, locations in function.callsite.items():
+                if func_name not in target_funcs:
+                    continue
+                for location in locations:
+                    callsite_key, _ = self.add_callsite_record(
+                        callsite_dict,
                         func_name,
-                        function.callsite[func_name],
-                        callsite_dict
+                        location
                     )
-                )
+                    if callsite_key in calltree_callsites:
+                        reachable_callsites.add(callsite_key)
+
+        return list(target_funcs.values()), callsite_dict, reachable_callsites
+
+    def get_callsite_records(
+        self,
+        proj_profile: project_profile.MergedProjectProfile,
+        profiles: List[fuzzer_profile.FuzzerProfile]
+    ) -> List[Dict[str, Any]]:
+        """Returns a record of each call site of a sink in the project, with
+        whether the call site is reachable and the fuzzers covering it. Sinks
+        without call sites have a single record with an empty location."""
+        # Getting data
+        callsite_list = []
+        function_list = []
+        for profile in profiles:
+            callsite_list.extend(cfg_load.extract_all_callsites(profile.function_call_depths))
+            for key in profile.all_class_functions.keys():
+                function_list.append(profile.all_class_functions[key])
+        (func_profile_list, called_func_dict, reachable_callsites) = (
+            self.third_party_func_profile(proj_profile, callsite_list, function_list)
+        )
 
-        return target_list, callsite_dict, reachable_func_list
+        # Loop through the call sites of each sink in this project
+        records = []
+        for fd in func_profile_list:
+            func_name = utils.demangle_cpp_func(fd.function_name)
+
+            # Retrieve called location as a list for this function
+            called_locations = called_func_dict.get(fd.function_name, dict())
+            if len(called_locations) == 0:
+                called_locations = {get_callsite_key(fd.function_name, ""): ""}
+
+            # Loop through the list of calledlocation for this function
+            for callsite_key, called_location in called_locations.items():
+                # Determine which fuzzers cover this called location. The
+                # location has the form "source_file#parent_function:line".
+                try:
+                    location, lineno_str = called_location.rsplit(":", 1)
+                    lineno = int(lineno_str)
+                except ValueError:
+                    location, lineno = "", -1
+                coverage_matrix = proj_profile.runtime_coverage_matrix
+                parent_funcs = [location.split("#")[-1]] + fd.incoming_references
+                list_of_fuzzer_covered: List[str] = []
+                if lineno != -1:
+                    for parent_func in parent_funcs:
+                        list_of_fuzzer_covered = coverage_matrix.get_fuzzers_covering_line(
+                            parent_func,
+                            lineno
+                        )
+                        if len(list_of_fuzzer_covered) > 0:
+                            break
+
+                records.append({
+                    "sink": func_name,
+                    "callsite-location": called_location,
+                    "reachable": callsite_key in reachable_callsites,
+                    "covered-by": list_of_fuzzer_covered
+                })
+        return records
 
     def analysis_func(
         self,
@@ -184,17 +280,6 @@ class Analysis(analysis.AnalysisInterface):
         """
         logger.info(f" - Running analysis {Analysis.get_name()}")
 
-        # Getting data
-        callsite_list = []
-        function_list = []
-        for profile in profiles:
-            callsite_list.extend(cfg_load.extract_all_callsites(profile.function_call_depths))
-            for key in profile.all_class_functions.keys():
-                function_list.append(profile.all_class_functions[key])
-        (func_profile_list, called_func_dict, reachable_func_list) = (
-            self.third_party_func_profile(proj_profile, callsite_list, function_list)
-        )
-
         html_string = ""
         html_string += "<div class=\"report-box\">"
 
@@ -251,60 +336,13 @@ class Analysis(analysis.AnalysisInterface):
             ]
         )
 
-        # Loop through each function call exists in this project
-        # Filer to only look for functions of interest
-        command_injection_sinks = [
-            "system",
-            "execve",
-            "execl",
-            "wordexp",
-            "popen",
-            "fdopen"
-        ]
-        # Keeping memory unsafe sinks empty for now.
-        # memory_unsafe_sinks = [
-        #     "strcpy",
-        #     "memcpy",
-        # ]
-        functions_of_interest = command_injection_sinks
-        for fd in func_profile_list:
-            func_name = utils.demangle_cpp_func(fd.function_name)
-
-            if func_name not in functions_of_interest:
-                continue
-
-            # Retrieve called location as a list for this function
-            if fd.function_name in called_func_dict.keys():
-                called_location_list = called_func_dict[fd.function_name]
-                if len(called_location_list) == 0:
-                    called_location_list = [""]
-            else:
-                called_location_list = [""]
-
-            # Loop through the list of calledlocation for this function
-            for called_location in called_location_list:
-                # Determine if the function call in this called location is reachable
-                hit = "Yes" if (called_location in reachable_func_list) else "No"
-
-                # Determine if this called location is covered by any fuzzers
-                fuzzer_hit = False
-                coverage = proj_profile.runtime_coverage
-                for parent_func in fd.incoming_references:
-                    try:
-                        lineno = int(called_location.split(":")[1])
-                    except ValueError:
-                        continue
-                    if coverage.is_func_lineno_hit(parent_func, lineno):
-                        fuzzer_hit = True
-                        break
-                list_of_fuzzer_covered = fd.reached_by_fuzzers if fuzzer_hit else [""]
-
-                html_string += html_helpers.html_table_add_row([
-                    f"{func_name}",
-                    f"{called_location}",
-                    f"{hit}",
-                    f"{str(list_of_fuzzer_covered)}"
-                ])
+        for record in self.get_callsite_records(proj_profile, profiles):
+            html_string += html_helpers.html_table_add_row([
+                f"{record['sink']}",
+                f"{record['callsite-location']}",
+                "Yes" if record['reachable'] else "No",
+                f"{str(record['covered-by'] or [''])}"
+            ])
         html_string += "</table>"
 
         html_string += "</div>"  # .collapsible
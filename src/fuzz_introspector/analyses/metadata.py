@@ -17,6 +17,8 @@ import os
 import logging
 
 from typing import (
+    Any,
+    Dict,
     List,
     Tuple,
 )
@@ -39,6 +41,27 @@ class Analysis(analysis.AnalysisInterface):
     def get_name():
         return "MetadataAnalysis"
 
+    def get_fuzzer_records(
+        self,
+        profiles: List[fuzzer_profile.FuzzerProfile]
+    ) -> List[Dict[str, Any]]:
+        """Returns the data files of each fuzzer with coverage"""
+        records = []
+        for profile in profiles:
+            if profile.coverage is None:
+                continue
+            records.append({
+                "fuzzer": profile.identifier,
+                "calltree-file": os.path.basename(profile.introspector_data_file),
+                "program-data-file": os.path.basename(
+                    profile.introspector_data_file + ".yaml"
+                ),
+                "coverage-files": [
+                    os.path.basename(cov_prof) for cov_prof in profile.coverage.coverage_files
+                ]
+            })
+        return records
+
     def analysis_func(
         self,
         toc_list: List[Tuple[str, str, int]],
@@ -74,22 +97,17 @@ class Analysis(analysis.AnalysisInterface):
                 ("Coverage file", "")
             ]
         )
-        for profile in profiles:
-            if profile.coverage is None:
-                continue
-            base_datafile = os.path.basename(profile.introspector_data_file)
-            base_yamlfile = os.path.basename(profile.introspector_data_file + ".yaml")
-            coverage_file_link_str = ""
-            for idx in range(len(profile.coverage.coverage_files)):
-                cov_prof = profile.coverage.coverage_files[idx]
-                cov_prof = os.path.basename(cov_prof)
-                coverage_file_link_str += f"<a href=\"{cov_prof}\">{cov_prof}</a>"
-                if idx < len(profile.coverage.coverage_files) - 1:
-                    coverage_file_link_str += ","
+        for record in self.get_fuzzer_records(profiles):
+            base_datafile = record["calltree-file"]
+            base_yamlfile = record["program-data-file"]
+            coverage_file_link_str = ",".join(
+                f"<a href=\"{cov_prof}\">{cov_prof}</a>"
+                for cov_prof in record["coverage-files"]
+            )
 
             html_string += html_helpers.html_table_add_row(
                 [
-                    profile.identifier,
+                    record["fuzzer"],
                     f"<a href=\"{base_datafile}\">{base_datafile}</a>",
                     f"<a href=\"{base_yamlfile}\">{base_yamlfile}</a>",
                     f"{coverage_file_link_str}"
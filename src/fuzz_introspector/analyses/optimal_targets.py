@@ -14,8 +14,6 @@
 """Analysis for identifying optimal targets"""
 
 import copy
-import os
-import json
 import logging
 
 from typing import (
@@ -317,18 +315,8 @@ class Analysis(analysis.AnalysisInterface):
                        "functions in the project will be:</p>"
         table_id = "all_functions_overview_table"
         tables.append(table_id)
-        all_function_table, all_functions_json = html_report.create_all_function_table(
+        all_function_table, _ = html_report.create_all_function_table(
             tables, new_profile, coverage_url, basefolder, table_id)
         html_string += all_function_table
         html_string += "</div>"  # close report-box
-
-        # Remove existing all funcs .js file
-        report_name = "analysis_1.js"
-        if os.path.isfile(report_name):
-            os.remove(report_name)
-
-        # Write all functions to the .js file
-        with open(report_name, "a+") as all_funcs_json_file:
-            all_funcs_json_file.write("var analysis_1_data = ")
-            all_funcs_json_file.write(json.dumps(all_functions_json))
         return html_string
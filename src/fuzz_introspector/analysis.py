@@ -18,10 +18,13 @@ import abc
 import logging
 import os
 
+import numpy
 
 from typing import (
+    Any,
     Dict,
     List,
+    Optional,
     Tuple,
     Type,
 )
@@ -95,6 +98,11 @@ class AnalysisInterface(abc.ABC):
         """Return name of analysis"""
         pass
 
+    def set_config(self, config: utils.ExclusionConfig) -> None:
+        """Applies the settings of the config file of the report. Analyses
+        without settings ignore it."""
+        pass
+
 
 def instantiate_analysis_interface(cls: Type[AnalysisInterface]):
     """Wrapper function to satisfy Mypy semantics"""
@@ -102,6 +110,21 @@ def instantiate_analysis_interface(cls: Type[AnalysisInterface]):
 
 
 class FuzzBranchBlocker:
+    __slots__ = (
+        'blocked_side',
+        'blocked_unique_not_covered_complexity',
+        'blocked_unique_reachable_complexity',
+        'blocked_unique_funcs',
+        'blocked_not_covered_complexity',
+        'blocked_reachable_complexity',
+        'sides_hitcount_diff',
+        'source_file',
+        'branch_line_number',
+        'blocked_side_line_numder',
+        'function_name',
+        'coverage_report_link',
+    )
+
     def __init__(self, side, unique_not_cov_comp, unique_reach_comp, unique_funcs,
                  not_cov_comp, reach_comp, hitcount_diff, filename, b_line, s_line, fname,
                  link) -> None:
@@ -276,7 +299,8 @@ def overlay_calltree_with_coverage(
         profile: fuzzer_profile.FuzzerProfile,
         proj_profile: project_profile.MergedProjectProfile,
         coverage_url: str,
-        basefolder: str) -> None:
+        basefolder: str,
+        branch_blockers_file: Optional[str] = None) -> None:
     # We use the callstack to keep track of all function parents. We need this
     # when looking up if a callsite was hit or not. This is because the coverage
     # information about a callsite is located in coverage data of the function
@@ -383,29 +407,49 @@ def overlay_calltree_with_coverage(
         # logger.info("Assigning forward red: %d for index %d"%(forward_red, idx1))
         n1.cov_forward_reds = forward_red
         n1.cov_largest_blocked_func = largest_blocked_name
+    profile.reset_fuzz_blockers()
 
     update_branch_complexities(proj_profile.all_functions, profile.coverage)
     profile.branch_blockers = detect_branch_level_blockers(proj_profile.all_functions, profile,
                                                            target_coverage_url)
     logger.info(f"[+] found {len(profile.branch_blockers)} branch blockers.")
-    branch_blockers_list = []
-    for blk in profile.branch_blockers:
-        branch_blockers_list.append(
-            {
-                'blocked_side': repr(blk.blocked_side),
-                'blocked_unique_not_covered_complexity': blk.blocked_unique_not_covered_complexity,
-                'blocked_unique_reachable_complexity': blk.blocked_unique_reachable_complexity,
-                'blocked_unique_functions': blk.blocked_unique_funcs,
-                'blocked_not_covered_complexity': blk.blocked_not_covered_complexity,
-                'blocked_reachable_complexity': blk.blocked_reachable_complexity,
-                'sides_hitcount_diff': blk.sides_hitcount_diff,
-                'source_file': blk.source_file,
-                'branch_line_number': blk.branch_line_number,
-                'blocked_side_line_numder': blk.blocked_side_line_numder,
-                'function_name': blk.function_name
-            }
+    branch_blockers_records = (
+        get_branch_blocker_record(blk) for blk in profile.branch_blockers
+    )
+    if branch_blockers_file is None:
+        utils.write_to_summary_file(
+            profile.identifier,
+            'branch_blockers',
+            list(branch_blockers_records)
         )
-    utils.write_to_summary_file(profile.identifier, 'branch_blockers', branch_blockers_list)
+    else:
+        # Stream large blocker lists as JSON lines, referenced from the summary
+        utils.append_to_json_lines_file(
+            branch_blockers_file,
+            (dict(record, fuzzer=profile.identifier) for record in branch_blockers_records)
+        )
+        utils.write_to_summary_file(
+            profile.identifier,
+            'branch_blockers_file',
+            branch_blockers_file
+        )
+
+
+def get_branch_blocker_record(blk: FuzzBranchBlocker) -> Dict[str, Any]:
+    """Returns the data of a branch blocker as written to the json files"""
+    return {
+        'blocked_side': repr(blk.blocked_side),
+        'blocked_unique_not_covered_complexity': blk.blocked_unique_not_covered_complexity,
+        'blocked_unique_reachable_complexity': blk.blocked_unique_reachable_complexity,
+        'blocked_unique_functions': blk.blocked_unique_funcs,
+        'blocked_not_covered_complexity': blk.blocked_not_covered_complexity,
+        'blocked_reachable_complexity': blk.blocked_reachable_complexity,
+        'sides_hitcount_diff': blk.sides_hitcount_diff,
+        'source_file': blk.source_file,
+        'branch_line_number': blk.branch_line_number,
+        'blocked_side_line_numder': blk.blocked_side_line_numder,
+        'function_name': blk.function_name
+    }
 
 
 def update_branch_complexities(all_functions: Dict[str, function_profile.FunctionProfile],
@@ -413,44 +457,76 @@ def update_branch_complexities(all_functions: Dict[str, function_profile.Functio
     """
     Traverse every branch profile and update the side complexities based on reached funcs
     complexity.
+
+    Functions are given ids, and the functions on every branch side are
+    flattened into a single array of ids, so each complexity sum is computed
+    with one weighted bincount over all branch sides.
     """
-    for func_k, func in all_functions.items():
-        for branch_k, branch in func.branch_profiles.items():
-            branch.branch_false_side_unique_not_covered_complexity = 0
-            branch.branch_false_side_unique_reachable_complexity = 0
-            branch.branch_true_side_unique_not_covered_complexity = 0
-            branch.branch_true_side_unique_reachable_complexity = 0
-            branch.branch_false_side_reachable_complexity = 0
-            branch.branch_true_side_reachable_complexity = 0
-            branch.branch_false_side_not_covered_complexity = 0
-            branch.branch_true_side_not_covered_complexity = 0
-            false_side_funcs = branch.get_side_unique_reachable_funcnames(bp.BranchSide.FALSE)
-            true_side_funcs = branch.get_side_unique_reachable_funcnames(bp.BranchSide.TRUE)
-            # Iterate over the list of funcs instead of set, because we want to account
-            # for the complexity of repeating functions.
-            for fn in branch.branch_false_side_funcs:
-                if fn not in all_functions:
-                    continue
-                new_comp = all_functions[fn].total_cyclomatic_complexity
-                branch.branch_false_side_reachable_complexity += new_comp
-                if fn in false_side_funcs:
-                    branch.branch_false_side_unique_reachable_complexity += new_comp
-                if coverage.is_func_hit(fn) is False:
-                    branch.branch_false_side_not_covered_complexity += new_comp
-                    if fn in false_side_funcs:
-                        branch.branch_false_side_unique_not_covered_complexity += new_comp
-
-            for fn in branch.branch_true_side_funcs:
-                if fn not in all_functions:
-                    continue
-                new_comp = all_functions[fn].total_cyclomatic_complexity
-                branch.branch_true_side_reachable_complexity += new_comp
-                if fn in true_side_funcs:
-                    branch.branch_true_side_unique_reachable_complexity += new_comp
-                if coverage.is_func_hit(fn) is False:
-                    branch.branch_true_side_not_covered_complexity += new_comp
-                    if fn in true_side_funcs:
-                        branch.branch_true_side_unique_not_covered_complexity += new_comp
+    func_ids = {func_name: idx for idx, func_name in enumerate(all_functions)}
+    complexities = numpy.array(
+        [fd.total_cyclomatic_complexity for fd in all_functions.values()],
+        dtype=numpy.int64
+    )
+    hit_functions = coverage.get_hit_functions()
+    not_covered = numpy.array(
+        [coverage.resolve_funcname(func_name) not in hit_functions
+         for func_name in all_functions],
+        dtype=bool
+    )
+
+    # Branch side `i` is the true side of branches[i // 2] for even `i` and the
+    # false side for odd `i`.
+    branches: List[bp.BranchProfile] = []
+    side_idxs: List[int] = []
+    side_func_ids: List[int] = []
+    side_func_unique: List[bool] = []
+    for func in all_functions.values():
+        for branch in func.branch_profiles.values():
+            for side_offset, branch_side, side_funcs in (
+                (0, bp.BranchSide.TRUE, branch.branch_true_side_funcs),
+                (1, bp.BranchSide.FALSE, branch.branch_false_side_funcs)
+            ):
+                unique_funcs = branch.get_side_unique_reachable_funcnames(branch_side)
+                # Iterate over the list of funcs instead of set, because we want to account
+                # for the complexity of repeating functions.
+                for fn in side_funcs:
+                    if fn not in func_ids:
+                        continue
+                    side_idxs.append(len(branches) * 2 + side_offset)
+                    side_func_ids.append(func_ids[fn])
+                    side_func_unique.append(fn in unique_funcs)
+            branches.append(branch)
+
+    side_count = len(branches) * 2
+    sides = numpy.array(side_idxs, dtype=numpy.int64)
+    ids = numpy.array(side_func_ids, dtype=numpy.int64)
+    unique = numpy.array(side_func_unique, dtype=bool)
+    weights = complexities[ids]
+    not_covered_weights = numpy.where(not_covered[ids], weights, 0)
+
+    def side_sums(side_weights: Any) -> List[int]:
+        return numpy.bincount(
+            sides,
+            weights=side_weights,
+            minlength=side_count
+        ).astype(numpy.int64).tolist()
+
+    reachable = side_sums(weights)
+    unique_reachable = side_sums(numpy.where(unique, weights, 0))
+    not_covered_sums = side_sums(not_covered_weights)
+    unique_not_covered = side_sums(numpy.where(unique, not_covered_weights, 0))
+
+    for idx, branch in enumerate(branches):
+        true_idx = idx * 2
+        false_idx = true_idx + 1
+        branch.branch_true_side_reachable_complexity = reachable[true_idx]
+        branch.branch_false_side_reachable_complexity = reachable[false_idx]
+        branch.branch_true_side_unique_reachable_complexity = unique_reachable[true_idx]
+        branch.branch_false_side_unique_reachable_complexity = unique_reachable[false_idx]
+        branch.branch_true_side_not_covered_complexity = not_covered_sums[true_idx]
+        branch.branch_false_side_not_covered_complexity = not_covered_sums[false_idx]
+        branch.branch_true_side_unique_not_covered_complexity = unique_not_covered[true_idx]
+        branch.branch_false_side_unique_not_covered_complexity = unique_not_covered[false_idx]
 
 
 def detect_branch_level_blockers(
@@ -466,35 +542,33 @@ def detect_branch_level_blockers(
         return []
     coverage = fuzz_profile.coverage
 
-    for branch_string in coverage.branch_cov_map:
+    for branch_key, (true_hitcount, false_hitcount) in coverage.branch_cov_map.items():
         blocked_side = None
-        true_hitcount, false_hitcount = coverage.branch_cov_map[branch_string]
-
-        # Catch exceptions in case some of the string splitting fails
-        try:
-            function_name, rest_string = branch_string.rsplit(':', maxsplit=1)
-            line_number, column_number = rest_string.split(',')
-        except ValueError:
-            logger.error(f"branch-profiling: error getting function name from {branch_string}")
-            continue
+        function_name, line_number, column_number = branch_key
 
         if function_name not in functions_profile:
+            # Coverage of excluded functions is expected and not an error
+            if (fuzz_profile.exclusion_config is not None
+                    and fuzz_profile.exclusion_config.is_function_excluded(function_name)):
+                continue
             logger.error(f"branch-profiling: func name not in functions_profile {function_name}")
             continue
 
-        llvm_branch_profile = functions_profile[function_name].branch_profiles
         source_file_path = functions_profile[function_name].function_source_file
         # Just extract the file name and skip the path
         source_file_name = os.path.basename(source_file_path)
-        llvm_branch_string = f'{source_file_name}:{line_number},{column_number}'
-
-        if llvm_branch_string not in llvm_branch_profile:
-            # TODO: there are cases that the column number of the branch is not consistent between
-            # llvm and coverage debug info. For now we skip those cases.
-            logger.debug(f"branch-profiling: failed to find branch profile {llvm_branch_string}")
+        llvm_branch = functions_profile[function_name].get_branch_profile(
+            source_file_name,
+            line_number,
+            column_number
+        )
+        if llvm_branch is None:
+            logger.debug(
+                "branch-profiling: failed to find branch profile "
+                f"{source_file_name}:{line_number},{column_number}"
+            )
             continue
 
-        llvm_branch = llvm_branch_profile[llvm_branch_string]
         # For now this checks for not-taken branch sides, instead
         # it may become interesting to report less-taken side: like
         # the side that is taken less than 20% of the times
@@ -506,7 +580,7 @@ def detect_branch_level_blockers(
             blocked_reachable_com = llvm_branch.branch_true_side_reachable_complexity
             blocked_not_covered_com = llvm_branch.branch_true_side_not_covered_complexity
             side_line = llvm_branch.branch_true_side_pos
-            side_line_number = side_line.split(':')[1].split(',')[0]
+            side_line_number = llvm_branch.branch_true_side_line
             blocked_unique_funcs = list(
                 llvm_branch.get_side_unique_reachable_funcnames(blocked_side))
         elif true_hitcount != 0 and false_hitcount == 0:
@@ -517,25 +591,25 @@ def detect_branch_level_blockers(
             blocked_reachable_com = llvm_branch.branch_false_side_reachable_complexity
             blocked_not_covered_com = llvm_branch.branch_false_side_not_covered_complexity
             side_line = llvm_branch.branch_false_side_pos
-            side_line_number = side_line.split(':')[1].split(',')[0]
+            side_line_number = llvm_branch.branch_false_side_line
             blocked_unique_funcs = list(
                 llvm_branch.get_side_unique_reachable_funcnames(blocked_side))
 
         if blocked_side:
             # Sanity check on line numbers: anomaly can happen because of debug info inaccuracy
-            if int(line_number) > int(side_line_number):
+            if side_line_number == -1 or line_number > side_line_number:
                 logger.debug("Branch-blocker: Anomalous branch sides line nubmers: %s:%s -> %s" % (
                              source_file_path, line_number, side_line_number))
                 continue
 
             # Sanity check for fall through cases: checks if the branch side has coverage or not
             if coverage.get_type() == "file":
-                if coverage.is_file_lineno_hit(source_file_path, int(side_line_number)):
+                if coverage.is_file_lineno_hit(source_file_path, side_line_number):
                     logger.debug("Branch-blocker: fall through branch side is not blocked: %s"
                                  % (side_line))
                     continue
             else:
-                if coverage.is_func_lineno_hit(function_name, int(side_line_number)):
+                if coverage.is_func_lineno_hit(function_name, side_line_number):
                     logger.debug("Branch-blocker: fall through branch side is not blocked: %s"
                                  % (side_line))
                     continue
@@ -544,14 +618,14 @@ def detect_branch_level_blockers(
             link = fuzz_profile.resolve_coverage_link(
                 target_coverage_url,
                 source_file_path,
-                int(line_number),
+                line_number,
                 function_name
             )
             new_blk = FuzzBranchBlocker(blocked_side, blocked_unique_not_covered_com,
                                         blocked_unique_reachable_com, blocked_unique_funcs,
                                         blocked_not_covered_com, blocked_reachable_com,
-                                        hitcount_diff, source_file_path, line_number,
-                                        side_line_number, function_name, link)
+                                        hitcount_diff, source_file_path, str(line_number),
+                                        str(side_line_number), function_name, link)
             fuzz_blockers.append(new_blk)
 
     fuzz_blockers.sort(key=lambda x: [x.blocked_unique_not_covered_complexity,
@@ -0,0 +1,110 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Caching of the stages of a report run.
+
+A cached stage stores its result in the cache directory together with a
+fingerprint of its inputs. When the report is created again, the stored
+result is used if the fingerprint of the inputs is unchanged, and the stage
+is redone otherwise. Input files are fingerprinted by their path, size and
+modification time, as is done for coverage stores, see
+`code_coverage.load_llvm_coverage_store`.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sys
+
+from typing import (
+    Any,
+    Iterable,
+    Optional,
+)
+
+logger = logging.getLogger(name=__name__)
+
+# Changes whenever the format of cached results changes
+CACHE_VERSION = 3
+STAGE_FILE_SUFFIX = ".stage"
+
+# Calltrees are nested objects, so pickling them recurses once per level
+PICKLE_RECURSION_LIMIT = 10000
+
+
+def get_fingerprint(values: Iterable[Any], files: Iterable[str] = ()) -> str:
+    """Returns a fingerprint of the `repr` of `values` and of the state of
+    `files`."""
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"fuzz-introspector-cache-{CACHE_VERSION}\n".encode())
+    for value in values:
+        fingerprint.update(f"{value!r}\n".encode())
+    for filename in sorted(files):
+        stat = os.stat(filename)
+        fingerprint.update(
+            f"{os.path.abspath(filename)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode()
+        )
+    return fingerprint.hexdigest()
+
+
+class StageCache:
+    """Results of the stages of earlier report runs, stored in `cache_dir`"""
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+
+    def _get_stage_path(self, stage: str) -> str:
+        return os.path.join(self.cache_dir, stage.replace("/", "_") + STAGE_FILE_SUFFIX)
+
+    def load(self, stage: str, fingerprint: str) -> Optional[Any]:
+        """Returns the stored result of `stage`, or None if there is no
+        result for inputs with the given fingerprint."""
+        stage_path = self._get_stage_path(stage)
+        if not os.path.isfile(stage_path):
+            return None
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, PICKLE_RECURSION_LIMIT))
+        try:
+            with open(stage_path, "rb") as stage_file:
+                # The fingerprint is stored first, so stale results are not read
+                if pickle.load(stage_file) != fingerprint:
+                    logger.info(f"Cache of stage {stage} is stale")
+                    return None
+                result = pickle.load(stage_file)
+        except Exception as e:
+            logger.info(f"Ignoring unreadable cache of stage {stage}: {e}")
+            return None
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        logger.info(f"Using cached result of stage {stage}")
+        return result
+
+    def store(self, stage: str, fingerprint: str, result: Any) -> None:
+        """Stores the result of `stage` for inputs with the given
+        fingerprint. The result is not stored if it can not be pickled."""
+        stage_path = self._get_stage_path(stage)
+        tmp_path = f"{stage_path}.tmp"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, PICKLE_RECURSION_LIMIT))
+        try:
+            with open(tmp_path, "wb") as stage_file:
+                pickle.dump(fingerprint, stage_file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(result, stage_file, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError, TypeError, AttributeError) as e:
+            logger.info(f"Not caching stage {stage}: {e}")
+            os.remove(tmp_path)
+            return
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        os.replace(tmp_path, stage_path)
@@ -13,13 +13,17 @@
 # limitations under the License.
 """ Module for loading CFG files """
 
+import bisect
 import logging
 
 from typing import (
+    Dict,
     List,
-    Optional
+    Optional,
+    Tuple,
 )
 
+from fuzz_introspector import utils
 from fuzz_introspector.exceptions import CalltreeError
 
 logger = logging.getLogger(name=__name__)
@@ -29,6 +33,27 @@ class CalltreeCallsite():
     """
     Represents a single node in the calltree
     """
+
+    __slots__ = (
+        'dst_function_name',
+        'dst_function_source_file',
+        'src_linenumber',
+        'parent_calltree_callsite',
+        'depth',
+        'src_function_source_file',
+        'src_function_name',
+        'children',
+        'cov_ct_idx',
+        'cov_parent',
+        'cov_hitcount',
+        'cov_color',
+        'hitcount',
+        'cov_link',
+        'cov_callsite_link',
+        'cov_forward_reds',
+        'cov_largest_blocked_func',
+    )
+
     def __init__(
         self,
         dst_function_name: str,
@@ -81,6 +106,64 @@ def extract_all_callsites(calltree: Optional[CalltreeCallsite]) -> List[Calltree
     return cs_list
 
 
+class CalltreeIndex:
+    """
+    Index of the nodes of a calltree, in the pre-order of
+    `extract_all_callsites`.
+
+    The subtree of the node at index `i` is the range of nodes from `i` up to,
+    not including, `subtree_ends[i]`. The children of a node are the nodes in
+    its subtree one level deeper than the node. For lookups by line number
+    the children of a node are indexed by the line number of their call site
+    the first time they are looked up.
+    """
+    def __init__(self, calltree: Optional[CalltreeCallsite]) -> None:
+        self.calltree = calltree
+        self.nodes = extract_all_callsites(calltree)
+        self.subtree_ends: List[int] = [len(self.nodes)] * len(self.nodes)
+        # Index of the first node of each function
+        self.function_nodes: Dict[str, int] = dict()
+        self._children: List[List[int]] = [[] for _ in self.nodes]
+        # Child line numbers in ascending order, and for each the position
+        # of the last child in calltree order with at most that line number
+        self._child_line_index: Dict[int, Tuple[List[int], List[int]]] = dict()
+
+        stack: List[int] = []
+        for idx, node in enumerate(self.nodes):
+            while len(stack) > 0 and self.nodes[stack[-1]].depth >= node.depth:
+                self.subtree_ends[stack.pop()] = idx
+            if len(stack) > 0 and self.nodes[stack[-1]].depth + 1 == node.depth:
+                self._children[stack[-1]].append(idx)
+            stack.append(idx)
+            self.function_nodes.setdefault(node.dst_function_name, idx)
+
+    def get_function_node(self, function_name: str) -> Optional[int]:
+        return self.function_nodes.get(function_name)
+
+    def get_last_child_before_line(self, node_idx: int, linenumber: int) -> Optional[int]:
+        """Returns the last child of a node, in calltree order, with a call
+        site at or before `linenumber`."""
+        if node_idx not in self._child_line_index:
+            children = self._children[node_idx]
+            order = sorted(
+                range(len(children)),
+                key=lambda pos: self.nodes[children[pos]].src_linenumber
+            )
+            last_positions: List[int] = []
+            for pos in order:
+                last_positions.append(max(pos, last_positions[-1]) if last_positions else pos)
+            self._child_line_index[node_idx] = (
+                [self.nodes[children[pos]].src_linenumber for pos in order],
+                last_positions
+            )
+
+        lines, last_positions = self._child_line_index[node_idx]
+        count = bisect.bisect_right(lines, linenumber)
+        if count == 0:
+            return None
+        return self._children[node_idx][last_positions[count - 1]]
+
+
 def print_ctcs_tree(ctcs: CalltreeCallsite) -> None:
     spacing = " " * int(ctcs.depth)
     print(
@@ -91,16 +174,23 @@ def print_ctcs_tree(ctcs: CalltreeCallsite) -> None:
         print_ctcs_tree(c)
 
 
-def data_file_read_calltree(filename: str) -> Optional[CalltreeCallsite]:
+def data_file_read_calltree(
+    filename: str,
+    exclusion_config: Optional[utils.ExclusionConfig] = None
+) -> Optional[CalltreeCallsite]:
     """
     Extracts the calltree of a fuzzer from a .data file.
     This is for C/C++ files
 
+    Callsites of functions excluded by `exclusion_config` are skipped together
+    with their subtrees. The root of the tree is never excluded.
+
     Returns a CalltreeCallsite that is the root of the tree read.
     """
     read_tree = False
     curr_ctcs_node = None
     curr_depth = -1
+    excluded_depth = -1
     with open(filename, "r") as flog:
         # Read in all lines catching decode errors
         all_lines = []
@@ -132,6 +222,18 @@ def data_file_read_calltree(filename: str) -> Optional[CalltreeCallsite]:
                 space_count = len(line) - len(line.lstrip(' '))
                 depth = int(space_count / 2)
 
+                # Skip the subtree of an excluded callsite
+                if excluded_depth != -1:
+                    if depth > excluded_depth:
+                        continue
+                    excluded_depth = -1
+                if (exclusion_config is not None
+                        and curr_depth != -1
+                        and (exclusion_config.is_function_excluded(target_func)
+                             or exclusion_config.is_file_excluded(filename))):
+                    excluded_depth = depth
+                    continue
+
                 # Create a callsite nide
                 ctcs = CalltreeCallsite(
                     target_func,
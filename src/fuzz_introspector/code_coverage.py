@@ -13,20 +13,40 @@
 # limitations under the License.
 """Module for handling code coverage reports"""
 
-import os
+import array
+import hashlib
+import json
 import logging
+import os
+import sqlite3
+import struct
+import sys
+
+import numpy
 
 from typing import (
+    Any,
     Dict,
+    FrozenSet,
+    Iterable,
+    ItemsView,
+    Iterator,
     List,
+    MutableMapping,
     Optional,
+    Set,
     Tuple,
 )
 
 from fuzz_introspector import utils
+from fuzz_introspector.exceptions import DataLoaderError
 
 logger = logging.getLogger(name=__name__)
 
+COVERAGE_STORE_MAGIC = b"FICOVST2"
+COVERAGE_STORE_SUFFIX = ".covstore"
+UINT32_MAX = numpy.iinfo(numpy.uint32).max
+
 
 class CoverageProfile:
     """Stores and handles a runtime coverage data.
@@ -39,19 +59,32 @@ class CoverageProfile:
 
         If the key is file paths then `set_type` returns "file".
 
-    :ivar Dict[str, List[Tuple[int, int]]] file_map: Dictionary holding
-        mappings between source code files and line numbers and hitcounts.
+        For C/C++ the covmap may be backed by a memory-mapped
+        :py:class:`CoverageStore`, see :py:func:`load_llvm_coverage`.
 
-    :ivar Dict[str, Tuple[int, int]] branch_cov_map: Dictionary to collect
-        the branch coverage info in the form of current_func:line_number as
-        the key and true_hit and false_hit as a tuple value.
+    :ivar Dict[str, List[int]] file_map: Dictionary holding mappings
+        between source code files and the line numbers hit in them.
+
+    :ivar Dict[Tuple[str, int, int], Tuple[int, int]] branch_cov_map:
+        Dictionary to collect the branch coverage info with a tuple of
+        function name, line number and column number as the key and
+        true_hit and false_hit as a tuple value. Like the covmap, it may be
+        backed by a :py:class:`CoverageStore`.
     """
     def __init__(self) -> None:
-        self.covmap: Dict[str, List[Tuple[int, int]]] = dict()
-        self.file_map: Dict[str, List[Tuple[int, int]]] = dict()
-        self.branch_cov_map: Dict[str, Tuple[int, int]] = dict()
+        self.covmap: MutableMapping[str, List[Tuple[int, int]]] = dict()
+        self.file_map: Dict[str, List[int]] = dict()
+        self.branch_cov_map: MutableMapping[Tuple[str, int, int], Tuple[int, int]] = dict()
         self._cov_type = ""
         self.coverage_files: List[str] = []
+        self._funcname_resolver: Optional[FunctionNameResolver] = None
+        self._funcname_resolver_key: Tuple[int, int] = (0, 0)
+        self._hit_functions: Optional[Set[str]] = None
+        self._hit_functions_key: Tuple[int, int] = (0, 0)
+        self._file_index_key: Tuple[int, int] = (0, 0)
+        self._file_suffix_index = utils.PathSuffixIndex([])
+        self._file_line_sets: Dict[str, FrozenSet[int]] = dict()
+        self._resolved_file_keys: Dict[str, Optional[str]] = dict()
 
     def set_type(self, cov_type: str) -> None:
         self._cov_type = cov_type
@@ -85,63 +118,107 @@ class CoverageProfile:
         :returns: `True` if lineno is covered in the given soruce file. `False`
             otherwise.
         """
-        logger.info(f"In generic hit -- {str(target_file)}")
+        logger.debug(f"In generic hit -- {str(target_file)}")
         if self.get_type() != "file":
-            logger.info("Failed to check hit")
+            logger.debug("Failed to check hit")
             return False
 
-        logger.info("File type")
-        target_key = target_file
+        self._refresh_file_index()
+        target_key: Optional[str] = target_file
         # Resolve name if required. This is needed to normalise filenames.
         if resolve_name:
-            splits = target_file.split(".")
-            potentials = []
-            curr = ""
-            found_key = ""
-            for s2 in splits:
-                curr += s2
-                potentials.append(curr + ".py")
-                curr += "/"
-            logger.info(f"Potentials: {str(potentials)}")
-            for potential_key in self.file_map:
-                logger.info(f"Scanning {str(potential_key)}")
-                for p in potentials:
-                    if potential_key.endswith(p):
-                        found_key = potential_key
-                        break
-            logger.info(f"Found key: {str(found_key)}")
-            if found_key == "":
-                logger.info("Could not find key")
+            if target_file not in self._resolved_file_keys:
+                self._resolved_file_keys[target_file] = self._resolve_file_key(target_file)
+            target_key = self._resolved_file_keys[target_file]
+            if target_key is None:
+                logger.debug(f"Could not find key for {target_file}")
                 return False
-            target_key = found_key
 
         # Return False if file is not in file_map
-        if target_key not in self.file_map:
-            logger.info("Target key is not in file_map")
+        if target_key not in self._file_line_sets:
+            logger.debug("Target key is not in file_map")
             return False
 
         # Return True if lineno is in the relevant filemap value.
-        if lineno in self.file_map[target_key]:
-            logger.info("Success")
+        hit_lines = self._file_line_sets[target_key]
+        if lineno in hit_lines:
             return True
 
         # Check if "fuzz" is in the filename. This is a hack in python coverage
         if "fuzz" in target_key:
-            logger.info("Checking adjustment")
             # 11 in the below code reflects the size of the coverage stub added here:
             # https://github.com/google/oss-fuzz/blob/360b484fa0f026c0dea44c62897519c6c99127cc/infra/base-images/base-builder/compile_python_fuzzer#L29-L40  # noqa: E501
-            if lineno + 11 in self.file_map[target_key]:
-                logger.info("Success with line number adjustment")
+            if lineno + 11 in hit_lines:
+                logger.debug("Success with line number adjustment")
                 return True
 
         return False
 
+    def _refresh_file_index(self) -> None:
+        """(Re)builds the indexes over `file_map` used by `is_file_lineno_hit`
+        if the file map has been replaced or has changed size.
+        """
+        file_index_key = (id(self.file_map), len(self.file_map))
+        if self._file_index_key == file_index_key:
+            return
+        self._file_index_key = file_index_key
+        self._file_suffix_index = utils.PathSuffixIndex(self.file_map)
+        self._file_line_sets = {
+            filename: frozenset(lines) for filename, lines in self.file_map.items()
+        }
+        self._resolved_file_keys = dict()
+
+    def _resolve_file_key(self, target_file: str) -> Optional[str]:
+        """Finds the file_map key of a dotted python name. The longest module
+        path matching at a path separator wins, and otherwise the last key
+        ending with any of the candidate module paths is used.
+        """
+        potentials = utils.get_python_module_file_candidates(target_file)
+        for potential in reversed(potentials):
+            found_key = self._file_suffix_index.lookup(potential)
+            if found_key is not None:
+                return found_key
+
+        found_key = None
+        potential_suffixes = tuple(potentials)
+        for potential_key in self.file_map:
+            if potential_key.endswith(potential_suffixes):
+                found_key = potential_key
+        return found_key
+
     def is_func_hit(self, funcname: str) -> bool:
         """Returs whether a function is hit"""
-        _, lines_hit = self.get_hit_summary(funcname)
-        if lines_hit is not None and lines_hit > 0:
-            return True
-        return False
+        fuzz_key = self.resolve_funcname(funcname)
+        return fuzz_key is not None and fuzz_key in self.get_hit_functions()
+
+    def get_hit_functions(self) -> Set[str]:
+        """Returns the covmap keys of all functions with at least one line hit.
+
+        The set is computed once and recomputed if the covmap has been
+        replaced or has changed size.
+        """
+        hit_functions_key = (id(self.covmap), len(self.covmap))
+        if self._hit_functions is None or self._hit_functions_key != hit_functions_key:
+            self._hit_functions = set()
+            for funcname in self.covmap:
+                _, hits = _get_covmap_arrays(self.covmap, funcname)
+                if hits.any():
+                    self._hit_functions.add(funcname)
+            self._hit_functions_key = hit_functions_key
+        return self._hit_functions
+
+    def resolve_funcname(self, funcname: str) -> Optional[str]:
+        """Returns the covmap key matching a function name, accepting the
+        mangled, demangled and normalised spellings of the name.
+
+        The alias index is built on first use and rebuilt if the covmap has
+        been replaced or has changed size.
+        """
+        resolver_key = (id(self.covmap), len(self.covmap))
+        if self._funcname_resolver is None or self._funcname_resolver_key != resolver_key:
+            self._funcname_resolver = FunctionNameResolver(self.covmap)
+            self._funcname_resolver_key = resolver_key
+        return self._funcname_resolver.resolve(funcname)
 
     def get_hit_details(self, funcname: str) -> List[Tuple[int, int]]:
         """Returns details of code coverage for a given function.
@@ -157,15 +234,8 @@ class CoverageProfile:
             was covered.
         """
         logger.debug(f"Getting coverage of {funcname}")
-        fuzz_key = None
-        if funcname in self.covmap:
-            fuzz_key = funcname
-        elif utils.demangle_cpp_func(funcname) in self.covmap:
-            fuzz_key = utils.demangle_cpp_func(funcname)
-        elif utils.normalise_str(funcname) in self.covmap:
-            fuzz_key = utils.normalise_str(funcname)
-
-        if fuzz_key is None or fuzz_key not in self.covmap:
+        fuzz_key = self.resolve_funcname(funcname)
+        if fuzz_key is None:
             return []
         return self.covmap[fuzz_key]
 
@@ -185,12 +255,7 @@ class CoverageProfile:
             the total amount of lines in a function and second element is the
             amount of lines in the function that are hit.
         """
-        fuzz_key = None
-        if funcname in self.covmap:
-            fuzz_key = funcname
-        elif utils.demangle_cpp_func(funcname) in self.covmap:
-            fuzz_key = utils.demangle_cpp_func(funcname)
-
+        fuzz_key = self.resolve_funcname(funcname)
         if fuzz_key is None:
             return None, None
 
@@ -212,9 +277,182 @@ class CoverageProfile:
         return False
 
 
+class FunctionNameResolver:
+    """Maps the spellings of function names to canonical coverage keys.
+
+    Every key is indexed by itself, its demangled and its normalised form,
+    with exact keys taking precedence. Names that are not in the index are
+    resolved by demangling and normalising them once, and the result is
+    memoized, so repeated lookups are a single dictionary access.
+    """
+    def __init__(self, keys: Iterable[str]) -> None:
+        self._aliases: Dict[str, Optional[str]] = dict()
+        all_keys = list(keys)
+        for key in all_keys:
+            self._aliases[key] = key
+        for key in all_keys:
+            self._aliases.setdefault(utils.demangle_cpp_func(key), key)
+        for key in all_keys:
+            self._aliases.setdefault(utils.normalise_str(key), key)
+
+    def resolve(self, funcname: str) -> Optional[str]:
+        try:
+            return self._aliases[funcname]
+        except KeyError:
+            pass
+        resolved = self._aliases.get(utils.demangle_cpp_func(funcname))
+        if resolved is None:
+            resolved = self._aliases.get(utils.normalise_str(funcname))
+        self._aliases[funcname] = resolved
+        return resolved
+
+
+class CoverageMatrix:
+    """Coverage of a set of fuzzers laid out function by function.
+
+    The matrix keeps the coverage profile of each fuzzer and an index of the
+    fuzzers that have coverage of each function. The coverage of a function
+    is assembled when it is queried: a sorted vector of the line numbers seen
+    by any of those fuzzers, and a hitcount matrix with one row per line and
+    one column per fuzzer covering the function. Hitcounts are saturated at
+    the maximum of uint32.
+
+    Coverage of store-backed profiles therefore stays in the stores, and
+    merging coverage is a vectorized max over the columns of a function.
+    """
+    def __init__(
+        self,
+        fuzzer_names: List[str],
+        coverage_profiles: List[Optional[CoverageProfile]]
+    ) -> None:
+        self.fuzzer_names = list(fuzzer_names)
+        self.coverage_profiles = list(coverage_profiles)
+        self.function_fuzzers: Dict[str, array.array] = dict()
+        self._funcname_resolver: Optional[FunctionNameResolver] = None
+
+    @classmethod
+    def from_coverage_profiles(
+        cls,
+        fuzzer_names: List[str],
+        coverage_profiles: List[Optional[CoverageProfile]]
+    ) -> 'CoverageMatrix':
+        """Creates a matrix where column `i` holds `coverage_profiles[i]`.
+        Fuzzers without coverage do not cover any function.
+        """
+        matrix = cls(fuzzer_names, coverage_profiles)
+        for col, cp in enumerate(coverage_profiles):
+            if cp is None:
+                continue
+            for funcname in cp.covmap:
+                if funcname not in matrix.function_fuzzers:
+                    matrix.function_fuzzers[funcname] = array.array('i')
+                matrix.function_fuzzers[funcname].append(col)
+        return matrix
+
+    def get_function_coverage(self, funcname: str) -> Tuple[Any, Any, List[int]]:
+        """Returns the line numbers of a covmap key, the hitcount matrix of
+        the function and the fuzzer indices of the matrix columns."""
+        cols = self.function_fuzzers[funcname].tolist()
+        columns = []
+        for col in cols:
+            covmap = self.coverage_profiles[col].covmap  # type: ignore
+            columns.append(_get_covmap_arrays(covmap, funcname))
+        all_lines = numpy.unique(
+            numpy.concatenate([lines for lines, _ in columns])
+        )
+        func_hits = numpy.zeros((len(all_lines), len(cols)), dtype=numpy.uint32)
+        for idx, (lines, hits) in enumerate(columns):
+            # Lines may be repeated within a function, e.g. for macros, so
+            # keep the highest count of each line.
+            numpy.maximum.at(
+                func_hits[:, idx],
+                numpy.searchsorted(all_lines, lines),
+                numpy.minimum(hits, UINT32_MAX).astype(numpy.uint32)
+            )
+        return all_lines, func_hits, cols
+
+    def get_merged_function_lines(self, funcname: str) -> Tuple[Any, Any]:
+        """Returns the line numbers of a covmap key with the highest hitcount
+        of any fuzzer for each line."""
+        lines, func_hits, _ = self.get_function_coverage(funcname)
+        return lines, func_hits.max(axis=1, initial=0)
+
+    def _resolve_funcname(self, funcname: str) -> Optional[str]:
+        if self._funcname_resolver is None:
+            self._funcname_resolver = FunctionNameResolver(self.function_fuzzers)
+        return self._funcname_resolver.resolve(funcname)
+
+    def get_merged_coverage_profile(self) -> CoverageProfile:
+        """Returns a CoverageProfile with the highest hitcount of any fuzzer
+        for each line and branch. The profile reads the coverage from the
+        matrix when it is accessed rather than holding a merged copy.
+        """
+        cp = CoverageProfile()
+        cp.covmap = CoverageMatrixMap(self)
+        cp.branch_cov_map = CoverageMatrixBranchMap(self)
+        return cp
+
+    def get_fuzzers_covering_line(self, funcname: str, lineno: int) -> List[str]:
+        """Returns the name of the fuzzers that hit line `lineno` of a function"""
+        fuzz_key = self._resolve_funcname(funcname)
+        if fuzz_key is None:
+            return []
+        lines, func_hits, cols = self.get_function_coverage(fuzz_key)
+        row = numpy.searchsorted(lines, lineno)
+        if row >= len(lines) or lines[row] != lineno:
+            return []
+        covering = numpy.flatnonzero(func_hits[row])
+        return [self.fuzzer_names[cols[idx]] for idx in covering.tolist()]
+
+    def get_fuzzers_covering_function(self, funcname: str) -> List[str]:
+        """Returns the name of the fuzzers that hit any line of a function"""
+        fuzz_key = self._resolve_funcname(funcname)
+        if fuzz_key is None:
+            return []
+        _, func_hits, cols = self.get_function_coverage(fuzz_key)
+        covering = numpy.flatnonzero(func_hits.any(axis=0))
+        return [self.fuzzer_names[cols[idx]] for idx in covering.tolist()]
+
+
+def _get_covmap_arrays(
+    covmap: MutableMapping[str, List[Tuple[int, int]]],
+    funcname: str
+) -> Tuple[Any, Any]:
+    """Returns line numbers and hitcounts of a covmap entry as arrays, reading
+    straight from the coverage store when the covmap is backed by one.
+    """
+    if isinstance(covmap, LazyCovmap):
+        return covmap.get_arrays(funcname)
+    return _line_hits_to_arrays(covmap[funcname])
+
+
+def _line_hits_to_arrays(line_hits: List[Tuple[int, int]]) -> Tuple[Any, Any]:
+    if len(line_hits) == 0:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+    lines, hits = zip(*line_hits)
+    return numpy.array(lines, dtype=numpy.int64), numpy.array(hits, dtype=numpy.int64)
+
+
+def get_coverage_files(target_dir: str, language: str) -> List[str]:
+    """Returns the coverage files in `target_dir` the coverage of fuzzers
+    written in `language` may be loaded from, see `load_llvm_coverage` and
+    `load_python_coverage`."""
+    if language == "python":
+        coverage_files = utils.get_all_files_in_tree_with_regex(target_dir, "^\\.coverage$")
+        coverage_files.extend(
+            utils.get_all_files_in_tree_with_regex(target_dir, ".*all_cov.json$")
+        )
+        coverage_files.extend(
+            utils.get_all_files_in_tree_with_regex(target_dir, ".*html_status.json$")
+        )
+        return coverage_files
+    return utils.get_all_files_in_tree_with_regex(target_dir, ".*\\.covreport$")
+
+
 def load_llvm_coverage(
     target_dir: str,
-    target_name: Optional[str] = None
+    target_name: Optional[str] = None,
+    cache_dir: Optional[str] = None
 ) -> CoverageProfile:
     """
     Scans a directory to read one or more coverage reports, and returns a CoverageProfile
@@ -235,6 +473,11 @@ def load_llvm_coverage(
     target specific coverage profiles. However, if no coverage profile matches
     that given name then the function will find *all* coverage reports it can and
     use all of them.
+
+    If `cache_dir` is set then the parsed coverage is persisted in a coverage
+    store in that directory and the returned profile is backed by a memory
+    mapping of the store. The store is reused as long as the coverage reports
+    are unchanged, in which case no parsing is done.
     """
 
     if target_name is not None:
@@ -259,101 +502,809 @@ def load_llvm_coverage(
         coverage_reports = all_coverage_reports
 
     logger.info(f"Using the following coverages {coverage_reports}")
+    if cache_dir is not None:
+        store_name = "all-coverage" if target_name is None else target_name
+        store_path = os.path.join(
+            cache_dir,
+            store_name.replace("/", "_") + COVERAGE_STORE_SUFFIX
+        )
+        return load_llvm_coverage_store(store_path, coverage_reports)
+
     cp = CoverageProfile()
     cp.set_type("function")
     for profile_file in coverage_reports:
         cp.coverage_files.append(profile_file)
         logger.info(f"Reading coverage report: {profile_file}")
-        with open(profile_file, 'rb') as pf:
-            curr_func = None
-            for raw_line in pf:
-                line = utils.safe_decode(raw_line)
-                if line is None:
+        for record in _iter_llvm_coverage_records(profile_file):
+            if record[0] == "function":
+                curr_func = record[1]
+                cp.covmap[curr_func] = list()
+            elif record[0] == "branch":
+                _, curr_func, line_number, column_number, true_hit, false_hit = record
+                cp.branch_cov_map[(curr_func, line_number, column_number)] = (
+                    true_hit,
+                    false_hit
+                )
+            else:
+                _, curr_func, line_number, hit_times = record
+                cp.covmap[curr_func].append((line_number, hit_times))
+    return cp
+
+
+def _parse_llvm_cov_count(count_str: str) -> int:
+    """Converts counts like 1.2k into 1200 and 5.99M into 5990000"""
+    return int(count_str.replace("k", "00").replace("M", "0000").replace(".", ""))
+
+
+def _iter_llvm_coverage_records(profile_file: str) -> Iterator[Tuple[Any, ...]]:
+    """Parses a single .covreport file and yields the records found in it.
+
+    The records are tuples where the first element is the record type:
+    - ("function", function_name)
+    - ("line", function_name, line_number, hitcount)
+    - ("branch", function_name, line_number, column_number, true_hit, false_hit)
+    """
+    with open(profile_file, 'rb') as pf:
+        curr_func = None
+        for raw_line in pf:
+            line = utils.safe_decode(raw_line)
+            if line is None:
+                continue
+
+            line = line.replace("\n", "")
+            logger.debug(f"cov-readline: { line }")
+
+            # Parse lines that signal function names. These linse indicate that the
+            # lines following this line will be the specific source code lines of
+            # the given function.
+            # Example line:
+            #  "LLVMFuzzerTestOneInput:\n"
+            if len(line) > 0 and line[-1] == ":" and "|" not in line:
+                if len(line.split(":")) == 3:
+                    curr_func = line.split(":")[1].replace(" ", "").replace(":", "")
+                else:
+                    curr_func = line.replace(" ", "").replace(":", "")
+                curr_func = sys.intern(utils.demangle_cpp_func(curr_func))
+                yield ("function", curr_func)
+            # This parses Branch cov info in the form of:
+            #  |  Branch (81:7): [True: 1.2k, False: 0]
+            if curr_func and "Branch (" in line:
+                try:
+                    line_number = int(line.split('(')[1].split(':')[0])
+                except Exception:
+                    continue
+                try:
+                    column_number = int(line.split(':')[1].split(')')[0])
+                except Exception:
+                    continue
+
+                try:
+                    true_hit = _parse_llvm_cov_count(line.split('True:')[1].split(',')[0])
+                except Exception:
+                    continue
+                try:
+                    false_hit = _parse_llvm_cov_count(
+                        line.split('False:')[1].replace("]", "")
+                    )
+                except Exception:
+                    continue
+                yield ("branch", curr_func, line_number, column_number, true_hit, false_hit)
+            # Parse lines that signal specific line of code. These lines only
+            # offer after the function names parsed above.
+            # Example line:
+            #  "   83|  5.99M|    char *kldfj = (char*)malloc(123);\n"
+            elif curr_func is not None and "|" in line:
+                # Extract source code line number
+                try:
+                    line_number = int(line.split("|")[0])
+                except Exception:
+                    continue
+
+                # Extract hit count
+                try:
+                    hit_times = _parse_llvm_cov_count(line.split("|")[1])
+                except Exception:
+                    hit_times = 0
+                # Add source code line and hitcount to coverage map of current function
+                logger.debug(f"reading coverage: {curr_func} "
+                             f"-- {line_number} -- {hit_times}")
+                yield ("line", curr_func, line_number, hit_times)
+
+
+def _get_coverage_files_fingerprint(coverage_files: List[str]) -> str:
+    """Fingerprints a set of coverage files based on their path, size and
+    modification time. Used to decide whether a coverage store is stale."""
+    fingerprint = hashlib.sha256()
+    fingerprint.update(COVERAGE_STORE_MAGIC)
+    for cov_file in sorted(coverage_files):
+        stat = os.stat(cov_file)
+        fingerprint.update(
+            f"{os.path.abspath(cov_file)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode()
+        )
+    return fingerprint.hexdigest()
+
+
+def write_llvm_coverage_store(
+    store_path: str,
+    coverage_files: List[str],
+    fingerprint: str
+) -> None:
+    """Parses LLVM coverage reports and writes them to a columnar coverage
+    store file, which can later be memory-mapped with :py:class:`CoverageStore`.
+
+    The parsed data is accumulated in compact arrays rather than Python lists
+    of tuples, and the file is written atomically.
+    """
+    func_names: List[str] = []
+    func_index: Dict[str, int] = dict()
+    func_starts = array.array('q')
+    func_ends = array.array('q')
+    lines = array.array('i')
+    hits = array.array('q')
+    branch_funcs = array.array('i')
+    branch_lines = array.array('i')
+    branch_columns = array.array('i')
+    branch_true = array.array('q')
+    branch_false = array.array('q')
+
+    branch_index: Dict[Tuple[int, int, int], int] = dict()
+
+    curr_idx = -1
+    for profile_file in coverage_files:
+        logger.info(f"Reading coverage report: {profile_file}")
+        for record in _iter_llvm_coverage_records(profile_file):
+            if record[0] == "line":
+                lines.append(record[2])
+                hits.append(record[3])
+                func_ends[curr_idx] = len(lines)
+            elif record[0] == "function":
+                # A function seen again replaces the earlier lines, which is
+                # consistent with how the in-memory loader behaves.
+                if record[1] not in func_index:
+                    func_index[record[1]] = len(func_names)
+                    func_names.append(record[1])
+                    func_starts.append(len(lines))
+                    func_ends.append(len(lines))
+                curr_idx = func_index[record[1]]
+                func_starts[curr_idx] = len(lines)
+                func_ends[curr_idx] = len(lines)
+            else:
+                # Like in the in-memory branch map, the last record of a
+                # branch wins, so the store holds each branch only once.
+                branch_key = (func_index[record[1]], record[2], record[3])
+                if branch_key in branch_index:
+                    row = branch_index[branch_key]
+                    branch_true[row] = record[4]
+                    branch_false[row] = record[5]
                     continue
+                branch_index[branch_key] = len(branch_funcs)
+                branch_funcs.append(branch_key[0])
+                branch_lines.append(branch_key[1])
+                branch_columns.append(branch_key[2])
+                branch_true.append(record[4])
+                branch_false.append(record[5])
+
+    columns = [
+        ("func_starts", func_starts),
+        ("func_ends", func_ends),
+        ("lines", lines),
+        ("hits", hits),
+        ("branch_funcs", branch_funcs),
+        ("branch_lines", branch_lines),
+        ("branch_columns", branch_columns),
+        ("branch_true", branch_true),
+        ("branch_false", branch_false),
+    ]
+    metadata: Dict[str, Any] = {
+        "fingerprint": fingerprint,
+        "coverage_files": coverage_files,
+        "functions": func_names,
+        "columns": dict(),
+    }
+    offset = 0
+    for column_name, column in columns:
+        metadata["columns"][column_name] = {
+            "dtype": numpy.dtype(column.typecode).str,
+            "offset": offset,
+            "length": len(column),
+        }
+        offset += _align(len(column) * column.itemsize)
+    metadata_bytes = json.dumps(metadata).encode()
+
+    tmp_path = store_path + ".tmp"
+    with open(tmp_path, "wb") as store_fd:
+        store_fd.write(COVERAGE_STORE_MAGIC)
+        store_fd.write(struct.pack("<Q", len(metadata_bytes)))
+        store_fd.write(metadata_bytes)
+        store_fd.write(b"\0" * (_align(store_fd.tell()) - store_fd.tell()))
+        for column_name, column in columns:
+            data = column.tobytes()
+            store_fd.write(data)
+            store_fd.write(b"\0" * (_align(len(data)) - len(data)))
+    os.replace(tmp_path, store_path)
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class CoverageStore:
+    """Memory-mapped view of a coverage store file written by
+    :py:func:`write_llvm_coverage_store`.
+
+    The file starts with a magic marker and a json header holding the
+    function table, followed by 8-byte aligned columns. Function ``i`` covers
+    the slice ``func_starts[i]:func_ends[i]`` of the ``lines`` and ``hits``
+    columns, so coverage of a function is only paged in when it is read.
+    """
+    def __init__(self, store_path: str) -> None:
+        self.store_path = store_path
+        with open(store_path, "rb") as store_fd:
+            if store_fd.read(len(COVERAGE_STORE_MAGIC)) != COVERAGE_STORE_MAGIC:
+                raise DataLoaderError(f"Not a coverage store: {store_path}")
+            metadata_len = struct.unpack("<Q", store_fd.read(8))[0]
+            metadata = json.loads(store_fd.read(metadata_len))
+            data_start = _align(store_fd.tell())
+
+        self.fingerprint: str = metadata["fingerprint"]
+        self.coverage_files: List[str] = metadata["coverage_files"]
+        self.functions: List[str] = [sys.intern(name) for name in metadata["functions"]]
+        self.function_index = {name: idx for idx, name in enumerate(self.functions)}
+
+        buf = numpy.memmap(store_path, dtype=numpy.uint8, mode="r")
+        self._columns: Dict[str, Any] = dict()
+        for column_name, column in metadata["columns"].items():
+            dtype = numpy.dtype(column["dtype"])
+            start = data_start + column["offset"]
+            end = start + column["length"] * dtype.itemsize
+            self._columns[column_name] = buf[start:end].view(dtype)
+        self._branch_index: Optional[Tuple[Any, Any, Any, Any]] = None
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'CoverageStore':
+        # The store is read-only, so copies of profiles can share it.
+        return self
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"store_path": self.store_path}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["store_path"])  # type: ignore
+
+    def get_function_lines(self, func_idx: int) -> Tuple[Any, Any]:
+        """Returns the line numbers and hitcounts of a function as arrays"""
+        start = self._columns["func_starts"][func_idx]
+        end = self._columns["func_ends"][func_idx]
+        return self._columns["lines"][start:end], self._columns["hits"][start:end]
+
+    @property
+    def branch_count(self) -> int:
+        return len(self._columns["branch_funcs"])
+
+    def get_branches(
+        self,
+        start: int,
+        end: int
+    ) -> Iterator[Tuple[Tuple[str, int, int], Tuple[int, int]]]:
+        """Yields the key and hitcounts of the branches in rows `start:end`"""
+        for func_idx, line_number, column_number, true_hit, false_hit in zip(
+            self._columns["branch_funcs"][start:end].tolist(),
+            self._columns["branch_lines"][start:end].tolist(),
+            self._columns["branch_columns"][start:end].tolist(),
+            self._columns["branch_true"][start:end].tolist(),
+            self._columns["branch_false"][start:end].tolist()
+        ):
+            yield (self.functions[func_idx], line_number, column_number), (true_hit, false_hit)
+
+    def _get_branch_index(self) -> Tuple[Any, Any, Any, Any]:
+        """Returns the branch rows ordered by (function, line, column) along
+        with the sorted key columns. The index is built on first use."""
+        if self._branch_index is None:
+            funcs = self._columns["branch_funcs"]
+            lines = self._columns["branch_lines"]
+            columns = self._columns["branch_columns"]
+            order = numpy.lexsort((columns, lines, funcs))
+            self._branch_index = (order, funcs[order], lines[order], columns[order])
+        return self._branch_index
+
+    def find_branch(self, branch_key: Tuple[str, int, int]) -> Optional[Tuple[int, int]]:
+        """Returns the hitcounts of a branch, or None if it is not stored"""
+        funcname, line_number, column_number = branch_key
+        if funcname not in self.function_index:
+            return None
+        order, funcs, lines, columns = self._get_branch_index()
+        start = 0
+        end = len(order)
+        for sorted_column, value in [
+            (funcs, self.function_index[funcname]),
+            (lines, line_number),
+            (columns, column_number)
+        ]:
+            window = sorted_column[start:end]
+            start, end = (
+                start + int(numpy.searchsorted(window, value, side="left")),
+                start + int(numpy.searchsorted(window, value, side="right"))
+            )
+            if start == end:
+                return None
+        row = order[start]
+        return int(self._columns["branch_true"][row]), int(self._columns["branch_false"][row])
+
+
+class _CoverageOverlayMap(MutableMapping):
+    """Mapping that reads its entries from a backing source when they are
+    accessed. Entries written to the map are kept in memory and shadow the
+    source, entries deleted from the map are hidden.
+
+    Subclasses implement `_read`, `_has_source_key`, `_iter_source_keys` and
+    `_count_source_keys` on top of the backing source.
+    """
+    def __init__(self) -> None:
+        self._written: Dict[Any, Any] = dict()
+        self._deleted: Set[Any] = set()
+
+    def _read(self, key: Any) -> Any:
+        raise NotImplementedError
+
+    def _has_source_key(self, key: Any) -> bool:
+        raise NotImplementedError
+
+    def _iter_source_keys(self) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def _count_source_keys(self) -> int:
+        raise NotImplementedError
+
+    def __getitem__(self, key: Any) -> Any:
+        if key in self._written:
+            return self._written[key]
+        if key in self._deleted or not self._has_source_key(key):
+            raise KeyError(key)
+        return self._read(key)
 
-                line = line.replace("\n", "")
-                logger.debug(f"cov-readline: { line }")
-
-                # Parse lines that signal function names. These linse indicate that the
-                # lines following this line will be the specific source code lines of
-                # the given function.
-                # Example line:
-                #  "LLVMFuzzerTestOneInput:\n"
-                if len(line) > 0 and line[-1] == ":" and "|" not in line:
-                    if len(line.split(":")) == 3:
-                        curr_func = line.split(":")[1].replace(" ", "").replace(":", "")
-                    else:
-                        curr_func = line.replace(" ", "").replace(":", "")
-                    curr_func = utils.demangle_cpp_func(curr_func)
-                    cp.covmap[curr_func] = list()
-                # This parses Branch cov info in the form of:
-                #  |  Branch (81:7): [True: 1.2k, False: 0]
-                if curr_func and "Branch (" in line:
-                    try:
-                        line_number = int(line.split('(')[1].split(':')[0])
-                    except Exception:
-                        continue
-                    try:
-                        column_number = int(line.split(':')[1].split(')')[0])
-                    except Exception:
-                        continue
-
-                    try:
-                        true_hit = int(line.split('True:')[1].split(',')[0].replace(
-                            "k", "00").replace(
-                                "M", "0000").replace(
-                                    ".", ""))
-                    except Exception:
-                        continue
-                    try:
-                        false_hit = int(line.split('False:')[1].replace("]", "").replace(
-                            "k", "00").replace(
-                                "M", "0000").replace(
-                                    ".", ""))
-                    except Exception:
-                        continue
-                    branch_string = f'{curr_func}:{line_number},{column_number}'
-                    cp.branch_cov_map[branch_string] = (true_hit, false_hit)
-                # Parse lines that signal specific line of code. These lines only
-                # offer after the function names parsed above.
-                # Example line:
-                #  "   83|  5.99M|    char *kldfj = (char*)malloc(123);\n"
-                elif curr_func is not None and "|" in line:
-                    # Extract source code line number
-                    try:
-                        line_number = int(line.split("|")[0])
-                    except Exception:
-                        continue
-
-                    # Extract hit count
-                    # Write out numbers e.g. 1.2k into 1200 and 5.99M to 5990000
-                    try:
-                        hit_times = int(
-                            line.split("|")[1].replace(
-                                "k", "00").replace(
-                                    "M", "0000").replace(
-                                        ".", ""))
-                    except Exception:
-                        hit_times = 0
-                    # Add source code line and hitcount to coverage map of current function
-                    logger.debug(f"reading coverage: {curr_func} "
-                                 f"-- {line_number} -- {hit_times}")
-                    cp.covmap[curr_func].append((line_number, hit_times))
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._deleted.discard(key)
+        self._written[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._written.pop(key, None)
+        if self._has_source_key(key):
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._written:
+            return True
+        return key not in self._deleted and self._has_source_key(key)
+
+    def __iter__(self) -> Iterator[Any]:
+        for key in self._iter_source_keys():
+            if key not in self._deleted:
+                yield key
+        for key in self._written:
+            if not self._has_source_key(key):
+                yield key
+
+    def __len__(self) -> int:
+        return (
+            self._count_source_keys()
+            - len(self._deleted)
+            + len([k for k in self._written if not self._has_source_key(k)])
+        )
+
+
+class LazyCovmap(_CoverageOverlayMap):
+    """Covmap that behaves like the dictionary used by in-memory coverage
+    profiles, but reads the coverage of a function from its source each time
+    it is accessed, so the covmap is never held in memory as a whole. Lists
+    read from the map are copies; changes have to be written back to the map.
+    """
+    def _read_arrays(self, funcname: str) -> Tuple[Any, Any]:
+        raise NotImplementedError
+
+    def get_arrays(self, funcname: str) -> Tuple[Any, Any]:
+        """Returns the line numbers and hitcounts of a function as arrays"""
+        if funcname in self._written:
+            return _line_hits_to_arrays(self._written[funcname])
+        if funcname in self._deleted or not self._has_source_key(funcname):
+            raise KeyError(funcname)
+        return self._read_arrays(funcname)
+
+    def _read(self, funcname: str) -> List[Tuple[int, int]]:
+        lines, hits = self._read_arrays(funcname)
+        return list(zip(lines.tolist(), hits.tolist()))
+
+
+class CoverageStoreMap(LazyCovmap):
+    """Covmap backed by a :py:class:`CoverageStore`. The arrays of a
+    function are views of the memory-mapped store."""
+    def __init__(self, store: CoverageStore) -> None:
+        super().__init__()
+        self.store = store
+
+    def _read_arrays(self, funcname: str) -> Tuple[Any, Any]:
+        return self.store.get_function_lines(self.store.function_index[funcname])
+
+    def _has_source_key(self, funcname: object) -> bool:
+        return funcname in self.store.function_index
+
+    def _iter_source_keys(self) -> Iterator[str]:
+        return iter(self.store.functions)
+
+    def _count_source_keys(self) -> int:
+        return len(self.store.functions)
+
+
+class CoverageStoreBranchMap(_CoverageOverlayMap):
+    """Branch coverage map backed by a :py:class:`CoverageStore`.
+
+    Behaves like the ``branch_cov_map`` dictionary of in-memory coverage
+    profiles. Iterating the map streams the branches from the store in
+    chunks, so the branch coverage is never loaded into memory as a whole.
+    """
+    CHUNK_SIZE = 4096
+
+    def __init__(self, store: CoverageStore) -> None:
+        super().__init__()
+        self.store = store
+
+    def _read(self, branch_key: Tuple[str, int, int]) -> Tuple[int, int]:
+        hitcounts = self.store.find_branch(branch_key)
+        if hitcounts is None:
+            raise KeyError(branch_key)
+        return hitcounts
+
+    def _has_source_key(self, branch_key: object) -> bool:
+        if not isinstance(branch_key, tuple):
+            return False
+        return self.store.find_branch(branch_key) is not None  # type: ignore
+
+    def _iter_source_items(self) -> Iterator[Tuple[Tuple[str, int, int], Tuple[int, int]]]:
+        for start in range(0, self.store.branch_count, self.CHUNK_SIZE):
+            yield from self.store.get_branches(start, start + self.CHUNK_SIZE)
+
+    def _iter_source_keys(self) -> Iterator[Tuple[str, int, int]]:
+        for branch_key, _ in self._iter_source_items():
+            yield branch_key
+
+    def _count_source_keys(self) -> int:
+        return self.store.branch_count
+
+    def items(self) -> '_CoverageStoreBranchItems':  # type: ignore[override]
+        return _CoverageStoreBranchItems(self)
+
+    def _iter_items(self) -> Iterator[Tuple[Tuple[str, int, int], Tuple[int, int]]]:
+        for branch_key, hitcounts in self._iter_source_items():
+            if branch_key in self._deleted:
+                continue
+            yield branch_key, self._written.get(branch_key, hitcounts)
+        for branch_key, hitcounts in self._written.items():
+            if not self._has_source_key(branch_key):
+                yield branch_key, hitcounts
+
+
+class _CoverageStoreBranchItems(ItemsView):
+    """Items view that reads the branches of the store in a single pass,
+    rather than looking up every key."""
+    def __iter__(self) -> Iterator[Tuple[Tuple[str, int, int], Tuple[int, int]]]:
+        yield from self._mapping._iter_items()  # type: ignore
+
+
+class CoverageMatrixMap(LazyCovmap):
+    """Covmap holding the highest hitcount of any fuzzer of a
+    :py:class:`CoverageMatrix` for each line. A function is merged from the
+    fuzzers' coverage each time it is accessed."""
+    def __init__(self, matrix: CoverageMatrix) -> None:
+        super().__init__()
+        self.matrix = matrix
+
+    def _read_arrays(self, funcname: str) -> Tuple[Any, Any]:
+        return self.matrix.get_merged_function_lines(funcname)
+
+    def _has_source_key(self, funcname: object) -> bool:
+        return funcname in self.matrix.function_fuzzers
+
+    def _iter_source_keys(self) -> Iterator[str]:
+        return iter(self.matrix.function_fuzzers)
+
+    def _count_source_keys(self) -> int:
+        return len(self.matrix.function_fuzzers)
+
+
+class CoverageMatrixBranchMap(_CoverageOverlayMap):
+    """Branch coverage map holding the highest true and false hitcounts of
+    any fuzzer of a :py:class:`CoverageMatrix` for each branch. Branches are
+    looked up in the fuzzers' branch maps when they are accessed."""
+    def __init__(self, matrix: CoverageMatrix) -> None:
+        super().__init__()
+        self.matrix = matrix
+
+    def _branch_maps(self) -> List[MutableMapping[Tuple[str, int, int], Tuple[int, int]]]:
+        return [cp.branch_cov_map for cp in self.matrix.coverage_profiles if cp is not None]
+
+    def _read(self, branch_key: Tuple[str, int, int]) -> Tuple[int, int]:
+        true_hit = 0
+        false_hit = 0
+        for branch_map in self._branch_maps():
+            if branch_key in branch_map:
+                fuzzer_true_hit, fuzzer_false_hit = branch_map[branch_key]
+                true_hit = max(true_hit, fuzzer_true_hit)
+                false_hit = max(false_hit, fuzzer_false_hit)
+        return true_hit, false_hit
+
+    def _has_source_key(self, branch_key: object) -> bool:
+        return any(branch_key in branch_map for branch_map in self._branch_maps())
+
+    def _iter_source_keys(self) -> Iterator[Tuple[str, int, int]]:
+        branch_maps = self._branch_maps()
+        for idx, branch_map in enumerate(branch_maps):
+            for branch_key in branch_map:
+                # Branches of several fuzzers are reported by the first one
+                if not any(branch_key in earlier for earlier in branch_maps[:idx]):
+                    yield branch_key
+
+    def _count_source_keys(self) -> int:
+        return sum(1 for _ in self._iter_source_keys())
+
+
+def load_llvm_coverage_store(
+    store_path: str,
+    coverage_files: List[str]
+) -> CoverageProfile:
+    """Returns a CoverageProfile backed by the coverage store at `store_path`.
+
+    The store acts as a cache: it is only (re)written if it does not exist or
+    if it was created from coverage files different from `coverage_files`.
+    """
+    fingerprint = _get_coverage_files_fingerprint(coverage_files)
+    store = None
+    if os.path.isfile(store_path):
+        try:
+            store = CoverageStore(store_path)
+        except (DataLoaderError, ValueError, KeyError, struct.error):
+            logger.info(f"Ignoring unreadable coverage store {store_path}")
+        if store is not None and store.fingerprint != fingerprint:
+            logger.info(f"Coverage store {store_path} is stale")
+            store = None
+
+    if store is None:
+        logger.info(f"Writing coverage store {store_path}")
+        os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+        write_llvm_coverage_store(store_path, coverage_files, fingerprint)
+        store = CoverageStore(store_path)
+    else:
+        logger.info(f"Using cached coverage store {store_path}")
+
+    cp = CoverageProfile()
+    cp.set_type("function")
+    cp.coverage_files = list(coverage_files)
+    cp.covmap = CoverageStoreMap(store)
+    cp.branch_cov_map = CoverageStoreBranchMap(store)
     return cp
 
 
+def get_python_coverage_paths_of_interest(names: Iterable[str]) -> Set[str]:
+    """Returns the source paths that python names, e.g. function names of a
+    fuzzer profile, may be resolved to. See
+    :py:func:`utils.get_python_module_file_candidates`.
+    """
+    paths_of_interest: Set[str] = set()
+    for name in names:
+        paths_of_interest.update(
+            utils.get_python_module_file_candidates(name.lstrip("."))
+        )
+    return paths_of_interest
+
+
+def _is_python_file_of_interest(
+    filename: str,
+    paths_of_interest: Optional[Tuple[str, ...]]
+) -> bool:
+    """Returns whether `filename` ends with any of `paths_of_interest`. This
+    is the rule by which `CoverageProfile.is_file_lineno_hit` resolves python
+    names to files, so no file a name may resolve to is left out. None means
+    all files are of interest.
+    """
+    return paths_of_interest is None or filename.endswith(paths_of_interest)
+
+
+def _strip_pyinstaller_prefix(filename: str) -> str:
+    """Strip any directories added by pyinstaller or oss-fuzz coverage handling"""
+    return filename.replace("/pythoncovmergedfiles", "").replace("/medio", "")
+
+
+def load_python_coverage(
+    target_dir: str,
+    names_of_interest: Optional[Iterable[str]] = None
+) -> CoverageProfile:
+    """Loads python coverage found in `target_dir`.
+
+    The ``.coverage`` database of coverage.py is used if there is one,
+    otherwise the json report is read. If `names_of_interest` is given, only
+    coverage of files these python names may resolve to is loaded.
+    """
+    paths_of_interest = None
+    if names_of_interest is not None:
+        paths_of_interest = tuple(get_python_coverage_paths_of_interest(names_of_interest))
+
+    coverage_dbs = utils.get_all_files_in_tree_with_regex(target_dir, "^\\.coverage$")
+    if len(coverage_dbs) > 0:
+        return load_python_sqlite_coverage(
+            coverage_dbs[0],
+            paths_of_interest=paths_of_interest
+        )
+    return load_python_json_coverage(target_dir, paths_of_interest=paths_of_interest)
+
+
+def _numbits_to_lines(numbits: bytes) -> List[int]:
+    """Decodes the numbits format coverage.py uses to store sets of lines"""
+    lines = []
+    for byte_idx, byte in enumerate(numbits):
+        bit_idx = 0
+        while byte:
+            if byte & 1:
+                lines.append(byte_idx * 8 + bit_idx)
+            byte >>= 1
+            bit_idx += 1
+    return lines
+
+
+def load_python_sqlite_coverage(
+    db_file: str,
+    strip_pyinstaller_prefix: bool = True,
+    paths_of_interest: Optional[Tuple[str, ...]] = None
+) -> CoverageProfile:
+    """Loads coverage from the ``.coverage`` sqlite database of coverage.py.
+
+    Only the lines of files in `paths_of_interest` are read from the
+    database. Both line and arc (branch) measurements are supported.
+
+    Return a CoverageProfile
+    """
+    cp = CoverageProfile()
+    cp.set_type("file")
+    cp.coverage_files.append(db_file)
+
+    logger.info(f"Loading python coverage database {db_file}")
+    try:
+        db = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        raise DataLoaderError(f"Could not open coverage database {db_file}: {e}")
+    try:
+        file_ids: Dict[int, str] = dict()
+        for file_id, filename in db.execute("SELECT id, path FROM file"):
+            if strip_pyinstaller_prefix:
+                filename = _strip_pyinstaller_prefix(filename)
+            if _is_python_file_of_interest(filename, paths_of_interest):
+                file_ids[file_id] = filename
+
+        file_lines: Dict[int, Set[int]] = dict()
+        all_ids = list(file_ids)
+        # Keep below the default limit of variables in a sqlite statement
+        for idx in range(0, len(all_ids), 500):
+            id_chunk = all_ids[idx:idx + 500]
+            placeholders = ",".join("?" * len(id_chunk))
+            # Line measurements are stored as numbits and branch measurements
+            # as arcs, where negative line numbers denote entries and exits.
+            query = db.execute(
+                f"SELECT file_id, numbits FROM line_bits WHERE file_id IN ({placeholders})",
+                id_chunk
+            )
+            for file_id, numbits in query:
+                file_lines.setdefault(file_id, set()).update(_numbits_to_lines(numbits))
+            query = db.execute(
+                f"SELECT file_id, fromno, tono FROM arc WHERE file_id IN ({placeholders})",
+                id_chunk
+            )
+            for file_id, fromno, tono in query:
+                lines = file_lines.setdefault(file_id, set())
+                if fromno > 0:
+                    lines.add(fromno)
+                if tono > 0:
+                    lines.add(tono)
+    except sqlite3.Error as e:
+        raise DataLoaderError(f"Could not read coverage database {db_file}: {e}")
+    finally:
+        db.close()
+
+    for file_id, filename in file_ids.items():
+        cp.file_map[filename] = sorted(file_lines.get(file_id, set()))
+    return cp
+
+
+class _JsonObjectStream:
+    """Incremental reader of json objects in a file.
+
+    Keys of an object are read one at a time with `iter_object_keys`, and the
+    value following a key is then either read with `decode_value` or, if it
+    is an object itself, iterated with `iter_object_keys`. This makes it
+    possible to walk large json documents while only holding a single value
+    in memory.
+    """
+    def __init__(self, json_fd: Any, chunk_size: int = 1 << 16) -> None:
+        self._fd = json_fd
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _read_more(self, read_size: Optional[int] = None) -> bool:
+        if self._eof:
+            return False
+        chunk = self._fd.read(read_size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._read_more():
+                return self._buf[self._pos:self._pos + 1]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise DataLoaderError(f"Malformed json, expected '{char}'")
+        self._pos += 1
+
+    def decode_value(self) -> Any:
+        self._peek()
+        # Decoding restarts at the start of the value whenever it is
+        # incomplete, so the read size doubles each time to decode a value
+        # in time linear in its size.
+        read_size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._read_more(read_size):
+                    raise DataLoaderError("Malformed json value")
+                read_size *= 2
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buf) and self._read_more(read_size):
+                read_size *= 2
+                continue
+            self._pos = end
+            return value
+
+    def iter_object_keys(self) -> Iterator[str]:
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            self._expect(":")
+            yield key
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise DataLoaderError("Malformed json object")
+
+
 def load_python_json_coverage(
     json_file: str,
-    strip_pyinstaller_prefix: bool = True
+    strip_pyinstaller_prefix: bool = True,
+    paths_of_interest: Optional[Tuple[str, ...]] = None
 ):
     """Loads a python json coverage file.
 
     The specific json file that is handled by the coverage output from:
     - https://coverage.readthedocs.io/en/latest/cmd.html#json-reporting-coverage-json
 
+    The file is streamed one source file entry at a time, and only entries
+    for files in `paths_of_interest` are kept.
+
     Return a CoverageProfile
     """
-    import json
     cp = CoverageProfile()
     cp.set_type("file")
 
@@ -362,21 +1313,82 @@ def load_python_json_coverage(
 
     if len(coverage_reports) > 0:
         json_file = coverage_reports[0]
+    cp.coverage_files.append(json_file)
 
     with open(json_file, "r") as f:
-        data = json.load(f)
+        json_stream = _JsonObjectStream(f)
+        for key in json_stream.iter_object_keys():
+            if key != "files":
+                json_stream.decode_value()
+                continue
+            for entry in json_stream.iter_object_keys():
+                file_cov = json_stream.decode_value()
+                cov_entry = entry
+                if strip_pyinstaller_prefix:
+                    cov_entry = _strip_pyinstaller_prefix(entry)
+                if not _is_python_file_of_interest(cov_entry, paths_of_interest):
+                    continue
+                cp.file_map[cov_entry] = file_cov['executed_lines']
+
+    return cp
 
-    for entry in data['files']:
-        cov_entry = entry
 
-        # Strip any directories added by pyinstaller or oss-fuzz coverage handling
-        if strip_pyinstaller_prefix:
-            prefixed_entry = entry.replace("/pythoncovmergedfiles", "")
-            prefixed_entry = prefixed_entry.replace("/medio", "")
-            cov_entry = prefixed_entry
-        cp.file_map[cov_entry] = data['files'][entry]['executed_lines']
+class PythonCoverageHtmlIndex:
+    """Lookup from python names to the html files of a coverage.py html
+    report, based on the report's ``html_status.json``.
 
-    return cp
+    Relative filenames of the report are indexed by path suffix, and the
+    html file resolved for each name is memoized.
+    """
+    def __init__(self, html_status: Dict[str, Any]) -> None:
+        self._html_files: List[Tuple[str, str]] = []
+        self._suffix_positions: Dict[str, int] = dict()
+        for html_file, file_status in html_status.get('files', {}).items():
+            relative_filename = file_status['index']['relative_filename']
+            position = len(self._html_files)
+            self._html_files.append((html_file, relative_filename))
+            # Keep the first file for a given suffix
+            self._suffix_positions.setdefault(relative_filename, position)
+            idx = relative_filename.find("/")
+            while idx != -1:
+                self._suffix_positions.setdefault(relative_filename[idx + 1:], position)
+                idx = relative_filename.find("/", idx + 1)
+        self._resolved: Dict[str, Optional[str]] = dict()
+
+    def get_html_file(self, name: str) -> Optional[str]:
+        """Returns the html file of the source file that the python name
+        `name` resolves to, or None if there is no such file.
+        """
+        if name not in self._resolved:
+            self._resolved[name] = self._resolve(name)
+        return self._resolved[name]
+
+    def _resolve(self, name: str) -> Optional[str]:
+        candidates = utils.get_python_module_file_candidates(name.lstrip("."))
+        positions = [
+            self._suffix_positions[c] for c in candidates if c in self._suffix_positions
+        ]
+        if len(positions) > 0:
+            return self._html_files[min(positions)][0]
+
+        # Fall back to matching suffixes that do not start at a path separator
+        for html_file, relative_filename in self._html_files:
+            if utils.approximate_python_coverage_files(name, relative_filename):
+                return html_file
+        return None
+
+
+def load_python_coverage_html_index(basedir: str) -> Optional[PythonCoverageHtmlIndex]:
+    """Returns the index of the ``html_status.json`` file found in `basedir`,
+    or None if there is no ``html_status.json`` file.
+    """
+    html_summaries = utils.get_all_files_in_tree_with_regex(basedir, ".*html_status.json$")
+    logger.info(str(html_summaries))
+    if len(html_summaries) == 0:
+        logger.info("Could not find any html_status.json file")
+        return None
+    with open(html_summaries[0], "r") as jf:
+        return PythonCoverageHtmlIndex(json.load(jf))
 
 
 if __name__ == "__main__":
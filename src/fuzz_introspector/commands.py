@@ -14,14 +14,24 @@
 """High-level routines and CLI entrypoints"""
 
 import logging
+import os
 import yaml
-from typing import List
+from typing import (
+    List,
+    Optional,
+)
 
 from fuzz_introspector import analysis
+from fuzz_introspector import cache
+from fuzz_introspector import code_coverage
 from fuzz_introspector import constants
 from fuzz_introspector import data_loader
 from fuzz_introspector import html_report
+from fuzz_introspector import json_report
 from fuzz_introspector import utils
+from fuzz_introspector.analyses import calltree_analysis as cta
+from fuzz_introspector.analyses import engine_input
+from fuzz_introspector.datatypes import fuzzer_profile
 from fuzz_introspector.datatypes import project_profile
 
 logger = logging.getLogger(name=__name__)
@@ -42,15 +52,85 @@ def run_analysis_on_dir(
     correlation_file: str,
     enable_all_analyses: bool,
     report_name: str,
-    language: str
+    language: str,
+    cache_dir: Optional[str] = None,
+    load_branch_profiles: bool = False,
+    exclusion_config_file: Optional[str] = None,
+    branch_blockers_jsonl: bool = False,
+    pretty_html: bool = True,
+    virtual_calltree_threshold: int = constants.VIRTUAL_CALLTREE_THRESHOLD,
+    jobs: int = 1,
+    compress_table_data: bool = False,
+    output_format: str = "html",
+    matplotlib_calltree_images: bool = False
 ) -> int:
+    """Creates the report of the fuzzers in `target_folder`.
+
+    If `cache_dir` is set, the results of the stages of the run are cached
+    there together with a fingerprint of their inputs, and a rerun only redoes
+    the stages whose inputs changed: the profiles are loaded again if a
+    fuzzer data file changed, coverage is parsed again for changed coverage
+    files, and the HTML sections of fuzzers with unchanged inputs are reused.
+    If no input changed at all, the report of the earlier run is kept.
+    """
     if enable_all_analyses:
         for analysis_interface in analysis.get_all_analyses():
             if analysis_interface.get_name() not in analyses_to_run:
                 analyses_to_run.append(analysis_interface.get_name())
 
+    stage_cache = None
+    if cache_dir is not None:
+        stage_cache = cache.StageCache(cache_dir)
+
+    exclusion_config = data_loader.load_exclusion_config(exclusion_config_file)
+    report_fingerprint = ""
+    inputs_fingerprint = ""
+    if stage_cache is not None:
+        # The data all fuzzers are created from
+        input_files = [correlation_file] if os.path.isfile(correlation_file) else []
+        if load_branch_profiles:
+            input_files.extend(data_loader.get_branch_data_files(target_folder))
+        inputs_fingerprint = cache.get_fingerprint(
+            [
+                data_loader.get_profiles_fingerprint(target_folder, language, exclusion_config),
+                load_branch_profiles,
+                coverage_url
+            ],
+            input_files
+        )
+        report_input_files = code_coverage.get_coverage_files(target_folder, language)
+        if os.path.isfile(constants.INPUT_BUG_FILE):
+            report_input_files.append(constants.INPUT_BUG_FILE)
+        report_fingerprint = cache.get_fingerprint(
+            [
+                "report",
+                inputs_fingerprint,
+                sorted(analyses_to_run),
+                report_name,
+                branch_blockers_jsonl,
+                pretty_html,
+                virtual_calltree_threshold,
+                compress_table_data,
+                output_format,
+                matplotlib_calltree_images,
+                exclusion_config.sinks if exclusion_config is not None else None
+            ],
+            report_input_files
+        )
+        # The files written by the cached report are kept as its result
+        report_output_files = stage_cache.load("report", report_fingerprint)
+        if (report_output_files is not None
+                and all(os.path.isfile(filename) for filename in report_output_files)):
+            logger.info("[+] No inputs changed since the cached report")
+            return constants.APP_EXIT_SUCCESS
+
     logger.info("[+] Loading profiles")
-    profiles = data_loader.load_all_profiles(target_folder, language)
+    profiles = data_loader.load_all_profiles(
+        target_folder,
+        language,
+        exclusion_config,
+        stage_cache
+    )
     if len(profiles) == 0:
         logger.info("Found no profiles. Exiting")
         return constants.APP_EXIT_ERROR
@@ -68,7 +148,7 @@ def run_analysis_on_dir(
 
     logger.info("[+] Accummulating profiles")
     for profile in profiles:
-        profile.accummulate_profile(target_folder)
+        profile.accummulate_profile(target_folder, cache_dir)
 
     logger.info("[+] Creating project profile")
     proj_profile = project_profile.MergedProjectProfile(profiles)
@@ -77,29 +157,91 @@ def run_analysis_on_dir(
     for profile in profiles:
         profile.refine_paths(proj_profile.basefolder)
 
-    # logger.info("[+] Loading branch profiles")
-    # branch_profiles = data_loader.load_all_branch_profiles(target_folder)
-    # if len(branch_profiles) == 0:
-    #     logger.info("[X][X] Found no branch profiles!")
-
-    # Overlay coverage in each profile
-    for profile in profiles:
-        analysis.overlay_calltree_with_coverage(
-            profile,
-            proj_profile,
-            coverage_url,
-            proj_profile.basefolder
+    if load_branch_profiles:
+        logger.info("[+] Loading branch profiles")
+        added_branch_profiles = proj_profile.add_branch_profiles(
+            data_loader.iter_all_branch_profiles(target_folder)
         )
+        logger.info(f"- Added {added_branch_profiles} branch profiles")
 
-    logger.info(f"Analyses to run: {str(analyses_to_run)}")
+    branch_blockers_file = None
+    if branch_blockers_jsonl:
+        branch_blockers_file = constants.BRANCH_BLOCKERS_FILE
+        if os.path.isfile(branch_blockers_file):
+            os.remove(branch_blockers_file)
 
-    logger.info("[+] Creating HTML report")
-    html_report.create_html_report(
-        profiles,
-        proj_profile,
-        analyses_to_run,
-        coverage_url,
-        proj_profile.basefolder,
-        report_name
-    )
+    # The json output files are buffered and written once the report is done
+    try:
+        # Overlay coverage in each profile
+        for profile in profiles:
+            analysis.overlay_calltree_with_coverage(
+                profile,
+                proj_profile,
+                coverage_url,
+                proj_profile.basefolder,
+                branch_blockers_file
+            )
+
+        logger.info(f"Analyses to run: {str(analyses_to_run)}")
+
+        if output_format == "json":
+            logger.info("[+] Creating json report")
+            json_report.create_json_report(
+                profiles,
+                proj_profile,
+                analyses_to_run,
+                report_name,
+                exclusion_config
+            )
+        else:
+            logger.info("[+] Creating HTML report")
+            html_report.create_html_report(
+                profiles,
+                proj_profile,
+                analyses_to_run,
+                coverage_url,
+                proj_profile.basefolder,
+                report_name,
+                pretty_html,
+                virtual_calltree_threshold,
+                jobs,
+                compress_table_data,
+                stage_cache,
+                inputs_fingerprint,
+                exclusion_config,
+                matplotlib_calltree_images
+            )
+    finally:
+        utils.flush_json_report_files()
+
+    if stage_cache is not None:
+        stage_cache.store(
+            "report",
+            report_fingerprint,
+            get_report_output_files(profiles, output_format, branch_blockers_file)
+        )
     return constants.APP_EXIT_SUCCESS
+
+
+def get_report_output_files(
+    profiles: List[fuzzer_profile.FuzzerProfile],
+    output_format: str,
+    branch_blockers_file: Optional[str]
+) -> List[str]:
+    """Returns the files written by a report run in the working directory"""
+    output_files = [
+        constants.JSON_REPORT_FILE if output_format == "json"
+        else constants.HTML_REPORT_FILE
+    ]
+    output_files.extend(utils.get_json_report_filenames())
+    if branch_blockers_file is not None:
+        output_files.append(branch_blockers_file)
+    for profile in profiles:
+        output_files.append(engine_input.get_dictionary_file_name(profile))
+        if output_format != "json":
+            output_files.append(html_report.get_colormap_file_name(profile))
+    if output_format != "json":
+        # Runs with a cache name the calltree pages after the fuzzer index
+        for profile_idx in range(len(profiles)):
+            output_files.append(cta.get_calltree_file_name(profile_idx))
+    return [filename for filename in output_files if os.path.isfile(filename)]
@@ -19,6 +19,26 @@ GIT_BRANCH_URL = f"{GIT_REPO}/blob/main"
 
 ENGINE_INPUT_FILE = "fuzz-introspector-engine-input.json"
 SUMMARY_FILE = "summary.json"
+BRANCH_BLOCKERS_FILE = "branch-blockers.jsonl"
+HTML_REPORT_FILE = "fuzz_report.html"
+JSON_REPORT_FILE = "fuzz-introspector-report.json"
+
+REPORT_OUTPUT_FORMATS = ["html", "json"]
+
+# Fuzzer dictionaries are written to "<fuzzer>.dict" files, with at most this
+# many tokens. libFuzzer ignores tokens longer than its maximum word size.
+DICTIONARY_FILE_SUFFIX = ".dict"
+MAX_DICTIONARY_TOKENS = 1024
+MAX_DICTIONARY_TOKEN_SIZE = 64
+
+# Calltrees with more nodes than this are rendered in the browser from a data
+# file rather than written as HTML
+VIRTUAL_CALLTREE_THRESHOLD = 20000
+
+# The data of the tables in the HTML report is written to this directory, in
+# files of this many rows each
+TABLE_DATA_DIR = "table_data"
+TABLE_DATA_SHARD_SIZE = 5000
 
 APP_EXIT_ERROR = 1
 APP_EXIT_SUCCESS = 0
@@ -42,3 +62,18 @@ COLOR_CONSTANTS = [
 ]
 
 BLOCKLISTED_FUNCTION_NAMES = re.compile(r'^__sanitizer|^llvm\.|^__assert|.*printf$')
+# Functions with these in their names are not added to the merged profile
+MERGED_PROFILE_EXCLUDED_FUNCTIONS = re.compile(r'sanitizer|llvm')
+
+# Third party functions the ThirdPartyAPICoverageAnalyser reports the call
+# sites of. Each entry is a regex matched against the whole demangled name.
+THIRD_PARTY_SINKS = [
+    # Command injection sinks
+    "system",
+    "execve",
+    "execl",
+    "wordexp",
+    "popen",
+    "fdopen",
+    # Memory unsafe sinks, e.g. "strcpy" and "memcpy", are not included yet
+]
@@ -14,17 +14,26 @@
 """Reads the data output from the fuzz introspector LLVM plugin."""
 
 import os
+import collections
 import copy
+import itertools
 import json
 import logging
+import multiprocessing
 
 from typing import (
     Any,
+    Callable,
+    Deque,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Optional,
+    Set,
 )
 
+from fuzz_introspector import cache
 from fuzz_introspector import constants
 from fuzz_introspector import utils
 from fuzz_introspector.datatypes import (
@@ -41,7 +50,9 @@ logger = logging.getLogger(name=__name__)
 
 def read_fuzzer_data_file_to_profile(
     cfg_file: str,
-    language: str
+    language: str,
+    function_table: Optional[function_profile.FunctionProfileTable] = None,
+    exclusion_config: Optional[utils.ExclusionConfig] = None
 ) -> Optional[fuzzer_profile.FuzzerProfile]:
     """
     For a given .data file (CFG) read the corresponding .yaml file
@@ -57,7 +68,13 @@ def read_fuzzer_data_file_to_profile(
     if data_dict_yaml is None or not isinstance(data_dict_yaml, dict):
         return None
 
-    FP = fuzzer_profile.FuzzerProfile(cfg_file, data_dict_yaml, language)
+    FP = fuzzer_profile.FuzzerProfile(
+        cfg_file,
+        data_dict_yaml,
+        language,
+        function_table,
+        exclusion_config
+    )
 
     # Check we have a valid entrypoint
     if "LLVMFuzzerTestOneInput" in FP.all_class_functions:
@@ -137,20 +154,78 @@ def add_func_to_reached_and_clone(
     return merged_profile
 
 
+def load_exclusion_config(config_file: Optional[str] = None) -> Optional[utils.ExclusionConfig]:
+    """Loads the exclusion config of the analysis from `config_file`. There
+    is no exclusion config if `config_file` is not given.
+    """
+    if config_file is None:
+        return None
+    if not os.path.isfile(config_file):
+        raise DataLoaderError(f"Exclusion config {config_file} does not exist")
+    return utils.ExclusionConfig.from_file(config_file)
+
+
+def get_fuzzer_data_files(target_folder: str) -> List[str]:
+    return utils.get_all_files_in_tree_with_regex(
+        target_folder,
+        "fuzzerLogFile.*\.data$"
+    )
+
+
+def get_profiles_fingerprint(
+    target_folder: str,
+    language: str,
+    exclusion_config: Optional[utils.ExclusionConfig] = None
+) -> str:
+    """Returns a fingerprint of the inputs of `load_all_profiles`"""
+    input_files = []
+    for data_file in get_fuzzer_data_files(target_folder):
+        input_files.append(data_file)
+        if os.path.isfile(data_file + ".yaml"):
+            input_files.append(data_file + ".yaml")
+    exclusion_patterns = None
+    if exclusion_config is not None:
+        exclusion_patterns = exclusion_config.get_patterns()
+    return cache.get_fingerprint(["profiles", language, exclusion_patterns], input_files)
+
+
 def load_all_profiles(
     target_folder: str,
-    language: str
+    language: str,
+    exclusion_config: Optional[utils.ExclusionConfig] = None,
+    stage_cache: Optional[cache.StageCache] = None
 ) -> List[fuzzer_profile.FuzzerProfile]:
+    """Loads the profiles of all fuzzers in `target_folder`.
+
+    If `stage_cache` is given, the profiles of an earlier run are used if
+    none of the fuzzer data files changed. The profiles are cached as a
+    whole, since functions common to several fuzzers are shared between
+    their profiles.
+    """
+    fingerprint = ""
+    if stage_cache is not None:
+        fingerprint = get_profiles_fingerprint(target_folder, language, exclusion_config)
+        cached_profiles = stage_cache.load("profiles", fingerprint)
+        if cached_profiles is not None:
+            return cached_profiles
+
     profiles = []
-    data_files = utils.get_all_files_in_tree_with_regex(
-        target_folder,
-        "fuzzerLogFile.*\.data$"
-    )
+    data_files = get_fuzzer_data_files(target_folder)
     logger.info(f" - found {len(data_files)} profiles to load")
+    # Functions common to several fuzzers are shared between their profiles
+    function_table = function_profile.FunctionProfileTable(exclusion_config)
     for data_file in data_files:
-        profile = read_fuzzer_data_file_to_profile(data_file, language)
+        profile = read_fuzzer_data_file_to_profile(
+            data_file,
+            language,
+            function_table,
+            exclusion_config
+        )
         if profile is not None:
             profiles.append(profile)
+    logger.info(f" - loaded {len(function_table)} unique functions")
+    if stage_cache is not None:
+        stage_cache.store("profiles", fingerprint, profiles)
     return profiles
 
 
@@ -193,33 +268,114 @@ def load_input_bugs(bug_file: str) -> List[bug.Bug]:
     return input_bugs
 
 
-def read_branch_data_file_to_profile(filename: str, bp_dict: Dict[Any, Any]) -> None:
+def read_branch_data_file(filename: str) -> List[branch_profile.BranchProfile]:
     """
     Loads branch profiles from LLVM pass output yaml file.
     """
     logger.info(f" - loading {filename}")
     if not os.path.isfile(filename):
-        return
+        return []
 
     data_dict_yaml = utils.data_file_read_yaml(filename)
     if data_dict_yaml is None:
-        return
+        return []
 
+    branch_profiles = []
     for elem in data_dict_yaml:
         new_branch = branch_profile.BranchProfile()
         new_branch.assign_from_yaml_elem(elem)
+        branch_profiles.append(new_branch)
+    return branch_profiles
+
+
+def read_branch_data_file_to_profile(filename: str, bp_dict: Dict[Any, Any]) -> None:
+    """
+    Loads branch profiles from LLVM pass output yaml file into `bp_dict`.
+    """
+    for new_branch in read_branch_data_file(filename):
         bp_dict[new_branch.branch_pos] = new_branch
 
 
-def load_all_branch_profiles(
-    target_folder: str
-) -> Dict[str, branch_profile.BranchProfile]:
-    all_branch_profiles: Dict[str, branch_profile.BranchProfile] = dict()
-    data_files = utils.get_all_files_in_tree_with_regex(
+def get_branch_data_files(target_folder: str) -> List[str]:
+    return utils.get_all_files_in_tree_with_regex(
         target_folder,
-        ".*branchProfile\.yaml$"
+        ".*branchProfile\\.yaml$"
     )
+
+
+def iter_all_branch_profiles(
+    target_folder: str,
+    jobs: Optional[int] = None
+) -> Iterator[branch_profile.BranchProfile]:
+    """Yields the branch profiles of all branchProfile yaml files in
+    `target_folder`, skipping branches that have already been yielded.
+    Branches are told apart by their full source position.
+
+    The files are parsed by a pool of `jobs` worker processes, defaulting to
+    the number of CPUs, and the branch profiles of each file are yielded as
+    soon as the file is parsed. At most two files per worker are parsed ahead
+    of the consumer, so only a few files are held in memory at once.
+    """
+    data_files = get_branch_data_files(target_folder)
     logger.info(f" - found {len(data_files)} branchProfiles to load")
-    for data_file in data_files:
-        read_branch_data_file_to_profile(data_file, all_branch_profiles)
+
+    seen_branch_source_pos: Set[str] = set()
+    if len(data_files) <= 1 or jobs == 1:
+        file_results: Iterable[List[branch_profile.BranchProfile]] = map(
+            read_branch_data_file,
+            data_files
+        )
+        pool = None
+    else:
+        processes = jobs or os.cpu_count() or 1
+        pool = multiprocessing.Pool(processes)
+        file_results = iter_pool_results(
+            pool,
+            read_branch_data_file,
+            data_files,
+            2 * processes
+        )
+    try:
+        for branch_profiles in file_results:
+            for new_branch in branch_profiles:
+                if new_branch.branch_source_pos in seen_branch_source_pos:
+                    continue
+                seen_branch_source_pos.add(new_branch.branch_source_pos)
+                yield new_branch
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+def iter_pool_results(
+    pool: Any,
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_pending: int
+) -> Iterator[Any]:
+    """Yields `func(item)` for each of `items` in order, computed by the
+    worker processes of `pool`. Unlike `Pool.imap`, at most `max_pending`
+    items are submitted ahead of the consumer, so results do not pile up
+    when the consumer is slower than the workers.
+    """
+    items_iter = iter(items)
+    pending: Deque[Any] = collections.deque()
+    for item in itertools.islice(items_iter, max_pending):
+        pending.append(pool.apply_async(func, (item,)))
+    while len(pending) > 0:
+        result = pending.popleft().get()
+        for item in itertools.islice(items_iter, 1):
+            pending.append(pool.apply_async(func, (item,)))
+        yield result
+
+
+def load_all_branch_profiles(
+    target_folder: str,
+    jobs: Optional[int] = None
+) -> Dict[str, branch_profile.BranchProfile]:
+    """Returns the branch profiles of `target_folder` by full source position"""
+    all_branch_profiles: Dict[str, branch_profile.BranchProfile] = dict()
+    for new_branch in iter_all_branch_profiles(target_folder, jobs):
+        all_branch_profiles[new_branch.branch_source_pos] = new_branch
     return all_branch_profiles
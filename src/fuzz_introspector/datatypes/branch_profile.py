@@ -14,12 +14,16 @@
 """Branch profiler"""
 
 import logging
+import os
+import sys
 from enum import Enum
 from typing import (
     Any,
     Dict,
     List,
+    Optional,
     Set,
+    Tuple,
 )
 
 from fuzz_introspector import utils
@@ -32,14 +36,60 @@ class BranchSide(Enum):
     FALSE = 2
 
 
+def parse_branch_pos(branch_pos: str) -> Tuple[str, int, int]:
+    """Splits a branch position of the form `file:line,column` into its
+    parts. Line and column are -1 if the position can not be parsed.
+    """
+    try:
+        file_name, line_col = branch_pos.rsplit(':', maxsplit=1)
+        line_number, column_number = line_col.split(',')
+        return sys.intern(file_name), int(line_number), int(column_number)
+    except ValueError:
+        return branch_pos, -1, -1
+
+
 class BranchProfile:
     """
     Class for storing information about conditional branches collected by LLVM pass.
     """
+
+    __slots__ = (
+        'branch_pos',
+        'branch_source_pos',
+        'branch_true_side_pos',
+        'branch_false_side_pos',
+        'branch_file',
+        'branch_source_file',
+        'branch_line',
+        'branch_column',
+        'branch_true_side_line',
+        'branch_false_side_line',
+        'branch_true_side_unique_not_covered_complexity',
+        'branch_false_side_unique_not_covered_complexity',
+        'branch_true_side_unique_reachable_complexity',
+        'branch_false_side_unique_reachable_complexity',
+        'branch_true_side_reachable_complexity',
+        'branch_false_side_reachable_complexity',
+        'branch_true_side_not_covered_complexity',
+        'branch_false_side_not_covered_complexity',
+        'branch_true_side_hitcount',
+        'branch_false_side_hitcount',
+        'branch_true_side_funcs',
+        'branch_false_side_funcs',
+        '_side_unique_funcnames',
+    )
+
     def __init__(self) -> None:
         self.branch_pos = str()
+        self.branch_source_pos = str()
         self.branch_true_side_pos = str()
         self.branch_false_side_pos = str()
+        self.branch_file = str()
+        self.branch_source_file = str()
+        self.branch_line = -1
+        self.branch_column = -1
+        self.branch_true_side_line = -1
+        self.branch_false_side_line = -1
         self.branch_true_side_unique_not_covered_complexity = -1
         self.branch_false_side_unique_not_covered_complexity = -1
         self.branch_true_side_unique_reachable_complexity = -1
@@ -52,26 +102,56 @@ class BranchProfile:
         self.branch_false_side_hitcount = -1
         self.branch_true_side_funcs: List[str] = []
         self.branch_false_side_funcs: List[str] = []
+        self._side_unique_funcnames: Dict[BranchSide, Set[str]] = dict()
 
-    def assign_from_yaml_elem(self, elem: Dict[Any, Any]) -> None:
+    def assign_from_yaml_elem(
+        self,
+        elem: Dict[Any, Any],
+        exclusion_config: Optional[utils.ExclusionConfig] = None
+    ) -> None:
         # This skips the path, as it may cause incosistancy vs coverage file names path
         self.branch_pos = elem['Branch String'].split('/')[-1]
+        # The full position tells apart branches in files with the same name.
+        # Paths are normalized as source file paths of functions are.
+        self.branch_source_pos = os.path.abspath(elem['Branch String'])
+        self.branch_source_file = parse_branch_pos(self.branch_source_pos)[0]
         self.branch_true_side_pos = elem['Branch Sides']['TrueSide']
         self.branch_false_side_pos = elem['Branch Sides']['FalseSide']
-        self.branch_true_side_funcs = utils.load_func_names(elem['Branch Sides']['TrueSideFuncs'])
-        self.branch_false_side_funcs = utils.load_func_names(elem['Branch Sides']['FalseSideFuncs'])
+        self.branch_file, self.branch_line, self.branch_column = parse_branch_pos(
+            self.branch_pos
+        )
+        self.branch_true_side_line = parse_branch_pos(self.branch_true_side_pos)[1]
+        self.branch_false_side_line = parse_branch_pos(self.branch_false_side_pos)[1]
+        self.branch_true_side_funcs = utils.load_func_names(
+            elem['Branch Sides']['TrueSideFuncs'],
+            exclusion_config
+        )
+        self.branch_false_side_funcs = utils.load_func_names(
+            elem['Branch Sides']['FalseSideFuncs'],
+            exclusion_config
+        )
+        self._side_unique_funcnames = dict()
 
     def assign_from_coverage(self, true_count: str, false_count: str) -> None:
         self.branch_true_side_hitcount = int(true_count)
         self.branch_false_side_hitcount = int(false_count)
 
     def get_side_unique_reachable_funcnames(self, branch_side: BranchSide) -> Set[str]:
-        """Returns the set of unique functions reachable from the specified branch side"""
-        true_side_funcs_set = set(self.branch_true_side_funcs)
-        false_side_funcs_set = set(self.branch_false_side_funcs)
-        if branch_side == BranchSide.TRUE:
-            return true_side_funcs_set.difference(false_side_funcs_set)
-        return false_side_funcs_set.difference(true_side_funcs_set)
+        """Returns the set of unique functions reachable from the specified branch side.
+
+        The sets are computed once from the side function lists loaded by
+        `assign_from_yaml_elem`.
+        """
+        if branch_side not in self._side_unique_funcnames:
+            true_side_funcs_set = set(self.branch_true_side_funcs)
+            false_side_funcs_set = set(self.branch_false_side_funcs)
+            self._side_unique_funcnames[BranchSide.TRUE] = (
+                true_side_funcs_set.difference(false_side_funcs_set)
+            )
+            self._side_unique_funcnames[BranchSide.FALSE] = (
+                false_side_funcs_set.difference(true_side_funcs_set)
+            )
+        return self._side_unique_funcnames[branch_side]
 
     def dump(self) -> None:
         """
@@ -20,6 +20,16 @@ logger = logging.getLogger(name=__name__)
 
 class Bug:
     """Holds data about a given bug found by fuzzers."""
+
+    __slots__ = (
+        'source_file',
+        'source_line',
+        'function_name',
+        'fuzzer_name',
+        'description',
+        'bug_type',
+    )
+
     def __init__(
         self,
         source_file: str,
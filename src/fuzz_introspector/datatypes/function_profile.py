@@ -19,6 +19,8 @@ from typing import (
     Any,
     Dict,
     List,
+    Optional,
+    Tuple,
 )
 
 from fuzz_introspector.datatypes import branch_profile
@@ -31,7 +33,40 @@ class FunctionProfile:
     """
     Class for storing information about a given Function
     """
-    def __init__(self, elem: Dict[Any, Any]) -> None:
+
+    __slots__ = (
+        'function_name',
+        'function_source_file',
+        'linkage_type',
+        'function_linenumber',
+        'return_type',
+        'arg_count',
+        'arg_types',
+        'arg_names',
+        'bb_count',
+        'i_count',
+        'edge_count',
+        'cyclomatic_complexity',
+        'functions_reached',
+        'function_uses',
+        'function_depth',
+        'constants_touched',
+        'branch_profiles',
+        'callsite',
+        'hitcount',
+        'reached_by_fuzzers',
+        'incoming_references',
+        'new_unreached_complexity',
+        'total_cyclomatic_complexity',
+        '_branch_profiles_by_line',
+        '_branch_profiles_by_line_key',
+    )
+
+    def __init__(
+        self,
+        elem: Dict[Any, Any],
+        exclusion_config: Optional[utils.ExclusionConfig] = None
+    ) -> None:
         self.function_name = utils.demangle_cpp_func(elem['functionName'])
         self.function_source_file = elem['functionSourceFile']
         self.linkage_type = elem['linkageType']
@@ -44,11 +79,22 @@ class FunctionProfile:
         self.i_count = elem['ICount']
         self.edge_count = elem['EdgeCount']
         self.cyclomatic_complexity = elem['CyclomaticComplexity']
-        self.functions_reached = utils.load_func_names(elem['functionsReached'])
+        self.functions_reached = utils.load_func_names(
+            elem['functionsReached'],
+            exclusion_config
+        )
         self.function_uses = elem['functionUses']
         self.function_depth = elem['functionDepth']
         self.constants_touched = elem['constantsTouched']
-        self.branch_profiles = self.load_func_branch_profiles(elem['BranchProfiles'])
+        self.branch_profiles = self.load_func_branch_profiles(
+            elem['BranchProfiles'],
+            exclusion_config
+        )
+        self._branch_profiles_by_line: Dict[
+            Tuple[str, int],
+            List[branch_profile.BranchProfile]
+        ] = dict()
+        self._branch_profiles_by_line_key: Tuple[int, int] = (0, 0)
 
         # Saving callsites for this function
         try:
@@ -65,16 +111,47 @@ class FunctionProfile:
 
     def load_func_branch_profiles(
         self,
-        yaml_branch_profiles: Any
+        yaml_branch_profiles: Any,
+        exclusion_config: Optional[utils.ExclusionConfig] = None
     ) -> Dict[str, branch_profile.BranchProfile]:
         bp_loaded = {}
         for entry in yaml_branch_profiles:
             new_branch = branch_profile.BranchProfile()
-            new_branch.assign_from_yaml_elem(entry)
+            new_branch.assign_from_yaml_elem(entry, exclusion_config)
             bp_loaded[new_branch.branch_pos] = new_branch
 
         return bp_loaded
 
+    def get_branch_profile(
+        self,
+        source_file_name: str,
+        line_number: int,
+        column_number: int
+    ) -> Optional[branch_profile.BranchProfile]:
+        """Returns the branch profile at the given position of a source file.
+
+        The column of a branch is not always consistent between the LLVM pass
+        and coverage debug info. If there is no branch at the exact column,
+        the branch on the same line is returned if there is only one.
+        """
+        index_key = (id(self.branch_profiles), len(self.branch_profiles))
+        if self._branch_profiles_by_line_key != index_key:
+            self._branch_profiles_by_line = dict()
+            for branch in self.branch_profiles.values():
+                self._branch_profiles_by_line.setdefault(
+                    (branch.branch_file, branch.branch_line),
+                    []
+                ).append(branch)
+            self._branch_profiles_by_line_key = index_key
+
+        line_branches = self._branch_profiles_by_line.get((source_file_name, line_number), [])
+        for branch in line_branches:
+            if branch.branch_column == column_number:
+                return branch
+        if len(line_branches) == 1:
+            return line_branches[0]
+        return None
+
     def load_func_callsites(
         self,
         yaml_callsites: Any
@@ -94,3 +171,74 @@ class FunctionProfile:
             cs_loaded.update({callsite['Dst']: callsite_list})
 
         return cs_loaded
+
+
+class FunctionProfileTable:
+    """
+    Project-wide table of FunctionProfiles.
+
+    Fuzzers of a project share most of their functions, e.g. library code. The
+    table creates a single FunctionProfile for the elements read from the
+    frontend with the same function name, source file and linkage type, so the
+    static data of a function is only parsed and stored once. State that is
+    specific to a fuzzer, such as reachability and coverage, is held by the
+    fuzzer profiles.
+
+    If `exclusion_config` is given, excluded function names are dropped from
+    the functions reached by the created profiles.
+    """
+    # Fields of a function element that are the same in every fuzzer, mapped
+    # to the FunctionProfile attributes they are stored in
+    STATIC_FIELDS = {
+        'functionLinenumber': 'function_linenumber',
+        'returnType': 'return_type',
+        'argCount': 'arg_count',
+        'argTypes': 'arg_types',
+        'argNames': 'arg_names',
+        'BBCount': 'bb_count',
+        'ICount': 'i_count',
+        'EdgeCount': 'edge_count',
+        'CyclomaticComplexity': 'cyclomatic_complexity',
+    }
+
+    def __init__(self, exclusion_config: Optional[utils.ExclusionConfig] = None) -> None:
+        self._functions: Dict[Tuple[str, str, str], FunctionProfile] = dict()
+        self.exclusion_config = exclusion_config
+
+    def __len__(self) -> int:
+        return len(self._functions)
+
+    def get_function_profile(
+        self,
+        elem: Dict[Any, Any],
+        exclusion_config: Optional[utils.ExclusionConfig] = None
+    ) -> FunctionProfile:
+        """Returns the FunctionProfile of a function element, creating it if
+        the function has not been seen before. A created profile uses
+        `exclusion_config`, e.g. the config of the fuzzer, if it is given and
+        the config of the table otherwise.
+        """
+        elem_key = (
+            elem['functionName'],
+            elem['functionSourceFile'],
+            elem['linkageType']
+        )
+        func_profile = self._functions.get(elem_key)
+        if func_profile is None:
+            if exclusion_config is None:
+                exclusion_config = self.exclusion_config
+            func_profile = FunctionProfile(elem, exclusion_config)
+            self._functions[elem_key] = func_profile
+            return func_profile
+
+        mismatched_fields = [
+            field for field, attr in self.STATIC_FIELDS.items()
+            if elem[field] != getattr(func_profile, attr)
+        ]
+        if len(mismatched_fields) > 0:
+            logger.warning(
+                f"Function {elem['functionName']} in {elem['functionSourceFile']} "
+                f"differs between fuzzers in {', '.join(mismatched_fields)}. "
+                "Using the first loaded version"
+            )
+        return func_profile
@@ -13,8 +13,8 @@
 # limitations under the License.
 """Fuzzer profile"""
 
+import heapq
 import os
-import json
 import logging
 
 from typing import (
@@ -35,6 +35,43 @@ from fuzz_introspector.exceptions import DataLoaderError
 logger = logging.getLogger(name=__name__)
 
 
+class FileIndex:
+    """Index of the functions of a fuzzer by source file.
+
+    Paths are indexed both as given and normalized, i.e. with `basefolder`
+    removed, since only some paths of a profile have the base folder
+    removed. The files with functions hit at runtime are indexed the same
+    way, see `FuzzerProfile.is_file_covered`.
+    """
+    def __init__(self, profile: 'FuzzerProfile', basefolder: Optional[str] = None) -> None:
+        self.basefolder = basefolder
+        self.functions_by_file: Dict[str, List[str]] = dict()
+        self.functions_by_normalized_file: Dict[str, List[str]] = dict()
+        self.covered_files: Set[str] = set()
+        # Normalized path to the paths of the covered files it is made from
+        self.covered_normalized_files: Dict[str, Set[str]] = dict()
+        for funcname, fd in profile.all_class_functions.items():
+            file_name = fd.function_source_file
+            normalized_file_name = self.normalize(file_name)
+            self.functions_by_file.setdefault(file_name, []).append(funcname)
+            self.functions_by_normalized_file.setdefault(
+                normalized_file_name,
+                []
+            ).append(funcname)
+
+            _, _, hit_percentage = profile.get_cov_metrics(funcname)
+            if hit_percentage is not None and hit_percentage > 0.0:
+                self.covered_files.add(file_name)
+                self.covered_normalized_files.setdefault(normalized_file_name, set()).add(
+                    file_name
+                )
+
+    def normalize(self, file_name: str) -> str:
+        if self.basefolder is not None and self.basefolder != "/":
+            return file_name.replace(self.basefolder, "")
+        return file_name
+
+
 class FuzzerProfile:
     """
     Class for storing information about a given Fuzzer.
@@ -45,33 +82,81 @@ class FuzzerProfile:
         self,
         cfg_file: str,
         frontend_yaml: Dict[Any, Any],
-        target_lang: str = "c-cpp"
+        target_lang: str = "c-cpp",
+        function_table: Optional[function_profile.FunctionProfileTable] = None,
+        exclusion_config: Optional[utils.ExclusionConfig] = None
     ) -> None:
         # Defaults
+        self._file_index: Optional[FileIndex] = None
         self.binary_executable: str = ""
         self.file_targets: Dict[str, Set[str]] = dict()
-        self.coverage: Optional[code_coverage.CoverageProfile] = None
-        self.all_class_functions: Dict[str, function_profile.FunctionProfile] = dict()
+        self.coverage = None
+        self.all_class_functions = dict()
         self.branch_blockers: List[Any] = []
+        self._python_coverage_links: Dict[Tuple[str, str, int], str] = dict()
+        # The html index of python coverage, loaded when links are first resolved
+        self._python_coverage_html_index: Optional[code_coverage.PythonCoverageHtmlIndex] = None
+        self._python_coverage_html_index_loaded = False
+        self._functions_reached_set: Set[str] = set()
+        self._functions_reached_key: Tuple[int, int] = (0, 0)
+        self._fuzz_blockers: List[cfg_load.CalltreeCallsite] = []
+        self._fuzz_blockers_key: Tuple[int, int] = (0, 0)
 
         self._target_lang = target_lang
         self.introspector_data_file = cfg_file
 
+        # Functions in excluded files are excluded by name from the calltree
+        # and the functions reached by this fuzzer's functions as well
+        function_elems = frontend_yaml['All functions']['Elements']
+        if exclusion_config is not None:
+            function_elems, excluded_names = exclusion_config.split_function_elems(
+                function_elems
+            )
+            logger.info(f"Excluded {len(excluded_names)} functions by exclusion config")
+            exclusion_config = exclusion_config.with_excluded_function_names(excluded_names)
+        self.exclusion_config = exclusion_config
+
         # Load calltree file
-        self.function_call_depths = cfg_load.data_file_read_calltree(cfg_file)
+        self.function_call_depths = cfg_load.data_file_read_calltree(
+            cfg_file,
+            exclusion_config
+        )
 
         # Read yaml data (as dictionary) from frontend
         try:
             self.fuzzer_source_file: str = frontend_yaml['Fuzzer filename']
         except KeyError:
             raise DataLoaderError("Fuzzer filename not in loaded yaml")
-        self._set_function_list(frontend_yaml)
+        self._set_function_list(function_elems, function_table, exclusion_config)
 
     @property
     def target_lang(self):
         """Language the fuzzer is written in"""
         return self._target_lang
 
+    @property
+    def coverage(self) -> Optional[code_coverage.CoverageProfile]:
+        """Runtime coverage of the fuzzer"""
+        return self._coverage
+
+    @coverage.setter
+    def coverage(self, coverage: Optional[code_coverage.CoverageProfile]) -> None:
+        self._coverage = coverage
+        self.reset_file_index()
+
+    @property
+    def all_class_functions(self) -> Dict[str, function_profile.FunctionProfile]:
+        """The functions of the fuzzer by name"""
+        return self._all_class_functions
+
+    @all_class_functions.setter
+    def all_class_functions(
+        self,
+        all_class_functions: Dict[str, function_profile.FunctionProfile]
+    ) -> None:
+        self._all_class_functions = all_class_functions
+        self.reset_file_index()
+
     @property
     def entrypoint_function(self):
         """The name of the fuzzer entrypoint"""
@@ -187,7 +272,11 @@ class FuzzerProfile:
         :returns: `True` if the fuzzer statically reaches the function. `False`
                   otherwise.
         """
-        return func_name in self.functions_reached_by_fuzzer
+        reached_key = (id(self.functions_reached_by_fuzzer), len(self.functions_reached_by_fuzzer))
+        if self._functions_reached_key != reached_key:
+            self._functions_reached_set = set(self.functions_reached_by_fuzzer)
+            self._functions_reached_key = reached_key
+        return func_name in self._functions_reached_set
 
     def correlate_executable_name(self, correlation_dict) -> None:
         for elem in correlation_dict['pairings']:
@@ -205,13 +294,20 @@ class FuzzerProfile:
 
         return self.fuzzer_source_file
 
-    def accummulate_profile(self, target_folder: str) -> None:
+    def accummulate_profile(
+        self,
+        target_folder: str,
+        cache_dir: Optional[str] = None
+    ) -> None:
         """Triggers various analyses on the data of the fuzzer. This is used
         after a profile has been initialised to generate more interesting data.
+
+        :param cache_dir: optional directory for caching parsed coverage data.
+        :type cache_dir: Optional[str]
         """
         self._set_all_reached_functions()
         self._set_all_unreached_functions()
-        self._load_coverage(target_folder)
+        self._load_coverage(target_folder, cache_dir)
         self._set_file_targets()
         self._set_total_basic_blocks()
         self._set_total_cyclomatic_complexity()
@@ -255,30 +351,68 @@ class FuzzerProfile:
         :returns: `True` if the file is covered by runtime code coverage,
                   `False` otherwise.
         """
+        file_index = self.get_file_index(basefolder)
+
         # We need to refine the pathname to match how coverage file paths are.
         file_name = os.path.abspath(file_name)
+        new_file_name = file_index.normalize(file_name)
+
+        # The file is covered if a function in it, by either path, is hit and
+        # the function's file or the file itself is reached.
+        if new_file_name in self.file_targets:
+            return (file_name in file_index.covered_files
+                    or new_file_name in file_index.covered_normalized_files)
+        if file_name in file_index.covered_files and file_name in self.file_targets:
+            return True
+        return any(
+            func_file_name in self.file_targets
+            for func_file_name in file_index.covered_normalized_files.get(new_file_name, ())
+        )
 
-        # Refine filename if needed
-        if basefolder is not None and basefolder != "/":
-            new_file_name = file_name.replace(basefolder, "")
-        else:
-            new_file_name = file_name
+    def get_file_index(self, basefolder: Optional[str] = None) -> FileIndex:
+        """Returns the index of the functions of the fuzzer by source file.
+        The index is created once for the functions and coverage of the
+        fuzzer, and is reset by `reset_file_index` when either is set."""
+        if self._file_index is None or self._file_index.basefolder != basefolder:
+            self._file_index = FileIndex(self, basefolder)
+        return self._file_index
+
+    def reset_file_index(self) -> None:
+        self._file_index = None
+
+    def get_fuzz_blockers(self, max_blockers: int) -> List[cfg_load.CalltreeCallsite]:
+        """Returns the at most `max_blockers` calltree nodes with the most
+        uncovered nodes following them, in descending order of those.
+
+        The blockers are selected with a heap and kept, so further calls with
+        at most as many blockers only take a slice of them. The kept blockers
+        are reset by `reset_fuzz_blockers` when the calltree is overlaid with
+        coverage.
+        """
+        if self.function_call_depths is None or max_blockers <= 0:
+            return []
+        cached_call_depths, cached_max_blockers = self._fuzz_blockers_key
+        if cached_call_depths == id(self.function_call_depths) and (
+            max_blockers <= cached_max_blockers
+            or len(self._fuzz_blockers) < cached_max_blockers
+        ):
+            return self._fuzz_blockers[:max_blockers]
+
+        # Equal to sorting all nodes by forward reds, which is stable
+        self._fuzz_blockers = heapq.nlargest(
+            max_blockers,
+            (
+                node for node in cfg_load.extract_all_callsites(self.function_call_depths)
+                if node.cov_forward_reds > 0
+            ),
+            key=lambda node: node.cov_forward_reds
+        )
+        self._fuzz_blockers_key = (id(self.function_call_depths), max_blockers)
+        return list(self._fuzz_blockers)
 
-        for funcname in self.all_class_functions:
-            # Check it's a relevant filename
-            func_file_name = self.all_class_functions[funcname].function_source_file
-            if basefolder is not None and basefolder != "/":
-                new_func_file_name = func_file_name.replace(basefolder, "")
-            else:
-                new_func_file_name = func_file_name
-            if func_file_name != file_name and new_func_file_name != new_file_name:
-                continue
-            # Return true if the function is hit
-            tf, hl, hp = self.get_cov_metrics(funcname)
-            if hp is not None and hp > 0.0:
-                if func_file_name in self.file_targets or new_file_name in self.file_targets:
-                    return True
-        return False
+    def reset_fuzz_blockers(self) -> None:
+        self._fuzz_blockers = []
+        self._fuzz_blockers_key = (0, 0)
 
     def get_cov_metrics(
         self,
@@ -310,6 +444,32 @@ class FuzzerProfile:
         except Exception:
             return None, None, None
 
+    def get_cov_reach_stats(self) -> Tuple[int, int, float]:
+        """Returns the number of functions statically reachable by the fuzzer,
+        the number of these covered at runtime, and the percentage of
+        reachable functions that are covered."""
+        uncovered_reachable_funcs = len(self.get_cov_uncovered_reachable_funcs())
+        reachable_funcs = len(self.functions_reached_by_fuzzer)
+        reached_funcs = reachable_funcs - uncovered_reachable_funcs
+        try:
+            cov_reach_proportion = (float(reached_funcs) / float(reachable_funcs)) * 100.0
+        except Exception:
+            logger.info("reachable funcs is 0")
+            cov_reach_proportion = 0.0
+        return reachable_funcs, reached_funcs, cov_reach_proportion
+
+    def write_cov_reach_stats_to_summary_file(self) -> None:
+        reachable_funcs, reached_funcs, cov_reach_proportion = self.get_cov_reach_stats()
+        utils.write_to_summary_file(
+            self.identifier,
+            "coverage-blocker-stats",
+            {
+                "reachable-funcs": reachable_funcs,
+                "reached-funcs": reached_funcs,
+                "cov-reach-proportion": cov_reach_proportion,
+            }
+        )
+
     def write_stats_to_summary_file(self) -> None:
         file_target_count = len(self.file_targets) if self.file_targets is not None else 0
         utils.write_to_summary_file(
@@ -354,17 +514,32 @@ class FuzzerProfile:
             if f.function_name not in self.functions_reached_by_fuzzer
         ]
 
-    def _load_coverage(self, target_folder: str) -> None:
+    def _load_coverage(
+        self,
+        target_folder: str,
+        cache_dir: Optional[str] = None
+    ) -> None:
         """Load coverage data for this profile"""
         logger.info(f"Loading coverage of type {self.target_lang}")
         if self.target_lang == "c-cpp":
             self.coverage = code_coverage.load_llvm_coverage(
                 target_folder,
-                self.identifier
+                self.identifier,
+                cache_dir
             )
         elif self.target_lang == "python":
-            self.coverage = code_coverage.load_python_json_coverage(
-                target_folder
+            # Only load coverage of the files the functions of this fuzzer
+            # can resolve to.
+            names_of_interest = set(self.all_class_functions)
+            names_of_interest.update(
+                fd.function_source_file for fd in self.all_class_functions.values()
+            )
+            names_of_interest.add(
+                os.path.splitext(os.path.basename(self.fuzzer_source_file))[0]
+            )
+            self.coverage = code_coverage.load_python_coverage(
+                target_folder,
+                names_of_interest
             )
         else:
             raise DataLoaderError(
@@ -409,19 +584,29 @@ class FuzzerProfile:
             fd = self.all_class_functions[func]
             self.total_cyclomatic_complexity += fd.cyclomatic_complexity
 
-    def _set_function_list(self, frontend_yaml: Dict[Any, Any]) -> None:
-        """Read all function field from yaml data dictionary into
-        instances of FunctionProfile
+    def _set_function_list(
+        self,
+        function_elems: List[Dict[Any, Any]],
+        function_table: Optional[function_profile.FunctionProfileTable] = None,
+        exclusion_config: Optional[utils.ExclusionConfig] = None
+    ) -> None:
+        """Read the function elements of the yaml data dictionary into
+        instances of FunctionProfile. If `function_table` is given, the
+        FunctionProfiles are shared with other fuzzers through the table.
         """
-        for elem in frontend_yaml['All functions']['Elements']:
+        for elem in function_elems:
             if self._is_func_name_missing_normalisation(elem['functionName']):
                 logger.info(
                     f"May have non-normalised function: {elem['functionName']}"
                 )
 
-            func_profile = function_profile.FunctionProfile(elem)
+            if function_table is not None:
+                func_profile = function_table.get_function_profile(elem, exclusion_config)
+            else:
+                func_profile = function_profile.FunctionProfile(elem, exclusion_config)
             logger.debug(f"Adding {func_profile.function_name}")
             self.all_class_functions[func_profile.function_name] = func_profile
+        self.reset_file_index()
 
     def _is_func_name_missing_normalisation(self, func_name: str) -> bool:
         if "." in func_name:
@@ -448,24 +633,22 @@ class FuzzerProfile:
         function_name: str
     ) -> str:
         """Resolves link to HTML coverage report for Python targets"""
-        # Temporarily for debugging purposes. TODO: David remove this later
-        # Find the html_status.json file. This is a file generated by the Python
-        # coverate utility and contains mappings from source to html file. We
-        # need this mapping in order to create links from the data extracted
-        # during AST analysis, as there we only have the source code.
-        html_summaries = utils.get_all_files_in_tree_with_regex(".", ".*html_status.json$")
-        logger.info(str(html_summaries))
-        if len(html_summaries) > 0:
-            html_idx = html_summaries[0]
-            with open(html_idx, "r") as jf:
-                data = json.load(jf)
-            for fl in data['files']:
-                found_target = utils.approximate_python_coverage_files(
-                    function_name,
-                    data['files'][fl]['index']['relative_filename'],
-                )
-                if found_target:
-                    return cov_url + "/" + fl + ".html" + "#t" + str(lineno)
-        else:
-            logger.info("Could not find any html_status.json file")
-        return "#"
+        link_key = (cov_url, function_name, lineno)
+        if link_key in self._python_coverage_links:
+            return self._python_coverage_links[link_key]
+
+        # The html_status.json file is generated by the Python coverage utility
+        # and contains mappings from source to html file. We need this mapping
+        # in order to create links from the data extracted during AST
+        # analysis, as there we only have the source code.
+        link = "#"
+        if not self._python_coverage_html_index_loaded:
+            self._python_coverage_html_index = code_coverage.load_python_coverage_html_index(".")
+            self._python_coverage_html_index_loaded = True
+        html_index = self._python_coverage_html_index
+        if html_index is not None:
+            html_file = html_index.get_html_file(function_name)
+            if html_file is not None:
+                link = cov_url + "/" + html_file + ".html" + "#t" + str(lineno)
+        self._python_coverage_links[link_key] = link
+        return link
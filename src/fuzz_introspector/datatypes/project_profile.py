@@ -13,18 +13,21 @@
 # limitations under the License.
 """Project profile"""
 
+import bisect
 import os
 import logging
 
 from typing import (
     Dict,
+    Iterable,
     List,
     Tuple,
 )
 
 from fuzz_introspector import code_coverage
+from fuzz_introspector import constants
 from fuzz_introspector import utils
-from fuzz_introspector.datatypes import function_profile, fuzzer_profile
+from fuzz_introspector.datatypes import branch_profile, function_profile, fuzzer_profile
 
 logger = logging.getLogger(name=__name__)
 
@@ -59,15 +62,19 @@ class MergedProjectProfile:
                     self.unreached_functions.add(func_name)
 
         # Add all functions from the various profiles into the merged profile. Don't
-        # add duplicates
+        # add duplicates. Profiles may share FunctionProfile objects, see
+        # function_profile.FunctionProfileTable, so each object is only
+        # handled once.
         logger.info("Creating all_functions dictionary")
-        excluded_functions = {
-            "sanitizer", "llvm"
-        }
+        handled_functions = set()
         for profile in profiles:
             for fd in profile.all_class_functions.values():
+                if id(fd) in handled_functions:
+                    continue
+                handled_functions.add(id(fd))
+
                 # continue if the function is to be excluded
-                if len([ef for ef in excluded_functions if ef in fd.function_name]) != 0:
+                if constants.MERGED_PROFILE_EXCLUDED_FUNCTIONS.search(fd.function_name):
                     continue
 
                 # populate hitcount and reached_by_fuzzers and whether it has been handled already
@@ -105,44 +112,63 @@ class MergedProjectProfile:
                 + fp_obj.cyclomatic_complexity
             )
 
-        # Accumulate run-time coverage mapping
-        self.runtime_coverage = code_coverage.CoverageProfile()
-        for profile in profiles:
-            if profile.coverage is None:
-                continue
-            for func_name in profile.coverage.covmap:
-                if func_name not in self.runtime_coverage.covmap:
-                    self.runtime_coverage.covmap[func_name] = profile.coverage.covmap[func_name]
-                else:
-                    # Merge by picking highest line numbers. Here we can assume they coverage
-                    # maps have the same number of elements with the same line numbers but
-                    # different hit counts.
-                    new_line_counts = list()
-                    for idx1 in range(len(self.runtime_coverage.covmap[func_name])):
-                        try:
-                            ln1, ht1 = self.runtime_coverage.covmap[func_name][idx1]
-                            ln2, ht2 = profile.coverage.covmap[func_name][idx1]
-                        except Exception:
-                            ln1, ht1 = self.runtime_coverage.covmap[func_name][idx1]
-                            ln2, ht2 = self.runtime_coverage.covmap[func_name][idx1]
-                        # It may be that line numbers are not the same for the same function
-                        # name across different fuzzers.
-                        # This *could* actually happen, and will often (almost always) happen for
-                        # LLVMFuzzerTestOneInput. In this case we just gracefully
-                        # continue and ignore issues.
-                        if ln1 != ln2:
-                            logger.info(
-                                f"Line numbers are different in the same function: "
-                                f"{func_name}:{ln1}:{ln2}, ignoring"
-                            )
-                            continue
-                        new_line_counts.append((ln1, max(ht1, ht2)))
-                    self.runtime_coverage.covmap[func_name] = new_line_counts
-            # TODO (navidem): will need to merge branch coverages (branch_cov_map) if we need to
-            # identify blockers based on all fuzz targets coverage
+        # Accumulate run-time coverage mapping. The matrix indexes the coverage
+        # of each fuzzer, and the merged runtime coverage reads the highest
+        # hitcount of any fuzzer for each line and branch from it.
+        self.runtime_coverage_matrix = code_coverage.CoverageMatrix.from_coverage_profiles(
+            [profile.identifier for profile in profiles],
+            [profile.coverage for profile in profiles]
+        )
+        self.runtime_coverage = self.runtime_coverage_matrix.get_merged_coverage_profile()
         self._set_basefolder()
         logger.info("Completed creationg of merged profile")
 
+    def add_branch_profiles(
+        self,
+        branch_profiles: Iterable[branch_profile.BranchProfile]
+    ) -> int:
+        """Attaches branch profiles, e.g. loaded from standalone branchProfile
+        files, to the functions they belong to. A branch belongs to the
+        function in the same source file with the closest start line before
+        the branch. Source files are matched by their normalized path, or by
+        their name if no other file in the project has that name.
+
+        :returns: the number of branch profiles attached.
+        """
+        funcs_by_file: Dict[str, List[Tuple[int, function_profile.FunctionProfile]]] = dict()
+        for fd in self.all_functions.values():
+            if fd.function_source_file == "":
+                continue
+            funcs_by_file.setdefault(
+                os.path.abspath(fd.function_source_file),
+                []
+            ).append((int(fd.function_linenumber), fd))
+        func_start_lines: Dict[str, List[int]] = dict()
+        files_by_basename: Dict[str, List[str]] = dict()
+        for file_name, file_funcs in funcs_by_file.items():
+            file_funcs.sort(key=lambda x: x[0])
+            func_start_lines[file_name] = [start_line for start_line, _ in file_funcs]
+            files_by_basename.setdefault(os.path.basename(file_name), []).append(file_name)
+
+        added = 0
+        for branch in branch_profiles:
+            file_name = branch.branch_source_file
+            if file_name not in funcs_by_file:
+                # The path of the branch may differ from the function paths,
+                # which is only resolved if the file name is unambiguous.
+                basename_files = files_by_basename.get(branch.branch_file, [])
+                if len(basename_files) != 1:
+                    continue
+                file_name = basename_files[0]
+            idx = bisect.bisect_right(func_start_lines[file_name], branch.branch_line)
+            if idx == 0:
+                continue
+            fd = funcs_by_file[file_name][idx - 1][1]
+            if branch.branch_pos not in fd.branch_profiles:
+                fd.branch_profiles[branch.branch_pos] = branch
+                added += 1
+        return added
+
     def get_all_runtime_covered_functions(self) -> List[str]:
         """Gets the name of all functions that are covered by runtime
         code coverage analysis.
@@ -14,8 +14,11 @@
 
 """Module for creating HTML reports"""
 
+import re
+
 from typing import (
     Any,
+    IO,
     List,
     Optional,
     Tuple,
@@ -198,9 +201,15 @@ def html_create_table_head(
         table_head: str,
         items: List[Tuple[str, str]],
         sort_by_column: int = 0,
-        sort_order: str = "asc") -> str:
+        sort_order: str = "asc",
+        shard_count: Optional[int] = None) -> str:
+    """Creates the start of a table. If `shard_count` is given, the rows of
+    the table are loaded from that many data files, see `table_data`."""
     html_str = (f"<table id='{table_head}' class='cell-border compact stripe' "
-                f"data-sort-by-column='{sort_by_column}' data-sort-order='{sort_order}'>")
+                f"data-sort-by-column='{sort_by_column}' data-sort-order='{sort_order}'")
+    if shard_count is not None:
+        html_str += f" data-shards='{shard_count}'"
+    html_str += ">"
     html_str += "<thead><tr>\n"
     for column_title, column_description in items:
         if column_description == "":
@@ -209,3 +218,140 @@ def html_create_table_head(
             html_str += f"<th title='{column_description}'>{column_title}</th>\n"
     html_str += "</tr></thead><tbody>"
     return html_str
+
+
+class HtmlIndenter:
+    """Incremental pretty printer for HTML.
+
+    Puts each tag and text on its own line, indented by the depth of the tag.
+    The content of `pre`, `script`, `style` and `textarea` elements is kept
+    as is. Tags that are not closed, e.g. `<a id=..>` of headers, are closed
+    implicitly by the closing tag of their parent. HTML is processed in a
+    single pass, so the cost is linear in the size of the document.
+    """
+    _TOKEN_RE = re.compile(r'<!--.*?-->|<[^>]*>|[^<]+|<', re.S)
+    _TAG_NAME_RE = re.compile(r'</?\s*([a-zA-Z0-9]+)')
+    _VOID_TAGS = {
+        "area", "base", "br", "col", "embed", "hr", "img", "input",
+        "link", "meta", "param", "source", "track", "wbr"
+    }
+    _RAW_TAGS = {"pre", "script", "style", "textarea"}
+    _RAW_TAG_END_RE = {
+        tag: re.compile(f"</{tag}\\s*>", re.I) for tag in _RAW_TAGS
+    }
+
+    def __init__(self, indent: str = " ") -> None:
+        self._indent = indent
+        self._open_tags: List[str] = []
+        self._pending = ""
+        self._consumed = 0
+        self._raw_tag: Optional[str] = None
+        self._raw_search_from = 0
+
+    def feed(self, html: str) -> str:
+        """Returns the pretty printed HTML of the complete tags fed so far"""
+        self._pending += html
+        out: List[str] = []
+        while self._pending:
+            if self._raw_tag is not None:
+                # Copy raw content up to and including the closing tag
+                end_match = self._RAW_TAG_END_RE[self._raw_tag].search(
+                    self._pending,
+                    self._raw_search_from
+                )
+                if end_match is None:
+                    # The closing tag may start in what is left
+                    self._raw_search_from = max(0, len(self._pending) - len(self._raw_tag) - 16)
+                    break
+                out.append(self._pending[:end_match.end()])
+                out.append("\n")
+                self._pending = self._pending[end_match.end():]
+                self._raw_tag = None
+                self._raw_search_from = 0
+                continue
+
+            # Only handle complete tags, the rest is kept for the next feed
+            last_tag_end = self._pending.rfind(">")
+            if last_tag_end == -1:
+                break
+            self._feed_tokens(self._pending[:last_tag_end + 1], out)
+            self._pending = self._pending[self._consumed:]
+        return "".join(out)
+
+    def close(self) -> str:
+        """Returns the pretty printed HTML of what is left"""
+        out: List[str] = []
+        if self._raw_tag is not None:
+            out.append(self._pending)
+        else:
+            self._feed_tokens(self._pending, out)
+        self._pending = ""
+        self._raw_tag = None
+        self._raw_search_from = 0
+        self._open_tags = []
+        return "".join(out)
+
+    def _feed_tokens(self, html: str, out: List[str]) -> None:
+        self._consumed = len(html)
+        for match in self._TOKEN_RE.finditer(html):
+            token = match.group(0)
+            if not token.startswith("<") or token == "<":
+                text = token.strip()
+                if text:
+                    out.append(self._indent * len(self._open_tags) + text + "\n")
+                continue
+
+            name_match = self._TAG_NAME_RE.match(token)
+            if name_match is None:
+                # Comments, doctype and similar
+                out.append(self._indent * len(self._open_tags) + token + "\n")
+                continue
+            tag_name = name_match.group(1).lower()
+
+            if token.startswith("</"):
+                if tag_name in self._open_tags:
+                    while self._open_tags.pop() != tag_name:
+                        pass
+                out.append(self._indent * len(self._open_tags) + token + "\n")
+            elif tag_name in self._RAW_TAGS and not token.endswith("/>"):
+                out.append(self._indent * len(self._open_tags) + token)
+                self._raw_tag = tag_name
+                self._consumed = match.end()
+                return
+            else:
+                out.append(self._indent * len(self._open_tags) + token + "\n")
+                if tag_name not in self._VOID_TAGS and not token.endswith("/>"):
+                    self._open_tags.append(tag_name)
+
+
+class HtmlWriter:
+    """Writes an HTML document to a file as it is produced, optionally
+    pretty printed by `HtmlIndenter`."""
+    def __init__(self, filename: str, pretty: bool = True) -> None:
+        self._file = open(filename, "w")
+        self._indenter = HtmlIndenter() if pretty else None
+
+    def write(self, html: str) -> None:
+        if self._indenter is not None:
+            html = self._indenter.feed(html)
+        self._file.write(html)
+
+    def write_from(self, html_file: IO[str], chunk_size: int = 1 << 20) -> None:
+        """Writes the content of an open file, e.g. of a spooled section"""
+        html_file.seek(0)
+        while True:
+            chunk = html_file.read(chunk_size)
+            if not chunk:
+                break
+            self.write(chunk)
+
+    def close(self) -> None:
+        if self._indenter is not None:
+            self._file.write(self._indenter.close())
+        self._file.close()
+
+    def __enter__(self) -> 'HtmlWriter':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
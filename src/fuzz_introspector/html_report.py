@@ -18,40 +18,51 @@ import logging
 import shutil
 import json
 import typing
-import bs4
 import random
-import string
+import tempfile
+import multiprocessing
 from datetime import datetime
-import matplotlib.pyplot as plt
+import numpy as np
 
-from matplotlib.patches import Rectangle
 from typing import (
     Any,
     Dict,
+    Iterator,
     List,
     Optional,
     Tuple,
 )
 
 from fuzz_introspector import analysis
+from fuzz_introspector import cache
 from fuzz_introspector import utils
 from fuzz_introspector import cfg_load
 from fuzz_introspector import constants
 from fuzz_introspector import html_helpers
+from fuzz_introspector import table_data
 from fuzz_introspector.datatypes import project_profile, fuzzer_profile
 
 
 logger = logging.getLogger(name=__name__)
 
+# Size in pixels of the calltree overview images drawn without matplotlib
+CALLTREE_IMAGE_WIDTH = 1500
+CALLTREE_IMAGE_HEIGHT = 250
+CALLTREE_IMAGE_MARGIN = 20
+
 
 def create_horisontal_calltree_image(
     image_name: str,
-    profile: fuzzer_profile.FuzzerProfile
+    profile: fuzzer_profile.FuzzerProfile,
+    use_matplotlib: bool = False
 ) -> List[str]:
     """
     Creates a horisontal image of the calltree. The height is fixed and
     each element on the x-axis shows a node in the calltree in the form
     of a rectangle. The rectangle is red if not visited and green if visited.
+    The image is drawn from the runs of equal colors in a pixel buffer. If
+    `use_matplotlib` is set and matplotlib is installed, it is drawn with
+    matplotlib instead, which adds a title and axis labels.
     """
 
     logger.info(f"Creating image {image_name}")
@@ -69,58 +80,91 @@ def create_horisontal_calltree_image(
     # to not include the image at all.
     if len(color_list) == 0:
         color_list = ['red']
-    plot_size = len(color_list)
-    multiplier = plot_size / len(color_list)
-
-    fig, ax = plt.subplots()
-    ax.clear()
-    fig.set_size_inches(15, 2.5)
-    ax.plot()
-
-    # Create our rectangles
-    curr_start_x = 0.0
-    curr_size = 1.0
-    curr_color = color_list[0]
-    height = 1.0
-
-    for i in range(1, len(color_list)):
-        if curr_color == color_list[i]:
-            curr_size += 1.0
-        else:
-            final_start_x = curr_start_x * multiplier
-            final_size = curr_size * multiplier
-            ax.add_patch(
-                Rectangle(
-                    (final_start_x, 0.0),
-                    final_size,
-                    height,
-                    color=curr_color
-                )
-            )
-
-            # Start next color area
-            curr_start_x += curr_size
-            curr_color = color_list[i]
-            curr_size = 1.0
-    logger.info("- iterated over color list")
 
-    # Plot the last case
-    final_start_x = curr_start_x * multiplier
-    final_size = curr_size * multiplier
-    ax.add_patch(Rectangle((final_start_x, 0.0), final_size, height, color=curr_color))
-    ax.set_yticklabels([])
-    ax.set_yticks([])
-    xlabel = ax.set_xlabel("Callsite index")
+    # Run-length encode the color sequence
+    color_rgbs = {cname: rgb for cmin, cmax, cname, rgb in constants.COLOR_CONSTANTS}
+    color_names = list(color_rgbs)
+    color_name_indices = {cname: idx for idx, cname in enumerate(color_names)}
+    color_indices = np.array([color_name_indices.get(color, 0) for color in color_list])
+    run_starts = np.concatenate(
+        ([0], np.flatnonzero(color_indices[1:] != color_indices[:-1]) + 1)
+    )
+    run_lengths = np.diff(np.append(run_starts, len(color_indices)))
+    run_color_indices = color_indices[run_starts]
+    logger.info(f"- iterated over color list ({len(run_starts)} color runs)")
 
     # Save the image
     logger.info("- saving image")
-    plt.title(image_name.replace(".png", "").replace("_colormap", ""))
-    fig.tight_layout()
-    fig.savefig(image_name, bbox_extra_artists=[xlabel])
+    figure_class = None
+    if use_matplotlib:
+        try:
+            from matplotlib.figure import Figure
+            figure_class = Figure
+        except ImportError:
+            logger.warning("matplotlib is not installed, drawing calltree images without it")
+    if figure_class is None:
+        palette = np.array(
+            [[int(color_rgbs[cname][i:i + 2], 16) for i in (1, 3, 5)] for cname in color_names],
+            dtype=np.float64
+        )
+        save_calltree_pixel_image(image_name, run_starts, run_lengths,
+                                  palette[run_color_indices])
+    else:
+        fig = figure_class(figsize=(15, 2.5))
+        ax = fig.subplots()
+        for color_idx, cname in enumerate(color_names):
+            is_color_run = run_color_indices == color_idx
+            if np.any(is_color_run):
+                ax.broken_barh(
+                    list(zip(run_starts[is_color_run], run_lengths[is_color_run])),
+                    (0.0, 1.0),
+                    color=cname
+                )
+        ax.set_xlim(0, len(color_list))
+        ax.set_ylim(0.0, 1.0)
+        ax.set_yticks([])
+        xlabel = ax.set_xlabel("Callsite index")
+        ax.set_title(image_name.replace(".png", "").replace("_colormap", ""))
+        fig.tight_layout()
+        fig.savefig(image_name, bbox_extra_artists=[xlabel])
     logger.info("- image saved")
     return color_list
 
 
+def save_calltree_pixel_image(
+    image_name: str,
+    run_starts: np.ndarray,
+    run_lengths: np.ndarray,
+    run_colors: np.ndarray
+) -> None:
+    """Writes the runs of colors of a calltree, given as RGB values, to a PNG
+    image. Each pixel column gets the average color of the nodes it covers,
+    which keeps runs narrower than a pixel visible."""
+    node_count = int(run_starts[-1] + run_lengths[-1])
+    run_color_sums = np.concatenate(
+        ([[0.0, 0.0, 0.0]], np.cumsum(run_lengths[:, None] * run_colors, axis=0))
+    )
+    plot_left, plot_right = CALLTREE_IMAGE_MARGIN, CALLTREE_IMAGE_WIDTH - CALLTREE_IMAGE_MARGIN
+    plot_top, plot_bottom = CALLTREE_IMAGE_MARGIN, CALLTREE_IMAGE_HEIGHT - CALLTREE_IMAGE_MARGIN
+    column_bounds = np.linspace(0, node_count, plot_right - plot_left + 1)
+    bound_runs = np.searchsorted(run_starts, column_bounds, side="right") - 1
+    bound_color_sums = (
+        run_color_sums[bound_runs]
+        + (column_bounds - run_starts[bound_runs])[:, None] * run_colors[bound_runs]
+    )
+    column_colors = (
+        (bound_color_sums[1:] - bound_color_sums[:-1])
+        / np.diff(column_bounds)[:, None]
+    )
+
+    pixels = np.full((CALLTREE_IMAGE_HEIGHT, CALLTREE_IMAGE_WIDTH, 3), 255, dtype=np.uint8)
+    pixels[plot_top:plot_bottom, plot_left:plot_right] = np.rint(column_colors)
+    # Frame around the plot
+    pixels[[plot_top - 1, plot_bottom], plot_left - 1:plot_right + 1] = 0
+    pixels[plot_top - 1:plot_bottom + 1, [plot_left - 1, plot_right]] = 0
+    utils.write_png(image_name, pixels)
+
+
 def create_overview_table(
     tables: List[str],
     profiles: List[fuzzer_profile.FuzzerProfile]
@@ -175,9 +219,8 @@ def create_all_function_table(
         table_id: Optional[str] = None
 ) -> Tuple[str, List[typing.Dict[str, Any]]]:
     """Table for all functions in the project. Contains many details about each
-        function"""
-    random_suffix = '_' + ''.join(
-        random.choices(string.ascii_lowercase + string.ascii_uppercase, k=7))
+        function. The rows of the table are written as table data, see
+        `table_data`, and are also returned."""
     if table_id is None:
         table_id = tables[-1]
 
@@ -213,16 +256,9 @@ def create_all_function_table(
          "Based on static analysis."),
         ("Undiscovered complexity", "")
     ]
-    html_string = html_helpers.html_create_table_head(
-        table_id,
-        table_columns,
-        sort_by_column=len(table_columns) - 1,
-        sort_order="desc"
-    )
 
-    # an array in development to replace html generation in python.
-    # this will be stored as a json object and will be used to populate
-    # the table in the frontend
+    # The rows hold the values of the functions, the HTML of the cells is
+    # created by custom.js
     table_rows = []
 
     for fd_k, fd in proj_profile.all_functions.items():
@@ -238,49 +274,20 @@ def create_all_function_table(
         except Exception:
             hit_percentage = 0.0
 
-        func_cov_url = "%s%s.html#L%d" % (
-            coverage_url,
-            fd.function_source_file,
-            fd.function_linenumber
-        )
-
         if proj_profile.runtime_coverage.is_func_hit(fd.function_name):
             func_hit_at_runtime_row = "yes"
         else:
             func_hit_at_runtime_row = "no"
 
-        func_name_row = f"""<a href='{ func_cov_url }'><code class='language-clike'>
-            { demangled_func_name }
-            </code></a>"""
-
-        collapsible_id = demangled_func_name + random_suffix
-
-        if fd.hitcount > 0:
-            reached_by_fuzzers_row = create_collapsible_element(
-                str(fd.hitcount),
-                str(fd.reached_by_fuzzers),
-                collapsible_id
-            )
-        else:
-            reached_by_fuzzers_row = "0"
-
-        if fd.arg_count > 0:
-            args_row = create_collapsible_element(
-                str(fd.arg_count),
-                str(fd.arg_types),
-                collapsible_id + "2"
-            )
-        else:
-            args_row = "0"
-
         table_rows.append({
-            "Func name": func_name_row,
-            "func_url": func_cov_url,
+            "Func name": demangled_func_name,
             "Functions filename": fd.function_source_file,
-            "Args": args_row,
+            "Func linenumber": fd.function_linenumber,
+            "Args": fd.arg_count,
+            "Arg types": str(fd.arg_types),
             "Function call depth": fd.function_depth,
-            "Reached by Fuzzers": reached_by_fuzzers_row,
-            "collapsible_id": collapsible_id,
+            "Reached by Fuzzers": fd.hitcount,
+            "Fuzzers reaching": str(fd.reached_by_fuzzers),
             "Fuzzers runtime hit": func_hit_at_runtime_row,
             "Func lines hit %": "%.5s" % (str(hit_percentage)) + "%",
             "I Count": fd.i_count,
@@ -291,6 +298,14 @@ def create_all_function_table(
             "Accumulated cyclomatic complexity": fd.total_cyclomatic_complexity,
             "Undiscovered complexity": fd.new_unreached_complexity
         })
+
+    html_string = html_helpers.html_create_table_head(
+        table_id,
+        table_columns,
+        sort_by_column=len(table_columns) - 1,
+        sort_order="desc",
+        shard_count=table_data.write_table_data(table_id, table_rows)
+    )
     html_string += ("</table>\n")
     return html_string, table_rows
 
@@ -477,6 +492,13 @@ def create_top_summary_info(
     return html_string
 
 
+def get_colormap_file_name(profile: fuzzer_profile.FuzzerProfile) -> str:
+    colormap_file_prefix = profile.identifier
+    if "/" in colormap_file_prefix:
+        colormap_file_prefix = colormap_file_prefix.replace("/", "_")
+    return f"{colormap_file_prefix}_colormap.png"
+
+
 def create_fuzzer_detailed_section(
     profile: fuzzer_profile.FuzzerProfile,
     toc_list: List[Tuple[str, str, int]],
@@ -484,8 +506,19 @@ def create_fuzzer_detailed_section(
     curr_tt_profile: int,
     conclusions: List[html_helpers.HTMLConclusion],
     extract_conclusion: bool,
-    fuzzer_table_data: Dict[str, Any]
+    fuzzer_table_data: Dict[str, Any],
+    pretty_html: bool = True,
+    virtual_calltree_threshold: int = constants.VIRTUAL_CALLTREE_THRESHOLD,
+    calltree_file_idx: Optional[int] = None,
+    matplotlib_calltree_images: bool = False
 ) -> str:
+    """Creates the section of the report with the details of a fuzzer.
+
+    The tables of the section are named after `curr_tt_profile`, so that
+    sections can be created independently of each other, see
+    `iter_fuzzer_sections`.
+    """
+    table_id_prefix = f"fuzzer{curr_tt_profile}Table"
     html_string = ""
     html_string += html_helpers.html_add_header_with_link(
         f"Fuzzer: {profile.identifier}",
@@ -499,7 +532,12 @@ def create_fuzzer_detailed_section(
 
     from fuzz_introspector.analyses import calltree_analysis as cta
     calltree_analysis = cta.Analysis()
-    calltree_file_name = calltree_analysis.create_calltree(profile)
+    calltree_file_name = calltree_analysis.create_calltree(
+        profile,
+        pretty_html,
+        virtual_calltree_threshold,
+        calltree_file_idx
+    )
 
     html_string += f"""<p class='no-top-margin'>The calltree shows the
     control flow of the fuzzer. This is overlaid with coverage information
@@ -531,12 +569,13 @@ def create_fuzzer_detailed_section(
         "</p>"
     )
 
-    colormap_file_prefix = profile.identifier
-    if "/" in colormap_file_prefix:
-        colormap_file_prefix = colormap_file_prefix.replace("/", "_")
-    image_name = f"{colormap_file_prefix}_colormap.png"
+    image_name = get_colormap_file_name(profile)
 
-    color_list = create_horisontal_calltree_image(image_name, profile)
+    color_list = create_horisontal_calltree_image(
+        image_name,
+        profile,
+        matplotlib_calltree_images
+    )
     html_string += f"<img class=\"colormap\" src=\"{image_name}\">"
     color_dictionary = {
         "red": 0,
@@ -597,7 +636,8 @@ def create_fuzzer_detailed_section(
             profile,
             tables,
             calltree_file_name,
-            12
+            12,
+            table_id_prefix
         )
     else:
         # Fuzz blocker table based on calltree
@@ -605,7 +645,8 @@ def create_fuzzer_detailed_section(
             profile,
             tables,
             calltree_file_name,
-            file_link=calltree_file_name
+            file_link=calltree_file_name,
+            table_id_prefix=table_id_prefix
         )
     if html_fuzz_blocker_table is not None:
         html_string += html_helpers.html_add_header_with_link(
@@ -624,24 +665,12 @@ def create_fuzzer_detailed_section(
         toc_list,
         link=f"functions_cov_hit_{curr_tt_profile}"
     )
-    table_name = f"myTable{len(tables)}"
+    table_name = f"{table_id_prefix}{len(tables)}"
 
     # Add this table name to fuzzer_table_data
     fuzzer_table_data[table_name] = []
 
     tables.append(table_name)
-    func_hit_table_string = ""
-    func_hit_table_string += html_helpers.html_create_table_head(
-        tables[-1],
-        [
-            ("Function name", ""),
-            ("source code lines", ""),
-            ("source lines hit", ""),
-            ("percentage hit", "")
-        ],
-        1,
-        "desc"
-    )
 
     total_hit_functions = 0
     if profile.coverage is not None:
@@ -658,34 +687,29 @@ def create_fuzzer_detailed_section(
                     "source lines hit": hit_lines,
                     "percentage hit": "%.5s" % (str(hit_percentage)) + "%"
                 })
-                '''func_hit_table_string += html_table_add_row([
-                    funcname,
-                    total_func_lines,
-                    hit_lines,
-                    "%.5s" % (str(hit_percentage)) + "%"])'''
             else:
                 logger.error("Could not write coverage line for function %s" % funcname)
+
+    func_hit_table_string = ""
+    func_hit_table_string += html_helpers.html_create_table_head(
+        table_name,
+        [
+            ("Function name", ""),
+            ("source code lines", ""),
+            ("source lines hit", ""),
+            ("percentage hit", "")
+        ],
+        1,
+        "desc",
+        table_data.write_table_data(table_name, fuzzer_table_data[table_name])
+    )
     func_hit_table_string += "</table>"
 
     # Get how many functions are covered relative to reachability
-    uncovered_reachable_funcs = len(profile.get_cov_uncovered_reachable_funcs())
-    reachable_funcs = len(profile.functions_reached_by_fuzzer)
-    reached_funcs = reachable_funcs - uncovered_reachable_funcs
-    try:
-        cov_reach_proportion = (float(reached_funcs) / float(reachable_funcs)) * 100.0
-    except Exception:
-        logger.info("reachable funcs is 0")
-        cov_reach_proportion = 0.0
+    reachable_funcs, reached_funcs, cov_reach_proportion = profile.get_cov_reach_stats()
+    uncovered_reachable_funcs = reachable_funcs - reached_funcs
     str_percentage = "%.5s%%" % str(cov_reach_proportion)
-    utils.write_to_summary_file(
-        profile.identifier,
-        "coverage-blocker-stats",
-        {
-            "reachable-funcs": reachable_funcs,
-            "reached-funcs": reached_funcs,
-            "cov-reach-proportion": cov_reach_proportion,
-        }
-    )
+    profile.write_cov_reach_stats_to_summary_file()
     if extract_conclusion:
         if cov_reach_proportion < 30.0:
             conclusions.append(
@@ -742,7 +766,7 @@ def create_fuzzer_detailed_section(
     # Table showing which files this fuzzer hits.
     html_string += html_helpers.html_add_header_with_link(
         "Files reached", 3, toc_list, link=f"files_hit_{curr_tt_profile}")
-    tables.append(f"myTable{len(tables)}")
+    tables.append(f"{table_id_prefix}{len(tables)}")
     html_string += html_helpers.html_create_table_head(
         tables[-1],
         [
@@ -757,6 +781,206 @@ def create_fuzzer_detailed_section(
     return html_string
 
 
+class FuzzerSection:
+    """The details section of a fuzzer and the entries it adds to the
+    report, see `iter_fuzzer_sections`."""
+    def __init__(self, profile_idx: int) -> None:
+        self.profile_idx = profile_idx
+        self.html = ""
+        self.toc_list: List[Tuple[str, str, int]] = []
+        self.tables: List[str] = []
+        self.conclusions: List[html_helpers.HTMLConclusion] = []
+        self.fuzzer_table_data: Dict[str, Any] = dict()
+        # Values for the json files of the report
+        self.json_report_values: List[Tuple[str, Tuple[str, ...], Any]] = []
+        # Files written for the section, e.g. its calltree page
+        self.output_files: List[str] = []
+
+
+class FuzzerSectionCache:
+    """Fuzzer sections of earlier reports, which are reused for fuzzers with
+    unchanged inputs, see `iter_fuzzer_sections`.
+
+    The fingerprint of a section is made of `inputs_fingerprint`, which
+    covers the data shared by all fuzzers, the coverage files of the fuzzer
+    and the options the section is created with. A section is only reused
+    if the files written for it still exist.
+    """
+    def __init__(
+        self,
+        stage_cache: cache.StageCache,
+        profiles: List[fuzzer_profile.FuzzerProfile],
+        inputs_fingerprint: str,
+        pretty_html: bool = True,
+        virtual_calltree_threshold: int = constants.VIRTUAL_CALLTREE_THRESHOLD,
+        matplotlib_calltree_images: bool = False
+    ) -> None:
+        self.stage_cache = stage_cache
+        self.fingerprints: List[str] = []
+        for profile_idx, profile in enumerate(profiles):
+            coverage_files = []
+            if profile.coverage is not None:
+                coverage_files = profile.coverage.coverage_files
+            self.fingerprints.append(cache.get_fingerprint(
+                [
+                    "fuzzer-section",
+                    inputs_fingerprint,
+                    profile_idx,
+                    profile.identifier,
+                    pretty_html,
+                    virtual_calltree_threshold,
+                    matplotlib_calltree_images
+                ],
+                coverage_files
+            ))
+
+        self.sections: Dict[int, FuzzerSection] = dict()
+        for profile_idx, fingerprint in enumerate(self.fingerprints):
+            section = stage_cache.load(self._get_stage(profile_idx), fingerprint)
+            if section is None:
+                continue
+            if not all(os.path.isfile(filename) for filename in section.output_files):
+                logger.info(f"Files of the cached section of fuzzer {profile_idx} are missing")
+                continue
+            self.sections[profile_idx] = section
+
+    @staticmethod
+    def _get_stage(profile_idx: int) -> str:
+        return f"fuzzer-section-{profile_idx}"
+
+    def get_cached_output_files(self) -> List[str]:
+        return [
+            filename for section in self.sections.values() for filename in section.output_files
+        ]
+
+    def store(self, section: FuzzerSection) -> None:
+        self.stage_cache.store(
+            self._get_stage(section.profile_idx),
+            self.fingerprints[section.profile_idx],
+            section
+        )
+
+
+# Arguments of the sections created by worker processes. Workers are forked
+# and inherit these, so the profiles are not copied to each worker.
+_fuzzer_section_args: Dict[str, Any] = dict()
+
+
+def _create_fuzzer_section(profile_idx: int) -> FuzzerSection:
+    from fuzz_introspector.analyses import calltree_analysis as cta
+
+    args = _fuzzer_section_args
+    profile = args["profiles"][profile_idx]
+    section = FuzzerSection(profile_idx)
+    section.html = create_fuzzer_detailed_section(
+        profile,
+        section.toc_list,
+        section.tables,
+        profile_idx,
+        section.conclusions,
+        True,
+        section.fuzzer_table_data,
+        args["pretty_html"],
+        args["virtual_calltree_threshold"],
+        args["calltree_file_indices"][profile_idx],
+        args["matplotlib_calltree_images"]
+    )
+    section.json_report_values = utils.pop_json_report_values()
+
+    calltree_file_name = cta.get_calltree_file_name(args["calltree_file_indices"][profile_idx])
+    section.output_files.append(calltree_file_name)
+    calltree_data_file_name = calltree_file_name.replace(".html", ".js")
+    if os.path.isfile(calltree_data_file_name):
+        section.output_files.append(calltree_data_file_name)
+    section.output_files.append(get_colormap_file_name(profile))
+    for table_id, rows in section.fuzzer_table_data.items():
+        for shard_idx in range(table_data.get_shard_count(len(rows))):
+            section.output_files.append(table_data.get_shard_filename(table_id, shard_idx))
+    return section
+
+
+def _init_fuzzer_section_worker() -> None:
+    # Forked workers start with the random state of the parent
+    random.seed()
+    # Values buffered before the fork are written by the parent
+    utils.pop_json_report_values()
+
+
+def _create_fuzzer_sections(profile_indices: List[int], jobs: int) -> Iterator[FuzzerSection]:
+    if jobs <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for profile_idx in profile_indices:
+            # Keep the values buffered so far out of the section
+            earlier_values = utils.pop_json_report_values()
+            section = _create_fuzzer_section(profile_idx)
+            utils.set_json_report_values(earlier_values)
+            yield section
+        return
+
+    logger.info(f"Creating fuzzer sections with {jobs} processes")
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(jobs, initializer=_init_fuzzer_section_worker) as pool:
+        yield from pool.imap(_create_fuzzer_section, profile_indices)
+
+
+def iter_fuzzer_sections(
+    profiles: List[fuzzer_profile.FuzzerProfile],
+    jobs: int = 1,
+    pretty_html: bool = True,
+    virtual_calltree_threshold: int = constants.VIRTUAL_CALLTREE_THRESHOLD,
+    section_cache: Optional[FuzzerSectionCache] = None,
+    matplotlib_calltree_images: bool = False
+) -> Iterator[FuzzerSection]:
+    """Creates the details sections of the fuzzers and yields them in the
+    order of `profiles`.
+
+    The sections are independent of each other and are created by `jobs`
+    worker processes, or all processes of the machine if `jobs` is 0. The
+    values a section writes to the json files of the report are returned
+    with the section and buffered once the section is yielded. Workers are
+    only used where processes can be forked.
+
+    If `section_cache` is given, the cached sections are yielded instead of
+    being created again, and the created sections are added to the cache.
+    The calltree page of each fuzzer is then named after its index, so the
+    pages of cached sections are not overwritten.
+    """
+    from fuzz_introspector.analyses import calltree_analysis as cta
+
+    cached_sections: Dict[int, FuzzerSection] = dict()
+    if section_cache is not None:
+        cached_sections = section_cache.sections
+        calltree_file_indices = list(range(len(profiles)))
+    else:
+        calltree_file_indices = cta.get_free_calltree_file_indices(len(profiles))
+    _fuzzer_section_args.update({
+        "profiles": profiles,
+        "pretty_html": pretty_html,
+        "virtual_calltree_threshold": virtual_calltree_threshold,
+        "calltree_file_indices": calltree_file_indices,
+        "matplotlib_calltree_images": matplotlib_calltree_images
+    })
+    profile_indices = [idx for idx in range(len(profiles)) if idx not in cached_sections]
+    if len(cached_sections) > 0:
+        logger.info(f"Reusing {len(cached_sections)} cached fuzzer sections")
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(profile_indices))
+
+    try:
+        created_sections = _create_fuzzer_sections(profile_indices, jobs)
+        for profile_idx in range(len(profiles)):
+            if profile_idx in cached_sections:
+                section = cached_sections[profile_idx]
+            else:
+                section = next(created_sections)
+                if section_cache is not None:
+                    section_cache.store(section)
+            utils.set_json_report_values(section.json_report_values)
+            yield section
+    finally:
+        _fuzzer_section_args.clear()
+
+
 def get_simple_box(title: str, value: str) -> str:
     return f"""<div class="report-box" style="flex: 1; display: flex; flex-direction: column;">
         <div style="font-size: 0.9rem;">
@@ -803,17 +1027,50 @@ def create_html_report(
     analyses_to_run: List[str],
     coverage_url: str,
     basefolder: str,
-    report_name: str
+    report_name: str,
+    pretty_html: bool = True,
+    virtual_calltree_threshold: int = constants.VIRTUAL_CALLTREE_THRESHOLD,
+    jobs: int = 1,
+    compress_table_data: bool = False,
+    stage_cache: Optional[cache.StageCache] = None,
+    inputs_fingerprint: str = "",
+    config: Optional[utils.ExclusionConfig] = None,
+    matplotlib_calltree_images: bool = False
 ) -> None:
     """
     Logs a complete report. This is the current main place for looking at
     data produced by fuzz introspector.
+
+    The sections of the report are written to a spool file as they are
+    created, since the table of contents and the conclusions at the top of
+    the report are only known once all sections are done. The fuzzer
+    sections are created by `jobs` processes, see `iter_fuzzer_sections`.
+
+    The rows of the tables are written to data files that the page loads,
+    see `table_data`. If `compress_table_data` is set, compressed copies of
+    these files are written as well.
+
+    If `stage_cache` is given, the sections of fuzzers whose inputs are
+    unchanged since an earlier report are reused, see `FuzzerSectionCache`.
     """
     tables: List[str] = list()
     toc_list: List[Tuple[str, str, int]] = list()
     conclusions: List[html_helpers.HTMLConclusion] = []
 
     logger.info(" - Creating HTML report")
+    section_cache = None
+    if stage_cache is not None:
+        section_cache = FuzzerSectionCache(
+            stage_cache,
+            profiles,
+            inputs_fingerprint,
+            pretty_html,
+            virtual_calltree_threshold,
+            matplotlib_calltree_images
+        )
+        table_data.remove_table_data(section_cache.get_cached_output_files())
+    else:
+        table_data.remove_table_data()
 
     # Create html header, which will be used to assemble the doc at the
     # end of this function.
@@ -852,104 +1109,108 @@ def create_html_report(
     # Reachability overview
     #############################################
     logger.info(" - Creating reachability overview table")
-    html_report_core = html_helpers.html_add_header_with_link(
+    html_report_core = tempfile.TemporaryFile("w+")
+    html_report_core.write(html_helpers.html_add_header_with_link(
         "Reachability and coverage overview",
         2,
         toc_list
-    )
+    ))
     tables.append(f"myTable{len(tables)}")
-    html_report_core += "<div style=\"display: flex; max-width: 800px\">"
-    html_report_core += create_boxed_top_summary_info(
+    html_report_core.write("<div style=\"display: flex; max-width: 800px\">")
+    html_report_core.write(create_boxed_top_summary_info(
         tables,
         proj_profile,
         conclusions,
         True,
         display_coverage=True
-    )
+    ))
     # Boxed summary
-    html_report_core += "</div>"
+    html_report_core.write("</div>")
 
     # .collapsible
-    html_report_core += "</div>"
+    html_report_core.write("</div>")
 
     # report-box
-    html_report_core += "</div>"
+    html_report_core.write("</div>")
 
     #############################################
     # Table with overview of all fuzzers.
     #############################################
     logger.info(" - Creating table with overview of all fuzzers")
-    html_report_core += "<div class=\"report-box\">"
-    html_report_core += html_helpers.html_add_header_with_link(
+    html_report_core.write("<div class=\"report-box\">")
+    html_report_core.write(html_helpers.html_add_header_with_link(
         "Fuzzers overview",
         1,
         toc_list
-    )
-    html_report_core += "<div class=\"collapsible\">"
+    ))
+    html_report_core.write("<div class=\"collapsible\">")
     tables.append(f"myTable{len(tables)}")
-    html_report_core += create_overview_table(tables, profiles)
+    html_report_core.write(create_overview_table(tables, profiles))
 
     # report-box
-    html_report_core += "</div>"  # .collapsible
-    html_report_core += "</div>"
+    html_report_core.write("</div>")  # .collapsible
+    html_report_core.write("</div>")
 
     #############################################
     # Table with details about all functions in the target project.
     #############################################
     logger.info(" - Creating table with information about all functions in target")
-    html_report_core += "<div class=\"report-box\">"
-    html_report_core += html_helpers.html_add_header_with_link(
-        "Project functions overview", 1, toc_list)
-    html_report_core += "<div class=\"collapsible\">"
-    html_report_core += "<p> The following table shows data about each function in the project. " \
-                        "The functions included in this table correspond to all functions " \
-                        "that exist in the executables of the fuzzers. As such, there may  " \
-                        "be functions that are from third-party libraries.</p>"
-    html_report_core += f"<p>For further technical details on the meaning of columns in the " \
-                        f"below table, please see the " \
-                        f"<a href=\"{constants.GIT_BRANCH_URL}/doc/Glossary.md#project-"\
-                        f"functions-overview\">Glossary</a>.</p>"
+    html_report_core.write("<div class=\"report-box\">")
+    html_report_core.write(html_helpers.html_add_header_with_link(
+        "Project functions overview", 1, toc_list))
+    html_report_core.write("<div class=\"collapsible\">")
+    html_report_core.write("<p> The following table shows data about each function in the "
+                           "project. The functions included in this table correspond to all "
+                           "functions that exist in the executables of the fuzzers. As such, "
+                           "there may  be functions that are from third-party libraries.</p>")
+    html_report_core.write(f"<p>For further technical details on the meaning of columns in the "
+                           f"below table, please see the "
+                           f"<a href=\"{constants.GIT_BRANCH_URL}/doc/Glossary.md#project-"
+                           f"functions-overview\">Glossary</a>.</p>")
 
     table_id = "fuzzers_overview_table"
     tables.append(table_id)
-    all_function_table, all_functions_json = create_all_function_table(
+    all_function_table, _ = create_all_function_table(
         tables, proj_profile, coverage_url, basefolder, table_id)
-    html_report_core += all_function_table
-    html_report_core += "</div>"  # .collapsible
-    html_report_core += "</div>"  # report box
+    html_report_core.write(all_function_table)
+    html_report_core.write("</div>")  # .collapsible
+    html_report_core.write("</div>")  # report box
 
     #############################################
     # Section with details about each fuzzer, including calltree.
     #############################################
     logger.info(" - Creating section with details about each fuzzer")
     fuzzer_table_data: Dict[str, Any] = dict()
-    html_report_core += "<div class=\"report-box\">"
-    html_report_core += html_helpers.html_add_header_with_link("Fuzzer details", 1, toc_list)
-    html_report_core += "<div class=\"collapsible\">"
-    for profile_idx in range(len(profiles)):
-        html_report_core += create_fuzzer_detailed_section(
-            profiles[profile_idx],
-            toc_list,
-            tables,
-            profile_idx,
-            conclusions,
-            True,
-            fuzzer_table_data
-        )
-    html_report_core += "</div>"  # .collapsible
-    html_report_core += "</div>"  # report box
+    html_report_core.write("<div class=\"report-box\">")
+    html_report_core.write(html_helpers.html_add_header_with_link("Fuzzer details", 1, toc_list))
+    html_report_core.write("<div class=\"collapsible\">")
+    for section in iter_fuzzer_sections(
+        profiles,
+        jobs,
+        pretty_html,
+        virtual_calltree_threshold,
+        section_cache,
+        matplotlib_calltree_images
+    ):
+        html_report_core.write(section.html)
+        toc_list.extend(section.toc_list)
+        tables.extend(section.tables)
+        conclusions.extend(section.conclusions)
+        fuzzer_table_data.update(section.fuzzer_table_data)
+    html_report_core.write("</div>")  # .collapsible
+    html_report_core.write("</div>")  # report box
 
     #############################################
     # Handle optional analyses
     #############################################
     logger.info(" - Handling optional analyses")
-    html_report_core += "<div class=\"report-box\">"
-    html_report_core += html_helpers.html_add_header_with_link(
+    html_report_core.write("<div class=\"report-box\">")
+    html_report_core.write(html_helpers.html_add_header_with_link(
         "Analyses and suggestions",
         1,
         toc_list
-    )
-    html_report_core += "<div class=\"collapsible\">"
+    ))
+    html_report_core.write("<div class=\"collapsible\">")
 
     analysis_array = analysis.get_all_analyses()
     for analysis_interface in analysis_array:
@@ -957,7 +1218,9 @@ def create_html_report(
             analysis_instance = analysis.instantiate_analysis_interface(
                 analysis_interface
             )
-            html_report_core += analysis_instance.analysis_func(
+            if config is not None:
+                analysis_instance.set_config(config)
+            html_report_core.write(analysis_instance.analysis_func(
                 toc_list,
                 tables,
                 proj_profile,
@@ -965,9 +1228,9 @@ def create_html_report(
                 basefolder,
                 coverage_url,
                 conclusions
-            )
-    html_report_core += "</div>"  # .collapsible
-    html_report_core += "</div>"  # report box
+            ))
+    html_report_core.write("</div>")  # .collapsible
+    html_report_core.write("</div>")  # report box
 
     #############################################
     # End of optional analyses
@@ -983,8 +1246,7 @@ def create_html_report(
     html_body_end = "</div>\n</div>\n"
 
     # .js files to add to report
-    js_files = ["prism.js", "clike.js", "custom.js", "all_functions.js",
-                "analysis_1.js", "fuzzer_table_data.js",
+    js_files = ["prism.js", "clike.js", "custom.js",
                 "https://cdn.datatables.net/buttons/2.2.2/js/dataTables.buttons.min.js",
                 "https://cdn.datatables.net/buttons/2.2.2/js/buttons.colVis.min.js"]
     for js_file in js_files:
@@ -1006,6 +1268,9 @@ def create_html_report(
             html_footer += "];\n"
         counter += 1
 
+    # Links to source code in table data are relative to the coverage url
+    html_footer += f"var coverageUrl = {json.dumps(coverage_url)};\n"
+
     # Closing tags
     html_footer += ("</script>\n")
     html_footer += ("</body>\n")
@@ -1017,50 +1282,24 @@ def create_html_report(
     html_toc_string = html_helpers.html_get_table_of_contents(toc_list, coverage_url, profiles)
 
     # Assemble the final HTML report and write it to a file.
-    html_full_doc = (html_header
-                     + html_toc_string
-                     + html_body_start
-                     + html_overview
-                     + html_report_top
-                     + html_report_core
-                     + html_body_end
-                     + html_footer)
-
-    # Pretty print the html document
-    soup = bs4.BeautifulSoup(html_full_doc, "html.parser")
-    prettyHTML = soup.prettify()
-
-    # Remove existing html report
-    report_name = "fuzz_report.html"
-    if os.path.isfile(report_name):
-        os.remove(report_name)
-
-    # Write new html report
-    with open(report_name, "a+") as html_report:
-        html_report.write(prettyHTML)
-
-    # Remove existing all funcs .js file
-    report_name = "all_functions.js"
-    if os.path.isfile(report_name):
-        os.remove(report_name)
-
-    # Write all functions to the .js file
-    with open(report_name, "a+") as all_funcs_json_file:
-        all_funcs_json_file.write("var all_functions_table_data = ")
-        all_funcs_json_file.write(json.dumps(all_functions_json))
-
-    # Remove existing fuzzer table data .js file
-    js_file = "fuzzer_table_data.js"
-    if os.path.isfile(js_file):
-        os.remove(js_file)
-
-    # Write fuzzer table data to the .js file
-    with open(js_file, "a+") as fuzzer_table_data_file:
-        fuzzer_table_data_file.write("var fuzzer_table_data = ")
-        fuzzer_table_data_file.write(json.dumps(fuzzer_table_data))
+    report_name = constants.HTML_REPORT_FILE
+    with html_helpers.HtmlWriter(report_name, pretty_html) as html_report:
+        html_report.write(html_header)
+        html_report.write(html_toc_string)
+        html_report.write(html_body_start)
+        html_report.write(html_overview)
+        html_report.write(html_report_top)
+        html_report.write_from(html_report_core)
+        html_report.write(html_body_end)
+        html_report.write(html_footer)
+    html_report_core.close()
+
+    if compress_table_data:
+        table_data.compress_table_data()
 
     # Copy all of the styling into the directory.
     basedir = os.path.dirname(os.path.realpath(__file__))
     style_dir = os.path.join(basedir, "styling")
-    for s in ["clike.js", "prism.css", "prism.js", "styles.css", "custom.js", "calltree.js"]:
+    for s in ["clike.js", "prism.css", "prism.js", "styles.css", "custom.js", "calltree.js",
+              "calltree_virtual.js"]:
         shutil.copy(os.path.join(style_dir, s), s)
@@ -0,0 +1,311 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Module for creating data-only reports.
+
+A json report holds the data of the HTML report in a single json document,
+without the HTML pages, calltree pages and images. The json files otherwise
+written with the HTML report, e.g. summary.json, are written as well.
+"""
+
+import json
+import logging
+import os
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+from fuzz_introspector import analysis
+from fuzz_introspector import cfg_load
+from fuzz_introspector import constants
+from fuzz_introspector import data_loader
+from fuzz_introspector import utils
+from fuzz_introspector.datatypes import (
+    project_profile,
+    fuzzer_profile,
+    function_profile
+)
+from fuzz_introspector.exceptions import AnalysisError
+
+logger = logging.getLogger(name=__name__)
+
+
+def get_function_summaries(proj_profile: project_profile.MergedProjectProfile) -> Dict[str, Any]:
+    (total_functions,
+     reached_func_count,
+     unreached_func_count,
+     reached_percentage,
+     unreached_percentage) = proj_profile.get_function_summaries()
+    (total_complexity,
+     complexity_reached,
+     complexity_unreached,
+     reached_complexity_percentage,
+     unreached_complexity_percentage) = proj_profile.get_complexity_summaries()
+    return {
+        "total-functions": total_functions,
+        "reached-functions": reached_func_count,
+        "unreached-functions": unreached_func_count,
+        "reached-functions-percentage": reached_percentage,
+        "unreached-functions-percentage": unreached_percentage,
+        "total-complexity": total_complexity,
+        "complexity-reached": complexity_reached,
+        "complexity-unreached": complexity_unreached,
+        "reached-complexity-percentage": reached_complexity_percentage,
+        "unreached-complexity-percentage": unreached_complexity_percentage,
+    }
+
+
+def get_function_record(
+    fd: function_profile.FunctionProfile,
+    proj_profile: project_profile.MergedProjectProfile
+) -> Dict[str, Any]:
+    """Returns the data of a function, as shown in the all functions table of
+    the HTML report"""
+    total_lines, hit_lines = proj_profile.runtime_coverage.get_hit_summary(fd.function_name)
+    if total_lines is None or hit_lines is None or total_lines == 0:
+        hit_percentage = 0.0
+    else:
+        hit_percentage = (hit_lines / total_lines) * 100.0
+    return {
+        "name": fd.function_name,
+        "source-file": fd.function_source_file,
+        "linenumber": fd.function_linenumber,
+        "arg-types": fd.arg_types,
+        "function-depth": fd.function_depth,
+        "reached-by-fuzzers": fd.reached_by_fuzzers,
+        "hit-at-runtime": proj_profile.runtime_coverage.is_func_hit(fd.function_name),
+        "hit-percentage": hit_percentage,
+        "i-count": fd.i_count,
+        "bb-count": fd.bb_count,
+        "cyclomatic-complexity": fd.cyclomatic_complexity,
+        "functions-reached": len(fd.functions_reached),
+        "reached-by-functions": len(fd.incoming_references),
+        "accumulated-cyclomatic-complexity": fd.total_cyclomatic_complexity,
+        "undiscovered-complexity": fd.new_unreached_complexity,
+    }
+
+
+def get_fuzz_blocker_record(node: cfg_load.CalltreeCallsite) -> Dict[str, Any]:
+    return {
+        "blocked-callsites": node.cov_forward_reds,
+        "calltree-index": node.cov_ct_idx,
+        "parent-function": node.cov_parent,
+        "callsite-function": node.dst_function_name,
+        "callsite-source-file": node.dst_function_source_file,
+        "callsite-linenumber": node.src_linenumber,
+        "largest-blocked-function": node.cov_largest_blocked_func,
+    }
+
+
+def get_project_fuzz_blockers(
+    profiles: List[fuzzer_profile.FuzzerProfile]
+) -> List[Dict[str, Any]]:
+    """Returns the fuzz blockers of the project, i.e. the blockers of all
+    fuzzers with the most blocked callsites, and the fuzzer of each"""
+    from fuzz_introspector.analyses import calltree_analysis as cta
+
+    project_fuzz_blockers = []
+    for profile, node in cta.get_project_fuzz_blockers(profiles, max_blockers_to_extract=12):
+        fuzz_blocker = get_fuzz_blocker_record(node)
+        fuzz_blocker["fuzzer"] = profile.identifier
+        project_fuzz_blockers.append(fuzz_blocker)
+    return project_fuzz_blockers
+
+
+def get_fuzzer_record(profile: fuzzer_profile.FuzzerProfile) -> Dict[str, Any]:
+    """Returns the data of a fuzzer, as shown in the fuzzer sections of the
+    HTML report"""
+    from fuzz_introspector.analyses import calltree_analysis as cta
+
+    callsites = cfg_load.extract_all_callsites(profile.function_call_depths)
+    max_depth = max([cs.depth for cs in callsites], default=0)
+
+    covered_functions = []
+    if profile.coverage is not None:
+        for funcname in profile.coverage.covmap:
+            total_func_lines, hit_lines, hit_percentage = profile.get_cov_metrics(funcname)
+            if hit_percentage is None:
+                continue
+            covered_functions.append({
+                "name": funcname,
+                "source-lines": total_func_lines,
+                "source-lines-hit": hit_lines,
+                "hit-percentage": hit_percentage,
+            })
+
+    fuzz_blockers = [
+        get_fuzz_blocker_record(node)
+        for node in cta.Analysis().get_fuzz_blockers(profile, max_blockers_to_extract=12)
+    ]
+
+    reachable_funcs, reached_funcs, cov_reach_proportion = profile.get_cov_reach_stats()
+    return {
+        "name": profile.identifier,
+        "source-file": profile.fuzzer_source_file,
+        "functions-reached": len(profile.functions_reached_by_fuzzer),
+        "functions-unreached": len(profile.functions_unreached_by_fuzzer),
+        "max-calltree-depth": max_depth,
+        "file-target-count": len(profile.file_targets),
+        "total-basic-blocks": profile.total_basic_blocks,
+        "total-cyclomatic-complexity": profile.total_cyclomatic_complexity,
+        "coverage": {
+            "reachable-funcs": reachable_funcs,
+            "reached-funcs": reached_funcs,
+            "cov-reach-proportion": cov_reach_proportion,
+            "covered-functions": covered_functions,
+        },
+        "fuzz-blockers": fuzz_blockers,
+        "branch-blockers": [
+            analysis.get_branch_blocker_record(blk) for blk in profile.branch_blockers
+        ],
+    }
+
+
+def get_analyses_data(
+    profiles: List[fuzzer_profile.FuzzerProfile],
+    proj_profile: project_profile.MergedProjectProfile,
+    analyses_to_run: List[str],
+    config: Optional[utils.ExclusionConfig] = None
+) -> Dict[str, Any]:
+    """Returns the data of the analyses to run. Raises an AnalysisError for
+    names that are not analyses."""
+    from fuzz_introspector.analyses import (
+        bug_digestor,
+        driver_synthesizer,
+        engine_input,
+        filepath_analyser,
+        function_call_analyser,
+        metadata,
+        optimal_targets,
+        runtime_coverage_analysis
+    )
+
+    analyses_data: Dict[str, Any] = dict()
+    for analysis_name in analyses_to_run:
+        if analysis_name == optimal_targets.Analysis.get_name():
+            new_profile, optimal_functions = (
+                optimal_targets.Analysis().iteratively_get_optimal_targets(proj_profile)
+            )
+            analyses_data[analysis_name] = {
+                "optimal-targets": [
+                    get_function_record(fd, proj_profile) for fd in optimal_functions
+                ],
+                "project-with-optimal-targets": get_function_summaries(new_profile),
+            }
+        elif analysis_name == engine_input.Analysis.get_name():
+            engine_input_analysis = engine_input.Analysis()
+            analyses_data[analysis_name] = {
+                profile.identifier: {
+                    "focus-functions": engine_input_analysis.get_focus_functions(profile),
+                    "dictionary": engine_input_analysis.get_dictionary(profile),
+                }
+                for profile in profiles
+            }
+        elif analysis_name == runtime_coverage_analysis.Analysis.get_name():
+            analyses_data[analysis_name] = {
+                "low-coverage-functions": (
+                    runtime_coverage_analysis.Analysis().get_low_cov_high_line_funcs(
+                        profiles,
+                        proj_profile,
+                        min_total_lines=30,
+                        max_hit_proportion=55
+                    )
+                )
+            }
+        elif analysis_name == driver_synthesizer.Analysis.get_name():
+            fuzzer_drivers = driver_synthesizer.Analysis().get_fuzzer_drivers(proj_profile)
+            analyses_data[analysis_name] = {
+                filename: {
+                    "target-functions": [fd.function_name for fd in driver.target_fds],
+                    "source-code": driver.source_code,
+                }
+                for filename, driver in fuzzer_drivers.items()
+            }
+        elif analysis_name == bug_digestor.Analysis.get_name():
+            analyses_data[analysis_name] = [
+                {
+                    "bug-type": input_bug.bug_type,
+                    "function-name": input_bug.function_name,
+                    "source-file": input_bug.source_file,
+                    "source-line": input_bug.source_line,
+                    "fuzzer-name": input_bug.fuzzer_name,
+                    "description": input_bug.description,
+                }
+                for input_bug in data_loader.try_load_input_bugs()
+            ]
+        elif analysis_name == filepath_analyser.Analysis.get_name():
+            filepath_analysis = filepath_analyser.Analysis()
+            all_proj_files = filepath_analysis.all_files_targeted(proj_profile)
+            analyses_data[analysis_name] = {
+                "files": filepath_analysis.get_file_records(
+                    all_proj_files,
+                    proj_profile,
+                    profiles
+                ),
+                "directories": sorted(filepath_analysis.all_dirs_targeted(all_proj_files)),
+            }
+        elif analysis_name == function_call_analyser.Analysis.get_name():
+            function_call_analysis = function_call_analyser.Analysis()
+            if config is not None:
+                function_call_analysis.set_config(config)
+            analyses_data[analysis_name] = {
+                "callsites": function_call_analysis.get_callsite_records(proj_profile, profiles)
+            }
+        elif analysis_name == metadata.Analysis.get_name():
+            analyses_data[analysis_name] = {
+                "fuzzers": metadata.Analysis().get_fuzzer_records(profiles)
+            }
+        else:
+            raise AnalysisError(f"Unknown analysis {analysis_name}")
+    return analyses_data
+
+
+def create_json_report(
+    profiles: List[fuzzer_profile.FuzzerProfile],
+    proj_profile: project_profile.MergedProjectProfile,
+    analyses_to_run: List[str],
+    report_name: str,
+    config: Optional[utils.ExclusionConfig] = None
+) -> None:
+    """Writes the json report of a project to `constants.JSON_REPORT_FILE`.
+    `config` holds the settings of the analyses, if any."""
+    logger.info(" - Creating json report")
+    proj_profile.write_stats_to_summary_file()
+    for profile in profiles:
+        profile.write_stats_to_summary_file()
+        profile.write_cov_reach_stats_to_summary_file()
+
+    json_report = {
+        "name": report_name,
+        "project": {
+            "basefolder": proj_profile.basefolder,
+            "stats": get_function_summaries(proj_profile),
+            "runtime-covered-functions": len(proj_profile.get_all_runtime_covered_functions()),
+            "fuzz-blockers": get_project_fuzz_blockers(profiles),
+        },
+        "fuzzers": [get_fuzzer_record(profile) for profile in profiles],
+        "functions": [
+            get_function_record(fd, proj_profile) for fd in proj_profile.all_functions.values()
+        ],
+        "analyses": get_analyses_data(profiles, proj_profile, analyses_to_run, config),
+    }
+
+    tmp_filename = f"{constants.JSON_REPORT_FILE}.tmp"
+    with open(tmp_filename, "w") as json_file:
+        json.dump(json_report, json_file)
+    os.replace(tmp_filename, constants.JSON_REPORT_FILE)
+    logger.info(f" - Wrote {constants.JSON_REPORT_FILE}")
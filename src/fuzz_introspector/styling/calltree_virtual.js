@@ -0,0 +1,268 @@
+// Renders a calltree from the columnar "calltree_data" payload. Only the
+// rows in view are added to the page, and folding a subtree only changes
+// which nodes are listed as visible, so the cost of opening and scrolling
+// the page does not depend on the size of the calltree.
+
+var VirtualCalltree = {
+  rowHeight: 24,
+  overscan: 30,
+  nodeCount: 0,
+  subtreeEnd: null,
+  parent: null,
+  collapsed: null,
+  visible: null,
+  visibleCount: 0,
+  container: null,
+  blockerInfos: {},
+  highlighted: -1
+};
+
+$( document ).ready(function() {
+  var ct = VirtualCalltree;
+  var columns = calltree_data.columns;
+  ct.nodeCount = columns.depth.length;
+  ct.container = document.getElementsByClassName("virtual-calltree")[0];
+  ct.container.style.position = "relative";
+  if(typeof fuzz_blocker_infos !== "undefined") {
+    ct.blockerInfos = JSON.parse(fuzz_blocker_infos);
+  }
+
+  computeTreeStructure();
+  ct.collapsed = new Uint8Array(ct.nodeCount);
+  ct.visible = new Int32Array(ct.nodeCount);
+  updateVisibleNodes();
+
+  createVirtualNavBar();
+  addImageOverview();
+
+  window.addEventListener("scroll", renderVisibleRows);
+  window.addEventListener("resize", renderVisibleRows);
+  ct.container.addEventListener("click", function(e) {
+    var line = e.target.closest(".coverage-line-inner");
+    if(line===null || e.target.closest("a")!==null) {
+      return;
+    }
+    toggleNode(parseInt(line.getAttribute("data-node")));
+  });
+
+  // if "scrollToNode" was passed to the URL, scroll:
+  const urlParams = new URLSearchParams(window.location.search);
+  const scrollToNode = urlParams.get('scrollToNode');
+  if(scrollToNode!==null) {
+    scrollToNodeInCT(scrollToNode);
+  }
+});
+
+// Computes the parent and the end of the subtree of each node from the
+// node depths, which are in pre-order.
+function computeTreeStructure() {
+  var ct = VirtualCalltree;
+  var depth = calltree_data.columns.depth;
+  ct.subtreeEnd = new Int32Array(ct.nodeCount);
+  ct.parent = new Int32Array(ct.nodeCount);
+  var stack = [];
+  for(var i=0;i<ct.nodeCount;i++) {
+    while(stack.length>0 && depth[stack[stack.length-1]]>=depth[i]) {
+      ct.subtreeEnd[stack.pop()] = i;
+    }
+    ct.parent[i] = stack.length>0 ? stack[stack.length-1] : -1;
+    stack.push(i);
+  }
+  while(stack.length>0) {
+    ct.subtreeEnd[stack.pop()] = ct.nodeCount;
+  }
+}
+
+// Lists the nodes that are not inside a collapsed subtree.
+function updateVisibleNodes() {
+  var ct = VirtualCalltree;
+  var count = 0;
+  var i = 0;
+  while(i<ct.nodeCount) {
+    ct.visible[count++] = i;
+    i = ct.collapsed[i] ? ct.subtreeEnd[i] : i+1;
+  }
+  ct.visibleCount = count;
+  ct.container.style.height = (count*ct.rowHeight)+"px";
+  renderVisibleRows();
+}
+
+function padNodeIdx(idx) {
+  var idxStr = String(idx);
+  while(idxStr.length<calltree_data.idx_width) {
+    idxStr = "0"+idxStr;
+  }
+  return idxStr;
+}
+
+function createLink(href, text) {
+  let link = document.createElement("a");
+  link.href = href;
+  link.innerText = text;
+  return link;
+}
+
+function createRow(nodeIdx, position) {
+  var ct = VirtualCalltree;
+  var columns = calltree_data.columns;
+  var strings = calltree_data.strings;
+  var depth = columns.depth[nodeIdx];
+  var indentation = (depth*16+100)+"px";
+  var idxStr = padNodeIdx(nodeIdx);
+
+  let row = document.createElement("div");
+  row.className = strings[columns.color[nodeIdx]]+"-background coverage-line";
+  row.style.position = "absolute";
+  row.style.left = "0";
+  row.style.right = "0";
+  row.style.top = (position*ct.rowHeight)+"px";
+
+  let inner = document.createElement("span");
+  inner.className = "coverage-line-inner";
+  inner.setAttribute("data-node", nodeIdx);
+  inner.setAttribute("data-calltree-idx", idxStr);
+  inner.style.paddingLeft = indentation;
+  if(ct.subtreeEnd[nodeIdx]>nodeIdx+1) {
+    inner.classList.add(ct.collapsed[nodeIdx] ? "expand-symbol" : "collapse-symbol");
+  }
+  if(nodeIdx===ct.highlighted) {
+    inner.style.background = "#ffe08c";
+  }
+
+  let depthWrapper = document.createElement("span");
+  depthWrapper.className = "node-depth-wrapper";
+  depthWrapper.innerText = depth;
+  inner.append(depthWrapper);
+
+  let code = document.createElement("code");
+  code.className = "language-clike";
+  code.innerText = strings[columns.name[nodeIdx]];
+  inner.append(code);
+
+  let filename = document.createElement("span");
+  filename.className = "coverage-line-filename";
+  if(columns.link[nodeIdx]!==-1) {
+    filename.append(createLink(strings[columns.link[nodeIdx]], "[function]"));
+    filename.append(" ");
+  }
+  filename.append(createLink(strings[columns.callsite_link[nodeIdx]], "[call site2]"));
+  let idxSpan = document.createElement("span");
+  idxSpan.className = "calltree-idx";
+  idxSpan.innerText = idxStr;
+  filename.append(idxSpan);
+  inner.append(filename);
+
+  if(idxStr in ct.blockerInfos) {
+    inner.classList.add("with-fuzz-blocker-line");
+    let infoBtn = createLink(ct.blockerInfos[idxStr], "FUZZ BLOCKER");
+    infoBtn.classList.add("fuzz-blocker-info-btn");
+    inner.append(infoBtn);
+  }
+
+  row.append(inner);
+  return row;
+}
+
+// Adds the rows in view to the page, and removes all other rows.
+function renderVisibleRows() {
+  var ct = VirtualCalltree;
+  var containerTop = ct.container.getBoundingClientRect().top;
+  var first = Math.floor(-containerTop/ct.rowHeight)-ct.overscan;
+  var last = Math.ceil((window.innerHeight-containerTop)/ct.rowHeight)+ct.overscan;
+  first = Math.max(0, first);
+  last = Math.min(ct.visibleCount, last);
+
+  var fragment = document.createDocumentFragment();
+  for(var position=first;position<last;position++) {
+    fragment.append(createRow(ct.visible[position], position));
+  }
+  ct.container.replaceChildren(fragment);
+
+  // Use the height of the rendered rows for positioning
+  var firstRow = ct.container.firstElementChild;
+  if(firstRow!==null && firstRow.offsetHeight>0 && firstRow.offsetHeight!==ct.rowHeight) {
+    ct.rowHeight = firstRow.offsetHeight;
+    ct.container.style.height = (ct.visibleCount*ct.rowHeight)+"px";
+    renderVisibleRows();
+  }
+}
+
+function toggleNode(nodeIdx) {
+  var ct = VirtualCalltree;
+  if(ct.subtreeEnd[nodeIdx]<=nodeIdx+1) {
+    return;
+  }
+  ct.collapsed[nodeIdx] = ct.collapsed[nodeIdx] ? 0 : 1;
+  updateVisibleNodes();
+}
+
+function setAllCollapsed(value) {
+  var ct = VirtualCalltree;
+  // The root stays open so the first level of the calltree is shown
+  ct.collapsed.fill(value);
+  ct.collapsed[0] = 0;
+  updateVisibleNodes();
+}
+
+// Scrolls to a node, opening the subtrees it is in
+function scrollToNodeInCT(nodeId) {
+  var ct = VirtualCalltree;
+  var nodeIdx = parseInt(nodeId, 10);
+  if(isNaN(nodeIdx) || nodeIdx<0 || nodeIdx>=ct.nodeCount) {
+    return;
+  }
+  for(var p=ct.parent[nodeIdx];p!==-1;p=ct.parent[p]) {
+    ct.collapsed[p] = 0;
+  }
+  ct.highlighted = nodeIdx;
+  updateVisibleNodes();
+
+  var position = 0;
+  while(ct.visible[position]!==nodeIdx) {
+    position++;
+  }
+  var containerTop = ct.container.getBoundingClientRect().top+window.scrollY;
+  window.scrollTo({
+    top: containerTop+position*ct.rowHeight-window.innerHeight/2,
+    behavior: "smooth"
+  });
+}
+
+function createVirtualNavBar() {
+  let e = document.createElement("div");
+  e.classList.add("calltree-navbar");
+
+  let backBtn = document.createElement("a");
+  backBtn.style.marginRight = "10px";
+  backBtn.style.textDecoration = "none";
+  backBtn.href = "fuzz_report.html";
+  let backBtnInner = document.createElement("span");
+  backBtnInner.classList.add("calltree-nav-btn");
+  backBtnInner.innerText = "< Back to report";
+  backBtn.append(backBtnInner);
+  e.append(backBtn);
+
+  let expandBtn = document.createElement("span");
+  expandBtn.classList.add("calltree-nav-btn");
+  expandBtn.innerText = "Expand all";
+  expandBtn.addEventListener("click", function() { setAllCollapsed(0); });
+  e.append(expandBtn);
+
+  let collapseBtn = document.createElement("span");
+  collapseBtn.classList.add("calltree-nav-btn");
+  collapseBtn.innerText = "Collapse all";
+  collapseBtn.addEventListener("click", function() { setAllCollapsed(1); });
+  e.append(collapseBtn);
+
+  document.getElementsByClassName("content-wrapper")[0].prepend(e);
+}
+
+function addImageOverview() {
+  let img = document.createElement("img");
+  let imageName = document.getElementsByClassName("top-navbar-title")[0].innerText.split("Fuzz introspector: ")[1];
+  img.src = imageName.replace(/[^a-z0-9áéíóúñü \.,_-]/gim,"").trim()+"_colormap.png";
+  img.style.width = "70vh";
+  img.style.position = "sticky";
+  img.style.top = "40vh";
+  document.getElementById("side-overview-wrapper").prepend(img);
+}
@@ -66,7 +66,7 @@ function createTables() {
   $.each(tableIds, function(index, value) {
     createTable(value);
   });
-  populateTableData();
+  observeTableData();
 }
 
 function createTable(value) {
@@ -127,21 +127,7 @@ function createTable(value) {
   tableConfig.order = [[sortByColumn, sortOrder]]
 
   if(value==="fuzzers_overview_table" || value==="all_functions_overview_table") {
-    tableConfig.columns = [
-      {data: "Func name"},
-      {data: "Functions filename"},
-      {data: "Args"},
-      {data: "Function call depth"},
-      {data: "Reached by Fuzzers"},
-      {data: "Fuzzers runtime hit"},
-      {data: "Func lines hit %"},
-      {data: "I Count"},
-      {data: "BB Count"},
-      {data: "Cyclomatic complexity"},
-      {data: "Functions reached"},
-      {data: "Reached by functions"},
-      {data: "Accumulated cyclomatic complexity"},
-      {data: "Undiscovered complexity"}]
+    tableConfig.columns = getAllFunctionsColumns(value);
       tableConfig.columnDefs = [
         // By default hide the columns:
         // "Args",
@@ -151,65 +137,154 @@ function createTable(value) {
         // "BB Count"
         {targets: [2, 3, 5, 7, 8], visible: false}
       ]
+  } else if($('#'+value).data('shards')!==undefined) {
+    // Fuzzer function hit tables. The columns are named by the headers
+    tableConfig.columns = $('#'+value+' thead th').map(function() {
+      return {data: $(this).text()};
+    }).get();
   }
 
-  // Fuzzer function hit tables
-  if(value in fuzzer_table_data) {
-    tableConfig.columns = [
-      {data: "Function name"},
-      {data: "source code lines"},
-      {data: "source lines hit"},
-      {data: "percentage hit"}
-    ]
-  }
-  
   // Create the table:
   var table = $('#'+value).dataTable(tableConfig);
 }
 
-function populateTableData() {
-  populateFuzzersOverviewTable("fuzzers_overview_table");
-  populateFuzzersOverviewTable("all_functions_overview_table");
-  populateFunctionsHitTable();
+function getAllFunctionsColumns(tableId) {
+  return [
+    {data: "Func name", render: function(data, type, row) {
+      if(type!=="display") {
+        return data;
+      }
+      var funcUrl = coverageUrl+row["Functions filename"]+".html#L"+row["Func linenumber"];
+      return `<a href='${funcUrl}'><code class='language-clike'>${escapeHtml(data)}</code></a>`;
+    }},
+    {data: "Functions filename"},
+    {data: "Args", render: function(data, type, row) {
+      if(type!=="display" || data===0) {
+        return data;
+      }
+      return createCollapsible(data, row["Arg types"], tableId+"_args_"+row.rowIdx);
+    }},
+    {data: "Function call depth"},
+    {data: "Reached by Fuzzers", render: function(data, type, row) {
+      if(type!=="display" || data===0) {
+        return data;
+      }
+      return createCollapsible(data, row["Fuzzers reaching"], tableId+"_fuzzers_"+row.rowIdx);
+    }},
+    {data: "Fuzzers runtime hit"},
+    {data: "Func lines hit %", render: function(data, type, row) {
+      if(type!=="display") {
+        return parseFloat(data);
+      }
+      return getPercentageWrapper(data);
+    }},
+    {data: "I Count"},
+    {data: "BB Count"},
+    {data: "Cyclomatic complexity"},
+    {data: "Functions reached"},
+    {data: "Reached by functions"},
+    {data: "Accumulated cyclomatic complexity"},
+    {data: "Undiscovered complexity"}]
+}
+
+function escapeHtml(text) {
+  return String(text).replace(/&/g, "&amp;").replace(/</g, "&lt;")
+                     .replace(/>/g, "&gt;").replace(/'/g, "&#39;");
+}
+
+function createCollapsible(nonCollapsed, collapsed, collapsibleId) {
+  return `${nonCollapsed} : <div class='wrap-collabsible'>
+    <input id='${collapsibleId}' class='toggle' type='checkbox'>
+    <label for='${collapsibleId}' class='lbl-toggle'>View List</label>
+    <div class='collapsible-content'>
+      <div class='content-inner'><p>${escapeHtml(collapsed)}</p></div>
+    </div>
+  </div>`;
+}
+
+// The rows of tables with a "data-shards" attribute are in data files, see
+// table_data.py. The files of a table are loaded once the table is shown,
+// with script tags, which also works for reports opened from the file system.
+var tableDataLoading = {};
+
+function observeTableData() {
+  var dataTables = $('table[data-shards]').toArray();
+  if(!('IntersectionObserver' in window)) {
+    dataTables.forEach(function(table) { loadTableData(table.id); });
+    return;
+  }
+  var observer = new IntersectionObserver(function(entries) {
+    entries.forEach(function(entry) {
+      if(entry.isIntersecting) {
+        observer.unobserve(entry.target);
+        loadTableData(entry.target.id);
+      }
+    });
+  }, {rootMargin: "500px"});
+  dataTables.forEach(function(table) { observer.observe(table); });
 }
 
-function populateFunctionsHitTable() {
-  // Add rows for "Functions hit" table for each fuzzer
-  for (const [key, value] of Object.entries(fuzzer_table_data)) {
-    var table = $('#'+key).DataTable();
-    table.rows.add(fuzzer_table_data[key]);
+function loadTableData(tableId) {
+  if(tableId in tableDataLoading) {
+    return;
   }
-  table.draw();
+  tableDataLoading[tableId] = {
+    shardCount: parseInt($('#'+tableId).data('shards')),
+    rowCount: 0
+  };
+  loadTableDataShard(tableId, 0);
+}
+
+function loadTableDataShard(tableId, shardIdx) {
+  if(shardIdx>=tableDataLoading[tableId].shardCount) {
+    return;
+  }
+  let script = document.createElement("script");
+  script.src = "table_data/"+tableId+"_"+shardIdx+".js";
+  script.onload = function() {
+    script.remove();
+    loadTableDataShard(tableId, shardIdx+1);
+  };
+  script.onerror = function() {
+    console.log("Could not load table data: "+script.src);
+  };
+  document.body.append(script);
+}
+
+// Called by the table data files
+function addTableDataShard(tableId, shardIdx, shard) {
+  var loading = tableDataLoading[tableId];
+  var rows = decodeTableDataShard(shard, loading.rowCount);
+  loading.rowCount += rows.length;
+  $('#'+tableId).DataTable().rows.add(rows).draw(false);
 }
-function populateFuzzersOverviewTable(value) {
-  console.log(value)
-  var table = $('#'+value).DataTable();
-  var dataSet;
-  var dataWithMarkup;
-  dataWithMarkup = [];
-
-  if(value==="fuzzers_overview_table") {
-    for(var i=0;i<all_functions_table_data.length;i++) {
-      dataWithMarkup.push(all_functions_table_data[i]);
-
-      // Add styling to percentages
-      var wrapper = getPercentageWrapper(dataWithMarkup[i]["Func lines hit %"]);
-      dataWithMarkup[i]["Func lines hit %"] = wrapper;
-    }
-    dataSet = all_functions_table_data;
 
-  }else if(value==="all_functions_overview_table") {
-    for(var i=0;i<analysis_1_data.length;i++) {
-      dataWithMarkup.push(analysis_1_data[i]);
+// Creates the rows of a table data shard. Numeric columns are read into
+// typed arrays and text columns are indices into the strings of the shard.
+function decodeTableDataShard(shard, firstRowIdx) {
+  var columns = [];
+  for(const [name, column] of Object.entries(shard.columns)) {
+    var values;
+    if(column.type==="int") {
+      values = Int32Array.from(column.values);
+    } else if(column.type==="float") {
+      values = Float64Array.from(column.values);
+    } else {
+      values = column.values;
+    }
+    columns.push({name: name, values: values, isText: column.type==="str"});
+  }
 
-      // Add styling to percentages
-      var wrapper = getPercentageWrapper(dataWithMarkup[i]["Func lines hit %"]);
-      dataWithMarkup[i]["Func lines hit %"] = wrapper;
+  var rows = new Array(shard.row_count);
+  for(var i=0;i<shard.row_count;i++) {
+    var row = {rowIdx: firstRowIdx+i};
+    for(var j=0;j<columns.length;j++) {
+      var column = columns[j];
+      row[column.name] = column.isText ? shard.strings[column.values[i]] : column.values[i];
     }
-    dataSet = dataWithMarkup;
+    rows[i] = row;
   }
-  table.rows.add(dataSet);
-  table.draw();  
+  return rows;
 }
 
 function getPercentageWrapper(val) {
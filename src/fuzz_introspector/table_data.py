@@ -0,0 +1,156 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Module for writing the data of the tables in the HTML report.
+
+The rows of a table are written to shards of `constants.TABLE_DATA_SHARD_SIZE`
+rows in `constants.TABLE_DATA_DIR`, named `<table id>_<shard index>.js`.
+Each shard calls `addTableDataShard` in custom.js with the columns of its rows:
+
+    {"row_count": 2,
+     "strings": ["main", "/src/a.c"],
+     "columns": {"Func name": {"type": "str", "values": [0, 0]},
+                 "Functions filename": {"type": "str", "values": [1, 1]},
+                 "I Count": {"type": "int", "values": [20, 3]}}}
+
+Text is dictionary-encoded: each distinct string is stored once in the
+shard and text columns hold indices into these strings. The page turns
+numeric columns into typed arrays and loads the shards of a table once it
+is shown, so the report does not parse the data of all tables on load.
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+)
+
+from fuzz_introspector import constants
+
+logger = logging.getLogger(name=__name__)
+
+# Integer columns are read into 32-bit arrays by the page
+INT_COLUMN_MIN = -2**31
+INT_COLUMN_MAX = 2**31 - 1
+
+
+def get_shard_count(row_count: int, shard_size: int = constants.TABLE_DATA_SHARD_SIZE) -> int:
+    return (row_count + shard_size - 1) // shard_size
+
+
+def get_shard_filename(table_id: str, shard_idx: int) -> str:
+    return os.path.join(constants.TABLE_DATA_DIR, f"{table_id}_{shard_idx}.js")
+
+
+def get_column_type(values: List[Any]) -> str:
+    """Returns the type a column is encoded as: "int" or "float" if all
+    values are numbers, and "str" otherwise."""
+    if all(type(value) is int and INT_COLUMN_MIN <= value <= INT_COLUMN_MAX
+           for value in values):
+        return "int"
+    if all(type(value) in (int, float) for value in values):
+        return "float"
+    return "str"
+
+
+def encode_columns(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encodes rows to columns, with the strings of all text columns
+    stored once. All rows must have the keys of the first row."""
+    strings: List[str] = []
+    string_indices: Dict[str, int] = dict()
+    columns: Dict[str, Dict[str, Any]] = dict()
+    column_names = list(rows[0].keys()) if len(rows) > 0 else []
+    for column_name in column_names:
+        values = [row[column_name] for row in rows]
+        column_type = get_column_type(values)
+        if column_type == "str":
+            encoded_values = []
+            for value in values:
+                value = str(value)
+                if value not in string_indices:
+                    string_indices[value] = len(strings)
+                    strings.append(value)
+                encoded_values.append(string_indices[value])
+            values = encoded_values
+        columns[column_name] = {"type": column_type, "values": values}
+
+    return {
+        "row_count": len(rows),
+        "strings": strings,
+        "columns": columns
+    }
+
+
+def write_table_data(
+    table_id: str,
+    rows: List[Dict[str, Any]],
+    shard_size: int = constants.TABLE_DATA_SHARD_SIZE
+) -> int:
+    """Writes the rows of a table to shard files and returns the number of
+    shards. The shard count is given to the page by the `data-shards`
+    attribute of the table, see `html_helpers.html_create_table_head`."""
+    os.makedirs(constants.TABLE_DATA_DIR, exist_ok=True)
+    shard_count = get_shard_count(len(rows), shard_size)
+    for shard_idx in range(shard_count):
+        shard_rows = rows[shard_idx * shard_size:(shard_idx + 1) * shard_size]
+        with open(get_shard_filename(table_id, shard_idx), "w") as shard_file:
+            shard_file.write(f"addTableDataShard({json.dumps(table_id)}, {shard_idx}, ")
+            json.dump(encode_columns(shard_rows), shard_file, separators=(",", ":"))
+            shard_file.write(");\n")
+    return shard_count
+
+
+def remove_table_data(keep_files: Iterable[str] = ()) -> None:
+    """Removes the table data of an earlier report, except for the shards in
+    `keep_files` and their compressed copies"""
+    if not os.path.isdir(constants.TABLE_DATA_DIR):
+        return
+    kept_files = set(keep_files)
+    if len(kept_files) == 0:
+        shutil.rmtree(constants.TABLE_DATA_DIR)
+        return
+    for filename in os.listdir(constants.TABLE_DATA_DIR):
+        path = os.path.join(constants.TABLE_DATA_DIR, filename)
+        if path in kept_files or (path.endswith(".gz") and path[:-len(".gz")] in kept_files):
+            continue
+        os.remove(path)
+
+
+def compress_table_data() -> None:
+    """Writes a gzip compressed copy next to each shard, for web servers that
+    serve pre-compressed files. The uncompressed shards are kept, since pages
+    opened from the file system can not load compressed scripts. Copies
+    newer than their shard are kept."""
+    if not os.path.isdir(constants.TABLE_DATA_DIR):
+        return
+    for filename in sorted(os.listdir(constants.TABLE_DATA_DIR)):
+        if not filename.endswith(".js"):
+            continue
+        shard_path = os.path.join(constants.TABLE_DATA_DIR, filename)
+        gz_path = f"{shard_path}.gz"
+        if (os.path.isfile(gz_path)
+                and os.stat(gz_path).st_mtime_ns >= os.stat(shard_path).st_mtime_ns):
+            continue
+        with open(shard_path, "rb") as shard_file:
+            shard_data = shard_file.read()
+        with open(gz_path, "wb") as gz_file:
+            # No timestamp, so that identical data gives identical files
+            gz_file.write(gzip.compress(shard_data, mtime=0))
+    logger.info("Compressed table data")
@@ -13,21 +13,32 @@
 # limitations under the License.
 """ Utility functions """
 
+import copy
 import cxxfilt
 import logging
 import json
 import os
 import re
+import struct
 import yaml
+import zlib
+
+import numpy as np
 
 from typing import (
     Any,
     List,
     Dict,
+    FrozenSet,
+    Iterable,
     Optional,
+    Pattern,
+    Set,
+    Tuple,
 )
 
 from fuzz_introspector import constants
+from fuzz_introspector.exceptions import DataLoaderError
 
 logger = logging.getLogger(name=__name__)
 
@@ -139,19 +150,50 @@ def scan_executables_for_fuzz_introspector_logs(
     return executable_to_fuzz_reports
 
 
-def approximate_python_coverage_files(src1: str, src2: str) -> bool:
-    logger.info(f"Approximating {src1} to {src2}")
-    # Remove prefixed .....
-    src1 = src1.lstrip(".")
-
-    # Generate list of potential candidates
+def get_python_module_file_candidates(module_name: str) -> List[str]:
+    """Returns the source files a dotted python name may live in, from the
+    shortest to the longest. For example "a.b.c" gives
+    ["a.py", "a/b.py", "a/b/c.py"].
+    """
     possible_candidates = []
-    splits = src1.split(".")
     curr_str = ""
-    for s2 in splits:
+    for s2 in module_name.split("."):
         curr_str = curr_str + s2
         possible_candidates.append(curr_str + ".py")
         curr_str = curr_str + "/"
+    return possible_candidates
+
+
+class PathSuffixIndex:
+    """Index for finding the paths that end with a given path suffix.
+
+    Each path is indexed by every suffix that starts at a path separator,
+    e.g. "/src/a/b.py" by "b.py", "a/b.py", "src/a/b.py" and "/src/a/b.py".
+    If several paths share a suffix the path added last is returned.
+    """
+    def __init__(self, paths: Iterable[str]) -> None:
+        self._suffixes: Dict[str, str] = dict()
+        for path in paths:
+            self.add(path)
+
+    def add(self, path: str) -> None:
+        self._suffixes[path] = path
+        idx = path.find("/")
+        while idx != -1:
+            self._suffixes[path[idx + 1:]] = path
+            idx = path.find("/", idx + 1)
+
+    def lookup(self, suffix: str) -> Optional[str]:
+        return self._suffixes.get(suffix)
+
+
+def approximate_python_coverage_files(src1: str, src2: str) -> bool:
+    logger.debug(f"Approximating {src1} to {src2}")
+    # Remove prefixed .....
+    src1 = src1.lstrip(".")
+
+    # Generate list of potential candidates
+    possible_candidates = get_python_module_file_candidates(src1)
 
     # Start from backwards to find te longest possible candidate
     target = None
@@ -165,32 +207,146 @@ def approximate_python_coverage_files(src1: str, src2: str) -> bool:
             break
 
     if target is not None:
-        logger.info(f"Found target {target}")
+        logger.debug(f"Found target {target}")
         return True
     else:
-        logger.info("Found no target")
+        logger.debug("Found no target")
         return False
 
 
-def write_to_summary_file(fuzzer: str, key: str, value: Any) -> None:
-    """Writes a key value pair to summary file, for a given fuzzer
-    key. If the fuzzer does not exist as top key in the summary file
-    then it is created"""
+class JsonReportFile:
+    """In-memory content of a json file written by the report.
 
-    if not os.path.isfile(constants.SUMMARY_FILE):
-        json_data = dict()
-    else:
-        json_fd = open(constants.SUMMARY_FILE)
-        json_data = json.load(json_fd)
-        json_fd.close()
+    Values are buffered by `set_value` and the file is written once, by
+    `flush`. Keys already in an existing file are kept unless overwritten,
+    as if each value had been written to the file directly.
+    """
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self._values: Dict[Tuple[str, ...], Any] = dict()
+
+    def set_value(self, keys: Tuple[str, ...], value: Any) -> None:
+        """Sets the value at the path of nested keys in the json data"""
+        # Keep the order of writes, as with writing the file directly
+        self._values.pop(keys, None)
+        self._values[keys] = value
+
+    def flush(self) -> None:
+        """Writes the buffered values to the file. The file is replaced
+        atomically so readers never see a partially written file.
+        """
+        if len(self._values) == 0:
+            return
+        if os.path.isfile(self.filename):
+            with open(self.filename) as json_fd:
+                json_data = json.load(json_fd)
+        else:
+            json_data = dict()
+
+        for keys, value in self._values.items():
+            json_dict = json_data
+            for key in keys[:-1]:
+                json_dict = json_dict.setdefault(key, dict())
+            json_dict[keys[-1]] = value
 
-    if fuzzer not in json_data:
-        json_data[fuzzer] = dict()
+        tmp_filename = f"{self.filename}.tmp"
+        with open(tmp_filename, 'w') as json_file:
+            json.dump(json_data, json_file)
+        os.replace(tmp_filename, self.filename)
+        self._values = dict()
 
-    json_data[fuzzer][key] = value
+    def pop_values(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        """Returns the buffered values in the order they were set, and
+        removes them from the buffer without writing them."""
+        values = list(self._values.items())
+        self._values = dict()
+        return values
 
-    with open(constants.SUMMARY_FILE, 'w') as json_file:
-        json.dump(json_data, json_file)
+
+_json_report_files: Dict[str, JsonReportFile] = dict()
+
+
+def get_json_report_file(filename: str) -> JsonReportFile:
+    """Returns the buffered json file with the given name"""
+    if filename not in _json_report_files:
+        _json_report_files[filename] = JsonReportFile(filename)
+    return _json_report_files[filename]
+
+
+def get_json_report_filenames() -> List[str]:
+    """Returns the names of the json files values were buffered for"""
+    return list(_json_report_files)
+
+
+def flush_json_report_files() -> None:
+    """Writes all buffered json files to disk. Buffered values are only
+    written by this, which report runs call once they are done."""
+    for json_report_file in _json_report_files.values():
+        json_report_file.flush()
+
+
+def pop_json_report_values() -> List[Tuple[str, Tuple[str, ...], Any]]:
+    """Returns the values buffered for all json files as (filename, keys,
+    value) tuples, and removes them from the buffers. This is used to move
+    buffered values from a worker process to the process writing the files,
+    see `set_json_report_values`."""
+    values = []
+    for filename, json_report_file in _json_report_files.items():
+        for keys, value in json_report_file.pop_values():
+            values.append((filename, keys, value))
+    return values
+
+
+def set_json_report_values(values: List[Tuple[str, Tuple[str, ...], Any]]) -> None:
+    """Buffers values returned by `pop_json_report_values`"""
+    for filename, keys, value in values:
+        get_json_report_file(filename).set_value(keys, value)
+
+
+def write_to_summary_file(fuzzer: str, key: str, value: Any) -> None:
+    """Writes a key value pair to summary file, for a given fuzzer
+    key. If the fuzzer does not exist as top key in the summary file
+    then it is created. The summary file is written by
+    `flush_json_report_files`."""
+    get_json_report_file(constants.SUMMARY_FILE).set_value((fuzzer, key), value)
+
+
+def append_to_json_lines_file(filename: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Appends records to a JSON lines file, one json object per line.
+    Returns the number of records written."""
+    record_count = 0
+    with open(filename, 'a') as jsonl_file:
+        for record in records:
+            jsonl_file.write(json.dumps(record))
+            jsonl_file.write("\n")
+            record_count += 1
+    return record_count
+
+
+def write_png(filename: str, pixels: np.ndarray) -> None:
+    """Writes an RGB image, given as a height x width x 3 array of uint8, to
+    a PNG file."""
+    height, width, _ = pixels.shape
+    # Each row of the image data starts with the filter type, 0 is none
+    scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = pixels.reshape(height, width * 3)
+
+    def png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + chunk_type
+            + data
+            + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff)
+        )
+
+    with open(filename, "wb") as png_file:
+        png_file.write(b"\x89PNG\r\n\x1a\n")
+        png_file.write(png_chunk(
+            b"IHDR",
+            struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+        ))
+        png_file.write(png_chunk(b"IDAT", zlib.compress(scanlines.tobytes())))
+        png_file.write(png_chunk(b"IEND", b""))
 
 
 def get_target_coverage_url(
@@ -216,14 +372,128 @@ def get_target_coverage_url(
         return coverage_url
 
 
-def load_func_names(input_list: List[str]) -> List[str]:
+class ExclusionConfig:
+    """Functions and source files to exclude from the analysis.
+
+    The regexes of each kind are compiled into a single pattern, which is
+    searched for in function names and source file paths respectively. A
+    config is not changed once it is created. The names of functions excluded
+    because of their source file are only known from the functions of a
+    fuzzer, see `split_function_elems`, and are excluded by name in the copy
+    of the config returned by `with_excluded_function_names`.
+
+    The config can also set the `sinks` reported by the function call
+    analysis, which are None if the config does not set them.
+    """
+    def __init__(
+        self,
+        funcs_to_avoid: List[str],
+        files_to_avoid: List[str],
+        sinks: Optional[List[str]] = None
+    ) -> None:
+        self._funcs_regex = self._compile(funcs_to_avoid)
+        self._files_regex = self._compile(files_to_avoid)
+        self._excluded_function_names: FrozenSet[str] = frozenset()
+        self.sinks = sinks
+
+    @staticmethod
+    def _compile(regexes: List[str]) -> Optional[Pattern[str]]:
+        if len(regexes) == 0:
+            return None
+        try:
+            return re.compile("|".join(f"(?:{regex})" for regex in regexes))
+        except re.error as e:
+            raise DataLoaderError(f"Invalid regex in exclusion config: {e}")
+
+    @classmethod
+    def from_file(cls, filename: str) -> 'ExclusionConfig':
+        """Reads a config file with `FUNCS_TO_AVOID`, `FILES_TO_AVOID` and
+        `SINKS` sections, each followed by one regex per line.
+        """
+        regexes: Dict[str, List[str]] = {
+            "FUNCS_TO_AVOID": [],
+            "FILES_TO_AVOID": [],
+            "SINKS": []
+        }
+        sections = set()
+        section = None
+        try:
+            with open(filename, "r") as config_file:
+                for line in config_file:
+                    line = line.strip()
+                    if line == "":
+                        continue
+                    if line in regexes:
+                        section = line
+                        sections.add(section)
+                    elif section is not None:
+                        regexes[section].append(line)
+        except (OSError, UnicodeDecodeError) as e:
+            raise DataLoaderError(f"Could not read exclusion config {filename}: {e}")
+        logger.info(
+            f"Loaded exclusion config {filename}: "
+            f"{len(regexes['FUNCS_TO_AVOID'])} function regexes, "
+            f"{len(regexes['FILES_TO_AVOID'])} file regexes"
+        )
+        return cls(
+            regexes["FUNCS_TO_AVOID"],
+            regexes["FILES_TO_AVOID"],
+            regexes["SINKS"] if "SINKS" in sections else None
+        )
+
+    def get_patterns(self) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the combined function and file regexes of the config"""
+        return (
+            self._funcs_regex.pattern if self._funcs_regex is not None else None,
+            self._files_regex.pattern if self._files_regex is not None else None
+        )
+
+    def is_function_excluded(self, function_name: str) -> bool:
+        if function_name in self._excluded_function_names:
+            return True
+        return self._funcs_regex is not None and self._funcs_regex.search(function_name) is not None
+
+    def is_file_excluded(self, source_file: str) -> bool:
+        return self._files_regex is not None and self._files_regex.search(source_file) is not None
+
+    def with_excluded_function_names(self, function_names: Iterable[str]) -> 'ExclusionConfig':
+        """Returns a copy of the config that also excludes `function_names`"""
+        config = copy.copy(self)
+        config._excluded_function_names = self._excluded_function_names.union(function_names)
+        return config
+
+    def split_function_elems(
+        self,
+        elems: List[Dict[Any, Any]]
+    ) -> Tuple[List[Dict[Any, Any]], Set[str]]:
+        """Returns the function elements of a frontend yaml file that are not
+        excluded, and the names of the excluded ones.
+        """
+        kept = []
+        excluded_names = set()
+        for elem in elems:
+            if (self.is_function_excluded(elem['functionName'])
+                    or self.is_file_excluded(elem['functionSourceFile'])):
+                excluded_names.add(elem['functionName'])
+                continue
+            kept.append(elem)
+        return kept, excluded_names
+
+
+def load_func_names(
+    input_list: List[str],
+    exclusion_config: Optional[ExclusionConfig] = None
+) -> List[str]:
     """
     Takes a list of function names (typically from llvm profile)
-    and makes sure the output names are demangled.
+    and makes sure the output names are demangled. Names excluded by
+    `exclusion_config` are dropped.
     """
     loaded = []
     for reached in input_list:
         if constants.BLOCKLISTED_FUNCTION_NAMES.match(reached):
             continue
+        if exclusion_config is not None and exclusion_config.is_function_excluded(reached):
+            continue
         loaded.append(demangle_cpp_func(reached))
     return loaded
@@ -84,6 +84,80 @@ def get_cmdline_parser() -> argparse.ArgumentParser:
         default="c-cpp",
         help="Language of project"
     )
+    report_parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory for caching parsed data and report sections between "
+             "report runs, so reruns only redo work whose inputs changed"
+    )
+    report_parser.add_argument(
+        "--load_branch_profiles",
+        action='store_true',
+        default=False,
+        help="Load branch profiles from standalone branchProfile yaml files"
+    )
+    report_parser.add_argument(
+        "--exclusion_config",
+        type=str,
+        default=None,
+        help="""
+            Config file with functions and files to exclude from the analysis,
+            and the sinks of the function call analysis
+        """
+    )
+    report_parser.add_argument(
+        "--branch_blockers_jsonl",
+        action='store_true',
+        default=False,
+        help="Write branch blockers to a JSON lines file instead of the summary file"
+    )
+    report_parser.add_argument(
+        "--no_pretty_html",
+        action='store_true',
+        default=False,
+        help="Write the HTML files without indentation"
+    )
+    report_parser.add_argument(
+        "--virtual_calltree_threshold",
+        type=int,
+        default=constants.VIRTUAL_CALLTREE_THRESHOLD,
+        help="""
+            Calltrees with more nodes than this are rendered in the browser from
+            a compact data file. Use 0 to always do this and -1 to never do it
+        """
+    )
+    report_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes creating the fuzzer sections of the report. 0 uses all CPUs"
+    )
+    report_parser.add_argument(
+        "--compress_table_data",
+        action='store_true',
+        default=False,
+        help="Also write gzip compressed table data files, for servers of pre-compressed files"
+    )
+    report_parser.add_argument(
+        "--matplotlib_calltree_images",
+        action='store_true',
+        default=False,
+        help="""
+            Draw the calltree overview images with matplotlib, which adds a title and
+            axis labels. matplotlib is not a dependency and has to be installed separately
+        """
+    )
+    report_parser.add_argument(
+        "--output-format",
+        type=str,
+        choices=constants.REPORT_OUTPUT_FORMATS,
+        default="html",
+        help="""
+            Format of the report. The json format writes the data of the report to
+            a single json file, without HTML pages and images
+        """
+    )
 
     # Command for correlating binary files to fuzzerLog files
     correlate_parser = subparsers.add_parser(
@@ -127,7 +201,17 @@ def main() -> int:
             args.correlation_file,
             args.enable_all_analyses,
             args.name,
-            args.language
+            args.language,
+            args.cache_dir,
+            args.load_branch_profiles,
+            args.exclusion_config,
+            args.branch_blockers_jsonl,
+            not args.no_pretty_html,
+            args.virtual_calltree_threshold,
+            args.jobs,
+            args.compress_table_data,
+            args.output_format,
+            args.matplotlib_calltree_images
         )
         logger.info("Ending fuzz introspector report generation")
     elif args.command == 'correlate':
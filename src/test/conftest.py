@@ -0,0 +1,67 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Fixtures shared by the tests"""
+
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import code_coverage  # noqa: E402
+from fuzz_introspector.datatypes import project_profile  # noqa: E402
+
+
+@pytest.fixture
+def fake_func_elem():
+    """Returns a function creating the yaml element of a function, as found
+    in the "All functions" section of a fuzzer's yaml file. Keyword arguments
+    override fields of the element."""
+    def create_func_elem(name, complexity=1, branch_profiles=None, **fields):
+        func_elem = {
+            'functionName': name,
+            'functionSourceFile': '/src/project/file.c',
+            'linkageType': '',
+            'functionLinenumber': 1,
+            'returnType': 'int',
+            'argCount': 0,
+            'argTypes': [],
+            'argNames': [],
+            'BBCount': 1,
+            'ICount': 1,
+            'EdgeCount': 1,
+            'CyclomaticComplexity': complexity,
+            'functionsReached': [],
+            'functionUses': 0,
+            'functionDepth': 0,
+            'constantsTouched': [],
+            'BranchProfiles': branch_profiles if branch_profiles is not None else []
+        }
+        func_elem.update(fields)
+        return func_elem
+    return create_func_elem
+
+
+@pytest.fixture
+def stub_project_profile():
+    """Returns a MergedProjectProfile without any fuzzer profiles. Merging
+    needs at least one fuzzer, so the object is created without running the
+    constructor and tests fill in the functions and coverage they need."""
+    proj_profile = project_profile.MergedProjectProfile.__new__(
+        project_profile.MergedProjectProfile
+    )
+    proj_profile.profiles = []
+    proj_profile.all_functions = dict()
+    proj_profile.runtime_coverage = code_coverage.CoverageProfile()
+    return proj_profile
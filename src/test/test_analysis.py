@@ -0,0 +1,386 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test analysis.py"""
+
+import json
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import analysis  # noqa: E402
+from fuzz_introspector import cfg_load  # noqa: E402
+from fuzz_introspector import code_coverage  # noqa: E402
+from fuzz_introspector import json_report  # noqa: E402
+from fuzz_introspector import utils  # noqa: E402
+from fuzz_introspector.analyses import calltree_analysis as cta  # noqa: E402
+from fuzz_introspector.analyses import engine_input  # noqa: E402
+from fuzz_introspector.analyses import function_call_analyser  # noqa: E402
+from fuzz_introspector.datatypes import (  # noqa: E402
+    branch_profile,
+    function_profile,
+    fuzzer_profile
+)
+from fuzz_introspector.exceptions import AnalysisError  # noqa: E402
+
+
+def test_update_branch_complexities(fake_func_elem):
+    """Test the side complexities of branches"""
+    branch_elem = {
+        'Branch String': '/src/project/file.c:10,5',
+        'Branch Sides': {
+            'TrueSide': 'file.c:11,7',
+            'FalseSide': 'file.c:13,7',
+            'TrueSideFuncs': ['a', 'b', 'b', 'unknown'],
+            'FalseSideFuncs': ['b', 'c']
+        }
+    }
+    all_functions = {}
+    for name, complexity, branches in [
+        ('main', 1, [branch_elem]),
+        ('a', 2, []),
+        ('b', 3, []),
+        ('c', 5, [])
+    ]:
+        fd = function_profile.FunctionProfile(fake_func_elem(name, complexity, branches))
+        fd.total_cyclomatic_complexity = complexity * 10
+        all_functions[name] = fd
+
+    coverage = code_coverage.CoverageProfile()
+    coverage.covmap['a'] = [(1, 0)]
+    coverage.covmap['b'] = [(1, 1)]
+
+    analysis.update_branch_complexities(all_functions, coverage)
+    branch = all_functions['main'].branch_profiles['file.c:10,5']
+
+    assert branch.branch_true_side_reachable_complexity == 80
+    assert branch.branch_true_side_unique_reachable_complexity == 20
+    assert branch.branch_true_side_not_covered_complexity == 20
+    assert branch.branch_true_side_unique_not_covered_complexity == 20
+    assert branch.branch_false_side_reachable_complexity == 80
+    assert branch.branch_false_side_unique_reachable_complexity == 50
+    assert branch.branch_false_side_not_covered_complexity == 50
+    assert branch.branch_false_side_unique_not_covered_complexity == 50
+
+
+def test_get_branch_profile(fake_func_elem):
+    """Test looking up branch profiles of a function by position"""
+    branch_elems = []
+    for pos in ['file.c:10,5', 'file.c:20,5', 'file.c:20,9']:
+        branch_elems.append({
+            'Branch String': f'/src/project/{pos}',
+            'Branch Sides': {
+                'TrueSide': 'file.c:30,1',
+                'FalseSide': 'file.c:31,1',
+                'TrueSideFuncs': [],
+                'FalseSideFuncs': []
+            }
+        })
+    fd = function_profile.FunctionProfile(fake_func_elem('main', 1, branch_elems))
+
+    assert fd.get_branch_profile('file.c', 10, 5).branch_pos == 'file.c:10,5'
+    assert fd.get_branch_profile('file.c', 20, 9).branch_pos == 'file.c:20,9'
+    # A single branch on a line is matched regardless of column
+    assert fd.get_branch_profile('file.c', 10, 6).branch_pos == 'file.c:10,5'
+    assert fd.get_branch_profile('file.c', 20, 6) is None
+    assert fd.get_branch_profile('other.c', 10, 5) is None
+
+
+def test_add_branch_profiles(fake_func_elem, stub_project_profile):
+    """Test attaching standalone branch profiles to functions"""
+    all_functions = {}
+    for name, linenumber in [('f1', 5), ('f2', 15)]:
+        elem = fake_func_elem(name, 1)
+        elem['functionLinenumber'] = linenumber
+        all_functions[name] = function_profile.FunctionProfile(elem)
+    proj_profile = stub_project_profile
+    proj_profile.all_functions = all_functions
+
+    branches = []
+    for pos in ['file.c:10,5', 'file.c:20,5', 'file.c:1,1', 'other.c:20,5']:
+        branch = branch_profile.BranchProfile()
+        branch.assign_from_yaml_elem({
+            'Branch String': f'/src/project/{pos}',
+            'Branch Sides': {
+                'TrueSide': '',
+                'FalseSide': '',
+                'TrueSideFuncs': [],
+                'FalseSideFuncs': []
+            }
+        })
+        branches.append(branch)
+
+    assert proj_profile.add_branch_profiles(branches) == 2
+    assert list(all_functions['f1'].branch_profiles) == ['file.c:10,5']
+    assert list(all_functions['f2'].branch_profiles) == ['file.c:20,5']
+
+
+def test_add_branch_profiles_same_file_name(fake_func_elem, stub_project_profile):
+    """Test branches are attached to functions of the file with their path"""
+    all_functions = {}
+    for name, source_file in [('f1', '/src/a/util.c'), ('f2', '/src/b/util.c'),
+                              ('f3', '/src/b/other.c')]:
+        elem = fake_func_elem(name, 1)
+        elem['functionSourceFile'] = source_file
+        elem['functionLinenumber'] = 5 if name == 'f1' else 1
+        all_functions[name] = function_profile.FunctionProfile(elem)
+    proj_profile = stub_project_profile
+    proj_profile.all_functions = all_functions
+
+    branches = []
+    for branch_string in ['/src/a/util.c:10,5', '/src/b/../b/util.c:10,5',
+                          '/other/util.c:10,5', '/build/other.c:10,5']:
+        branch = branch_profile.BranchProfile()
+        branch.assign_from_yaml_elem({
+            'Branch String': branch_string,
+            'Branch Sides': {
+                'TrueSide': '',
+                'FalseSide': '',
+                'TrueSideFuncs': [],
+                'FalseSideFuncs': []
+            }
+        })
+        branches.append(branch)
+
+    # The branch in /other/util.c has an ambiguous file name and is left out,
+    # the one in /build/other.c is matched by its unique file name.
+    assert proj_profile.add_branch_profiles(branches) == 3
+    assert list(all_functions['f1'].branch_profiles) == ['util.c:10,5']
+    assert list(all_functions['f2'].branch_profiles) == ['util.c:10,5']
+    assert list(all_functions['f3'].branch_profiles) == ['other.c:10,5']
+    assert all_functions['f2'].branch_profiles['util.c:10,5'] is branches[1]
+
+
+def test_function_profile_table(fake_func_elem, caplog):
+    """Test the same functions of fuzzers share a FunctionProfile"""
+    table = function_profile.FunctionProfileTable()
+
+    fd1 = table.get_function_profile(fake_func_elem('f', 1))
+    fd2 = table.get_function_profile(fake_func_elem('f', 1, functionDepth=3))
+    fd3 = table.get_function_profile(fake_func_elem('f', 1, functionSourceFile='/src/f.c'))
+    fd4 = table.get_function_profile(fake_func_elem('f', 1, linkageType='internal'))
+
+    assert fd1 is fd2
+    assert fd1 is not fd3
+    assert fd1 is not fd4
+    assert len(table) == 3
+    assert caplog.records == []
+
+    # Differing static data is logged and the first version is kept
+    fd5 = table.get_function_profile(fake_func_elem('f', 2))
+    assert fd5 is fd1
+    assert fd5.cyclomatic_complexity == 1
+    assert "CyclomaticComplexity" in caplog.text
+
+
+def test_calltree_idx_width():
+    """Test calltree indices are padded to sort in order in large calltrees"""
+    calltree_analysis = cta.Analysis()
+    assert cta.get_ctx_idx_width(1000) == 5
+    assert cta.get_ctx_idx_width(100001) == 6
+    assert calltree_analysis.create_str_node_ctx_idx("42") == "00042"
+    assert calltree_analysis.create_str_node_ctx_idx("42", 6) == "000042"
+
+
+def test_virtual_calltree_data(tmpdir, fake_func_elem):
+    """Test the columns of the data file of virtual calltrees"""
+    cfg_path = os.path.join(tmpdir, "fuzzer.data")
+    with open(cfg_path, "w") as f:
+        f.write("Call tree\n"
+                "LLVMFuzzerTestOneInput /src/project/fuzzer.c linenumber=-1\n"
+                "  parse /src/project/file.c linenumber=3\n"
+                "    memcpy /src/project/file.c linenumber=7\n"
+                "  parse /src/project/file.c linenumber=4\n")
+    profile = fuzzer_profile.FuzzerProfile(
+        cfg_path,
+        {
+            "Fuzzer filename": "/src/project/fuzzer.c",
+            "All functions": {"Elements": [fake_func_elem('LLVMFuzzerTestOneInput')]}
+        }
+    )
+    nodes = cfg_load.extract_all_callsites(profile.function_call_depths)
+    for idx, (node, color) in enumerate(zip(nodes, ["green", "red", "red", "green"])):
+        node.cov_ct_idx = idx
+        node.cov_color = color
+        node.cov_link = f"link{node.dst_function_name}"
+        node.cov_callsite_link = f"callsite{idx}"
+    # Functions without a source file have no link
+    nodes[2].dst_function_source_file = ""
+
+    with tmpdir.as_cwd():
+        calltree_file = cta.Analysis().create_calltree(
+            profile,
+            pretty_html=False,
+            virtual_calltree_threshold=0,
+            calltree_file_idx=0
+        )
+        with open(calltree_file.replace(".html", ".js")) as f:
+            data = f.read()
+    assert data.startswith("var calltree_data = ") and data.endswith(";\n")
+    calltree_data = json.loads(data[len("var calltree_data = "):-len(";\n")])
+
+    assert calltree_data["idx_width"] == 5
+    strings = calltree_data["strings"]
+    assert len(strings) == len(set(strings))
+    columns = calltree_data["columns"]
+    assert all(len(column) == len(nodes) for column in columns.values())
+    assert columns["depth"] == [0, 1, 2, 1]
+    assert [strings[idx] for idx in columns["color"]] == ["green", "red", "red", "green"]
+    assert [strings[idx] for idx in columns["name"]] == [
+        "LLVMFuzzerTestOneInput", "parse", "memcpy", "parse"
+    ]
+    assert columns["link"][2] == -1
+    assert [strings[idx] for idx in columns["link"] if idx != -1] == [
+        "linkLLVMFuzzerTestOneInput", "linkparse", "linkparse"
+    ]
+    assert [strings[idx] for idx in columns["callsite_link"]] == [
+        f"callsite{idx}" for idx in range(len(nodes))
+    ]
+
+
+def test_json_report_function_record(fake_func_elem, stub_project_profile):
+    """Test the runtime coverage of functions in json reports"""
+    proj_profile = stub_project_profile
+    proj_profile.runtime_coverage.covmap["f1"] = [(1, 1), (2, 0), (3, 4), (4, 0)]
+
+    fd1 = function_profile.FunctionProfile(fake_func_elem('f1', 3))
+    fd2 = function_profile.FunctionProfile(fake_func_elem('f2', 1))
+    record = json_report.get_function_record(fd1, proj_profile)
+    assert record["name"] == "f1"
+    assert record["hit-at-runtime"]
+    assert record["hit-percentage"] == 50.0
+    assert record["cyclomatic-complexity"] == 3
+
+    record = json_report.get_function_record(fd2, proj_profile)
+    assert not record["hit-at-runtime"]
+    assert record["hit-percentage"] == 0.0
+
+
+def test_json_report_analyses_data(fake_func_elem, stub_project_profile):
+    """Test the data of analyses without profile data in json reports"""
+    proj_profile = stub_project_profile
+    proj_profile.basefolder = "/"
+    proj_profile.runtime_coverage_matrix = code_coverage.CoverageMatrix.from_coverage_profiles(
+        [],
+        []
+    )
+    proj_profile.all_functions = {
+        'system': function_profile.FunctionProfile(
+            fake_func_elem('system', 1, functionSourceFile='')
+        )
+    }
+    analyses_data = json_report.get_analyses_data(
+        [],
+        proj_profile,
+        ["ThirdPartyAPICoverageAnalyser", "FilePathAnalyser", "MetadataAnalysis"]
+    )
+    assert analyses_data == {
+        "ThirdPartyAPICoverageAnalyser": {
+            "callsites": [{
+                "sink": "system",
+                "callsite-location": "",
+                "reachable": False,
+                "covered-by": []
+            }]
+        },
+        "FilePathAnalyser": {"files": [], "directories": []},
+        "MetadataAnalysis": {"fuzzers": []}
+    }
+    assert json.loads(json.dumps(analyses_data)) == analyses_data
+
+    with pytest.raises(AnalysisError):
+        json_report.get_analyses_data([], proj_profile, ["FuzzEngineInput"])
+
+
+def test_third_party_func_profile(tmpdir, fake_func_elem, stub_project_profile):
+    """Test call sites of sinks are reachable if they are in a calltree"""
+    proj_profile = stub_project_profile
+    system_elem = fake_func_elem('system', 1)
+    system_elem['functionSourceFile'] = ''
+    strlen_elem = fake_func_elem('strlen', 1)
+    strlen_elem['functionSourceFile'] = ''
+    proj_profile.all_functions = {
+        'system': function_profile.FunctionProfile(system_elem),
+        'strlen': function_profile.FunctionProfile(strlen_elem)
+    }
+
+    caller_elem = fake_func_elem('caller', 1)
+    caller_elem['Callsites'] = [
+        {'Src': '/src/project/file.c:10,3', 'Dst': 'system'},
+        {'Src': '/src/project/file.c:10,9', 'Dst': 'system'},
+        {'Src': '/src/project/file.c:12,3', 'Dst': 'system'},
+        {'Src': '/src/project/file.c:14,3', 'Dst': 'strlen'}
+    ]
+    caller = function_profile.FunctionProfile(caller_elem)
+
+    # Only the call at line 12 is in the calltree
+    calltree = cfg_load.CalltreeCallsite('caller', '/src/project/file.c', 0, -1, None)
+    calltree.children.append(cfg_load.CalltreeCallsite('system', '', 1, 12, calltree))
+
+    config_path = os.path.join(tmpdir, "config")
+    with open(config_path, "w") as f:
+        f.write("FUNCS_TO_AVOID\nSINKS\nsys.*\npopen\n")
+    analysis = function_call_analyser.Analysis()
+    analysis.set_config(utils.ExclusionConfig.from_file(config_path))
+    sinks, callsites, reachable = analysis.third_party_func_profile(
+        proj_profile,
+        cfg_load.extract_all_callsites(calltree),
+        [caller, caller]
+    )
+    assert [fd.function_name for fd in sinks] == ['system']
+    assert list(callsites['system'].values()) == [
+        '/src/project/file.c#caller:12',
+        '/src/project/file.c#caller:10'
+    ]
+    assert reachable == {('system', '/src/project/file.c', 'caller', '12')}
+
+
+def test_engine_input_dictionary(tmpdir, fake_func_elem):
+    """Test dictionaries hold distinct escaped tokens, ranked by uncovered uses"""
+    cfg_path = os.path.join(tmpdir, "fuzzer.data")
+    with open(cfg_path, "w") as f:
+        f.write("Call tree\n"
+                "LLVMFuzzerTestOneInput /src/project/fuzzer.c linenumber=-1\n")
+    func_elems = []
+    for name, consts in [
+        ('LLVMFuzzerTestOneInput', ['magic', 'a"b']),
+        ('covered', ['magic', 'x' * 100]),
+        ('uncovered', ['magic', 'a"b', 'line\n']),
+    ]:
+        func_elem = fake_func_elem(name, 1)
+        func_elem['functionsReached'] = ['covered', 'uncovered']
+        func_elem['constantsTouched'] = consts
+        func_elems.append(func_elem)
+    profile = fuzzer_profile.FuzzerProfile(
+        cfg_path,
+        {
+            "Fuzzer filename": "/src/project/fuzzer.c",
+            "All functions": {"Elements": func_elems}
+        }
+    )
+    profile._set_all_reached_functions()
+    profile.coverage = code_coverage.CoverageProfile()
+    profile.coverage.covmap['covered'] = [(1, 1)]
+    profile.coverage.covmap['uncovered'] = [(1, 0)]
+
+    engine_input_analysis = engine_input.Analysis()
+    assert engine_input_analysis.get_dictionary_tokens(profile) == [
+        b'magic', b'a"b', b'line\n'
+    ]
+    with tmpdir.as_cwd():
+        dictionary = engine_input_analysis.get_dictionary(profile)
+        with open(engine_input.get_dictionary_file_name(profile)) as f:
+            assert f.read() == dictionary
+    assert dictionary == 'k0="magic"\nk1="a\\"b"\nk2="line\\x0A"\n'
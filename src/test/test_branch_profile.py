@@ -100,3 +100,28 @@ def test_branch_profile_double_assign():
     assert bp.branch_false_side_hitcount == 123
     assert bp.branch_true_side_funcs == ['jkl', 'mno', 'pqr']
     assert bp.branch_false_side_funcs == ['abc', 'def', 'ghi']
+
+
+def test_branch_profile_positions():
+    """Test parsing of branch positions"""
+    bp = branch_profile.BranchProfile()
+
+    dummy_yaml_elem = {
+        'Branch String': '/src/project/file.c:10,5',
+        'Branch Sides': {
+            'TrueSide': 'file.c:11,7',
+            'FalseSide': 'file.c:13,7',
+            'TrueSideFuncs': [],
+            'FalseSideFuncs': []
+        }
+    }
+
+    bp.assign_from_yaml_elem(dummy_yaml_elem)
+
+    assert bp.branch_pos == 'file.c:10,5'
+    assert bp.branch_file == 'file.c'
+    assert bp.branch_line == 10
+    assert bp.branch_column == 5
+    assert bp.branch_true_side_line == 11
+    assert bp.branch_false_side_line == 13
+    assert branch_profile.parse_branch_pos('ghi') == ('ghi', -1, -1)
@@ -0,0 +1,42 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test cache.py"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import cache  # noqa: E402
+
+
+def test_stage_cache(tmpdir):
+    """Test stage results are only used for inputs with the same fingerprint"""
+    input_file = os.path.join(tmpdir, "fuzzer.covreport")
+    with open(input_file, "w") as f:
+        f.write("a")
+    fingerprint = cache.get_fingerprint(["stage", 1], [input_file])
+    assert fingerprint == cache.get_fingerprint(["stage", 1], [input_file])
+    assert fingerprint != cache.get_fingerprint(["stage", 2], [input_file])
+
+    stage_cache = cache.StageCache(os.path.join(tmpdir, "cache"))
+    assert stage_cache.load("stage", fingerprint) is None
+    stage_cache.store("stage", fingerprint, {"result": [1, 2]})
+    assert stage_cache.load("stage", fingerprint) == {"result": [1, 2]}
+
+    with open(input_file, "w") as f:
+        f.write("ab")
+    new_fingerprint = cache.get_fingerprint(["stage", 1], [input_file])
+    assert new_fingerprint != fingerprint
+    assert stage_cache.load("stage", new_fingerprint) is None
@@ -17,7 +17,7 @@ import pytest
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
 
-from fuzz_introspector import cfg_load  # noqa: E402
+from fuzz_introspector import cfg_load, utils  # noqa: E402
 
 
 @pytest.fixture
@@ -73,3 +73,41 @@ def test_cfg_nodes(tmpdir, sample_cfg1):
     assert all_callsites[3].depth == 2
     assert all_callsites[4].depth == 2
     assert all_callsites[5].depth == 2
+
+
+def test_cfg_exclusion(tmpdir, sample_cfg1):
+    """Test excluded callsites are skipped with their subtrees"""
+    config_path = os.path.join(tmpdir, "exclusion_config")
+    with open(config_path, "w") as f:
+        f.write("FUNCS_TO_AVOID\n^llvmFuzzer\nFILES_TO_AVOID\nsnapshot\n")
+    cfg_path = os.path.join(tmpdir, "test_file.data")
+    with open(cfg_path, "w") as f:
+        f.write(sample_cfg1 + "\n  fuzz /src/wuffs/fuzz/c/std/bmp_fuzzer.c linenumber=95")
+    exclusion_config = utils.ExclusionConfig.from_file(config_path)
+
+    cfg = cfg_load.data_file_read_calltree(cfg_path, exclusion_config)
+    all_callsites = cfg_load.extract_all_callsites(cfg)
+    assert [cs.dst_function_name for cs in all_callsites] == [
+        "LLVMFuzzerTestOneInput", "fuzz"
+    ]
+    assert all_callsites[1].depth == 1
+    assert utils.load_func_names(
+        ["llvmFuzzerTestOneInput", "fuzz", "__sanitizer_cov"],
+        exclusion_config
+    ) == ["fuzz"]
+
+
+def test_calltree_index(tmpdir, sample_cfg1):
+    """Test lookups of functions and of callees by line number"""
+    cfg = _load_cfg(tmpdir, sample_cfg1)
+    calltree_index = cfg_load.CalltreeIndex(cfg)
+
+    assert calltree_index.subtree_ends == [6, 6, 3, 4, 5, 6]
+    assert calltree_index.get_function_node("jenkins_hash_u32") == 2
+    assert calltree_index.get_function_node("not_in_calltree") is None
+
+    node_idx = calltree_index.get_function_node("llvmFuzzerTestOneInput")
+    assert calltree_index.get_last_child_before_line(node_idx, 66) is None
+    assert calltree_index.get_last_child_before_line(node_idx, 68) == 3
+    assert calltree_index.get_last_child_before_line(node_idx, 73) == 4
+    assert calltree_index.get_last_child_before_line(node_idx, 1000) == 5
@@ -0,0 +1,424 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test code_coverage.py"""
+
+import copy
+import io
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import numpy
+import pytest
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import code_coverage  # noqa: E402
+
+
+@pytest.fixture
+def sample_covreport():
+    """Fixture for a small llvm-cov show report"""
+    covreport = """LLVMFuzzerTestOneInput:
+   10|  1.2k|int LLVMFuzzerTestOneInput(const uint8_t *data, size_t size) {
+   11|  1.2k|  if (size > 3) {
+  ------------------
+  |  Branch (11:7): [True: 1.2k, False: 0]
+  ------------------
+   12|     0|    parse(data);
+   13|     0|  }
+   14|  1.2k|}
+parse:
+   20|     0|void parse(const uint8_t *d) {
+   21|     0|}
+"""
+    return covreport
+
+
+def write_covreport(tmpdir, covreport, name="fuzz_target"):
+    cov_dir = os.path.join(tmpdir, "cov")
+    os.makedirs(cov_dir, exist_ok=True)
+    with open(os.path.join(cov_dir, name + ".covreport"), "w") as f:
+        f.write(covreport)
+    return cov_dir
+
+
+def test_load_llvm_coverage(tmpdir, sample_covreport):
+    """Basic test for parsing a covreport"""
+    cov_dir = write_covreport(tmpdir, sample_covreport)
+    cp = code_coverage.load_llvm_coverage(cov_dir, "fuzz_target")
+
+    assert cp.covmap["LLVMFuzzerTestOneInput"] == [
+        (10, 1200), (11, 1200), (12, 0), (13, 0), (14, 1200)
+    ]
+    assert cp.covmap["parse"] == [(20, 0), (21, 0)]
+    assert cp.branch_cov_map == {("LLVMFuzzerTestOneInput", 11, 7): (1200, 0)}
+    assert cp.is_func_hit("LLVMFuzzerTestOneInput")
+    assert not cp.is_func_hit("parse")
+
+
+def test_coverage_store_matches_in_memory(tmpdir, sample_covreport):
+    """Test the memory-mapped coverage store holds the same data"""
+    cov_dir = write_covreport(tmpdir, sample_covreport)
+    cache_dir = os.path.join(tmpdir, "cache")
+
+    in_memory = code_coverage.load_llvm_coverage(cov_dir, "fuzz_target")
+    stored = code_coverage.load_llvm_coverage(cov_dir, "fuzz_target", cache_dir)
+
+    assert isinstance(stored.covmap, code_coverage.CoverageStoreMap)
+    assert dict(stored.covmap) == dict(in_memory.covmap)
+    assert stored.branch_cov_map == in_memory.branch_cov_map
+    assert stored.get_hit_summary("parse") == in_memory.get_hit_summary("parse")
+    assert stored.coverage_files == in_memory.coverage_files
+
+    # Copies and pickles of the profile keep working on the store
+    assert dict(copy.deepcopy(stored).covmap) == dict(in_memory.covmap)
+    assert dict(pickle.loads(pickle.dumps(stored)).covmap) == dict(in_memory.covmap)
+
+
+def test_coverage_store_is_reused(tmpdir, sample_covreport, monkeypatch):
+    """Test the coverage store is used as a cache for unchanged reports"""
+    cov_dir = write_covreport(tmpdir, sample_covreport)
+    cache_dir = os.path.join(tmpdir, "cache")
+    code_coverage.load_llvm_coverage(cov_dir, "fuzz_target", cache_dir)
+
+    def fail_parse(*args):
+        raise AssertionError("coverage report should not be parsed")
+
+    with monkeypatch.context() as m:
+        m.setattr(code_coverage, "_iter_llvm_coverage_records", fail_parse)
+        cp = code_coverage.load_llvm_coverage(cov_dir, "fuzz_target", cache_dir)
+    assert cp.covmap["parse"] == [(20, 0), (21, 0)]
+
+    # Changing the report invalidates the store
+    write_covreport(tmpdir, sample_covreport.replace("   21|     0|", "   21|     5|"))
+    os.utime(
+        os.path.join(cov_dir, "fuzz_target.covreport"),
+        ns=(0, 1)
+    )
+    cp = code_coverage.load_llvm_coverage(cov_dir, "fuzz_target", cache_dir)
+    assert cp.covmap["parse"] == [(20, 0), (21, 5)]
+
+
+def test_coverage_store_map_overrides(tmpdir, sample_covreport):
+    """Test writes to a store-backed covmap shadow the stored data"""
+    cov_dir = write_covreport(tmpdir, sample_covreport)
+    cp = code_coverage.load_llvm_coverage(
+        cov_dir,
+        "fuzz_target",
+        os.path.join(tmpdir, "cache")
+    )
+
+    cp.covmap["parse"] = [(20, 1)]
+    cp.covmap["new_func"] = [(1, 1)]
+    del cp.covmap["LLVMFuzzerTestOneInput"]
+
+    assert cp.covmap["parse"] == [(20, 1)]
+    assert "LLVMFuzzerTestOneInput" not in cp.covmap
+    assert sorted(cp.covmap) == ["new_func", "parse"]
+    assert len(cp.covmap) == 2
+
+
+def test_coverage_store_map_reads_from_store(tmpdir, sample_covreport):
+    """Test entries read from a store-backed covmap are not kept in memory"""
+    cov_dir = write_covreport(tmpdir, sample_covreport)
+    cp = code_coverage.load_llvm_coverage(
+        cov_dir,
+        "fuzz_target",
+        os.path.join(tmpdir, "cache")
+    )
+
+    for funcname in cp.covmap:
+        cp.covmap[funcname]
+        cp.get_hit_summary(funcname)
+    assert cp.covmap._written == {}
+
+    lines, hits = cp.covmap.get_arrays("parse")
+    assert lines.tolist() == [20, 21]
+    assert hits.tolist() == [0, 0]
+
+    # Changes are kept once they are written back to the map
+    line_hits = cp.covmap["parse"]
+    line_hits.append((22, 3))
+    cp.covmap["parse"] = line_hits
+    assert cp.covmap["parse"] == [(20, 0), (21, 0), (22, 3)]
+    assert cp.covmap.get_arrays("parse")[1].tolist() == [0, 0, 3]
+    assert list(cp.covmap) == ["LLVMFuzzerTestOneInput", "parse"]
+
+
+def test_coverage_store_find_branch(tmpdir, sample_covreport):
+    """Test looking up branches of a coverage store by key"""
+    branches = "".join(
+        f"  |  Branch ({line}:{column}): [True: {line}, False: {column}]\n"
+        for line, column in [(21, 9), (20, 3), (21, 2), (20, 12)]
+    )
+    cov_dir = write_covreport(tmpdir, sample_covreport + branches)
+    cp = code_coverage.load_llvm_coverage(
+        cov_dir,
+        "fuzz_target",
+        os.path.join(tmpdir, "cache")
+    )
+    store = cp.covmap.store
+
+    assert store.find_branch(("LLVMFuzzerTestOneInput", 11, 7)) == (1200, 0)
+    for line, column in [(21, 9), (20, 3), (21, 2), (20, 12)]:
+        assert store.find_branch(("parse", line, column)) == (line, column)
+    assert store.find_branch(("parse", 20, 9)) is None
+    assert store.find_branch(("parse", 11, 7)) is None
+    assert store.find_branch(("unknown", 11, 7)) is None
+
+
+def test_coverage_store_branch_map(tmpdir, sample_covreport):
+    """Test the branch map of a coverage store is read from the store"""
+    cov_dir = write_covreport(tmpdir, sample_covreport)
+    cp = code_coverage.load_llvm_coverage(
+        cov_dir,
+        "fuzz_target",
+        os.path.join(tmpdir, "cache")
+    )
+    branch_key = ("LLVMFuzzerTestOneInput", 11, 7)
+
+    assert isinstance(cp.branch_cov_map, code_coverage.CoverageStoreBranchMap)
+    assert cp.branch_cov_map[branch_key] == (1200, 0)
+    assert ("parse", 11, 7) not in cp.branch_cov_map
+    assert len(cp.branch_cov_map) == 1
+
+    cp.branch_cov_map[("parse", 20, 3)] = (1, 1)
+    cp.branch_cov_map[branch_key] = (5, 5)
+    assert dict(cp.branch_cov_map.items()) == {
+        branch_key: (5, 5),
+        ("parse", 20, 3): (1, 1),
+    }
+    del cp.branch_cov_map[branch_key]
+    assert list(cp.branch_cov_map) == [("parse", 20, 3)]
+    assert len(cp.branch_cov_map) == 1
+
+
+def test_coverage_matrix_merge():
+    """Test merging coverage of several fuzzers"""
+    cp1 = code_coverage.CoverageProfile()
+    cp1.covmap["f"] = [(1, 5), (2, 0), (3, 0)]
+    cp1.branch_cov_map[("f", 2, 3)] = (5, 0)
+    cp2 = code_coverage.CoverageProfile()
+    cp2.covmap["f"] = [(1, 2), (3, 7), (4, 1)]
+    cp2.covmap["g"] = [(10, 1)]
+    cp2.branch_cov_map[("f", 2, 3)] = (1, 4)
+
+    matrix = code_coverage.CoverageMatrix.from_coverage_profiles(
+        ["fuzz1", "fuzz2", "fuzz3"],
+        [cp1, cp2, None]
+    )
+    merged = matrix.get_merged_coverage_profile()
+
+    assert merged.covmap["f"] == [(1, 5), (2, 0), (3, 7), (4, 1)]
+    assert merged.covmap["g"] == [(10, 1)]
+    assert merged.branch_cov_map == {("f", 2, 3): (5, 4)}
+
+    assert matrix.get_fuzzers_covering_line("f", 1) == ["fuzz1", "fuzz2"]
+    assert matrix.get_fuzzers_covering_line("f", 2) == []
+    assert matrix.get_fuzzers_covering_line("f", 3) == ["fuzz2"]
+    assert matrix.get_fuzzers_covering_line("f", 99) == []
+    assert matrix.get_fuzzers_covering_line("unknown", 1) == []
+    assert matrix.get_fuzzers_covering_function("g") == ["fuzz2"]
+
+
+def test_coverage_matrix_is_sparse(tmpdir, sample_covreport):
+    """Test the matrix only holds columns of fuzzers covering a function and
+    the merged profile reads from the fuzzers' coverage stores"""
+    stored = code_coverage.load_llvm_coverage(
+        write_covreport(tmpdir, sample_covreport),
+        "fuzz_target",
+        os.path.join(tmpdir, "cache")
+    )
+    cp = code_coverage.CoverageProfile()
+    cp.covmap["parse"] = [(21, 2 ** 40)]
+    cp.branch_cov_map[("LLVMFuzzerTestOneInput", 11, 7)] = (3, 9)
+
+    matrix = code_coverage.CoverageMatrix.from_coverage_profiles(
+        ["fuzz1", "fuzz2", "fuzz3"],
+        [None, stored, cp]
+    )
+    lines, func_hits, cols = matrix.get_function_coverage("LLVMFuzzerTestOneInput")
+    assert cols == [1]
+    assert func_hits.shape == (5, 1)
+    assert func_hits.dtype == numpy.uint32
+    _, func_hits, cols = matrix.get_function_coverage("parse")
+    assert cols == [1, 2]
+    assert func_hits.tolist() == [[0, 0], [0, code_coverage.UINT32_MAX]]
+
+    merged = matrix.get_merged_coverage_profile()
+    assert isinstance(merged.covmap, code_coverage.CoverageMatrixMap)
+    assert merged.covmap["parse"] == [(20, 0), (21, code_coverage.UINT32_MAX)]
+    assert merged.covmap._written == {}
+    assert merged.get_hit_functions() == {"LLVMFuzzerTestOneInput", "parse"}
+    assert dict(merged.branch_cov_map.items()) == {
+        ("LLVMFuzzerTestOneInput", 11, 7): (1200, 9)
+    }
+    assert len(merged.branch_cov_map) == 1
+
+
+def test_resolve_funcname():
+    """Test function names resolve to covmap keys by any spelling"""
+    cp = code_coverage.CoverageProfile()
+    cp.covmap["_Z3fooi"] = [(1, 1)]
+    cp.covmap["bar"] = [(2, 0)]
+
+    assert cp.resolve_funcname("_Z3fooi") == "_Z3fooi"
+    assert cp.resolve_funcname("foo(int)") == "_Z3fooi"
+    assert cp.resolve_funcname("b a r") == "bar"
+    assert cp.resolve_funcname("missing") is None
+    assert cp.get_hit_summary("foo(int)") == (1, 1)
+    assert cp.is_func_lineno_hit("_Z3fooi", 1)
+
+    # The index follows changes to the covmap
+    cp.covmap["missing"] = [(3, 3)]
+    assert cp.resolve_funcname("missing") == "missing"
+
+
+def test_is_file_lineno_hit_resolve_name():
+    """Test resolving python module names to coverage files"""
+    cp = code_coverage.CoverageProfile()
+    cp.set_type("file")
+    cp.file_map["/src/pyyaml/lib/yaml/reader.py"] = [10, 11]
+    cp.file_map["/src/fuzz_reader.py"] = [30]
+
+    assert cp.is_file_lineno_hit("yaml.reader.Reader.peek", 10, True)
+    assert not cp.is_file_lineno_hit("yaml.reader.Reader.peek", 12, True)
+    assert not cp.is_file_lineno_hit("yaml.scanner", 10, True)
+    # Line adjustment for python fuzzers
+    assert cp.is_file_lineno_hit("fuzz_reader", 19, True)
+    # Names ending a path without a separator are still found
+    assert cp.is_file_lineno_hit("_reader", 30, True)
+
+    cp.file_map["/src/yaml/scanner.py"] = [1]
+    assert cp.is_file_lineno_hit("yaml.scanner", 1, True)
+
+
+@pytest.fixture
+def python_json_coverage():
+    """Fixture for a coverage.py json report"""
+    return (
+        '{"meta": {"version": "6.4", "show_contexts": false}, "files": {'
+        '"/pythoncovmergedfiles/medio/src/yaml/reader.py": {'
+        '"executed_lines": [1, 2, 150], "summary": {"covered_lines": 3}}, '
+        '"/usr/lib/python3/json/decoder.py": {'
+        '"executed_lines": [5], "summary": {"covered_lines": 1}}}, '
+        '"totals": {"covered_lines": 4, "percent_covered": 12.5}}'
+    )
+
+
+def test_load_python_json_coverage(tmpdir, python_json_coverage):
+    """Test streaming a python json coverage report"""
+    with open(os.path.join(tmpdir, "all_cov.json"), "w") as f:
+        f.write(python_json_coverage)
+
+    cp = code_coverage.load_python_json_coverage(str(tmpdir))
+    assert cp.get_type() == "file"
+    assert cp.file_map == {
+        "/src/yaml/reader.py": [1, 2, 150],
+        "/usr/lib/python3/json/decoder.py": [5]
+    }
+
+    cp = code_coverage.load_python_coverage(str(tmpdir), ["yaml.reader.Reader.peek"])
+    assert cp.file_map == {"/src/yaml/reader.py": [1, 2, 150]}
+    assert cp.is_file_lineno_hit("yaml.reader.Reader.peek", 150, True)
+
+    # Files are kept by the rule names are resolved by
+    cp = code_coverage.load_python_coverage(str(tmpdir), ["decoder"])
+    assert cp.file_map == {"/usr/lib/python3/json/decoder.py": [5]}
+    assert cp.is_file_lineno_hit("decoder", 5, True)
+    cp = code_coverage.load_python_coverage(str(tmpdir), ["coder"])
+    assert cp.file_map == {"/usr/lib/python3/json/decoder.py": [5]}
+    assert cp.is_file_lineno_hit("coder", 5, True)
+
+
+def test_json_object_stream_small_chunks(python_json_coverage):
+    """Test values split across read chunks are decoded"""
+    json_stream = code_coverage._JsonObjectStream(io.StringIO(python_json_coverage), 3)
+    data = dict()
+    for key in json_stream.iter_object_keys():
+        data[key] = json_stream.decode_value()
+    assert data == json.loads(python_json_coverage)
+
+
+def test_json_object_stream_large_value():
+    """Test the read size grows while a large value is incomplete"""
+    class CountingReader(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return super().read(size)
+
+    value = {"executed_lines": list(range(10000))}
+    json_fd = CountingReader(json.dumps({"files": {"a.py": value}}))
+    json_stream = code_coverage._JsonObjectStream(json_fd, 16)
+    for key in json_stream.iter_object_keys():
+        assert key == "files"
+        for entry in json_stream.iter_object_keys():
+            assert entry == "a.py"
+            assert json_stream.decode_value() == value
+    assert json_fd.reads < 20
+
+
+def test_load_python_sqlite_coverage(tmpdir):
+    """Test reading the coverage.py sqlite database"""
+    db_path = os.path.join(tmpdir, ".coverage")
+    db = sqlite3.connect(db_path)
+    db.executescript(
+        "CREATE TABLE file (id INTEGER PRIMARY KEY, path TEXT);"
+        "CREATE TABLE line_bits (file_id INTEGER, context_id INTEGER, numbits BLOB);"
+        "CREATE TABLE arc (file_id INTEGER, context_id INTEGER, fromno INTEGER, tono INTEGER);"
+    )
+    db.executemany("INSERT INTO file VALUES (?, ?)", [
+        (1, "/pythoncovmergedfiles/medio/src/yaml/reader.py"),
+        (2, "/src/fuzz_reader.py"),
+        (3, "/usr/lib/python3/json/decoder.py"),
+    ])
+    # Lines 1, 3 and 9 in two contexts
+    db.executemany("INSERT INTO line_bits VALUES (?, ?, ?)", [
+        (1, 1, bytes([0b00001010, 0b00000010])),
+        (1, 2, bytes([0b00000010])),
+        (3, 1, bytes([0b11111111])),
+    ])
+    db.executemany("INSERT INTO arc VALUES (?, ?, ?, ?)", [
+        (2, 1, -1, 4), (2, 1, 4, 5), (2, 1, 5, -1),
+    ])
+    db.commit()
+    db.close()
+
+    cp = code_coverage.load_python_coverage(
+        str(tmpdir),
+        ["yaml.reader.Reader", "fuzz_reader.TestOneInput"]
+    )
+    assert cp.file_map == {
+        "/src/yaml/reader.py": [1, 3, 9],
+        "/src/fuzz_reader.py": [4, 5]
+    }
+
+
+def test_python_coverage_html_index():
+    """Test resolving python names to coverage html files"""
+    html_index = code_coverage.PythonCoverageHtmlIndex({
+        "files": {
+            "d_1_reader_py": {"index": {"relative_filename": "lib/yaml/reader.py"}},
+            "d_2_reader_py": {"index": {"relative_filename": "other/yaml/reader.py"}},
+            "d_3_fuzz_py": {"index": {"relative_filename": "fuzz_reader.py"}},
+        }
+    })
+    assert html_index.get_html_file("yaml.reader.Reader.peek") == "d_1_reader_py"
+    assert html_index.get_html_file("fuzz_reader.TestOneInput") == "d_3_fuzz_py"
+    assert html_index.get_html_file("yaml.scanner") is None
+    assert html_index.get_html_file("......reader") == "d_1_reader_py"
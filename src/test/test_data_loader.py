@@ -0,0 +1,156 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test data_loader.py"""
+
+import os
+import sys
+import yaml
+import pytest
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import cfg_load  # noqa: E402
+from fuzz_introspector import data_loader  # noqa: E402
+from fuzz_introspector import utils  # noqa: E402
+from fuzz_introspector.datatypes import function_profile  # noqa: E402
+
+
+def fake_branch_elem(pos):
+    return {
+        'Branch String': f'/src/project/{pos}',
+        'Branch Sides': {
+            'TrueSide': 'file.c:30,1',
+            'FalseSide': 'file.c:31,1',
+            'TrueSideFuncs': [],
+            'FalseSideFuncs': []
+        }
+    }
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_iter_all_branch_profiles(tmpdir, jobs):
+    """Test loading branch profiles of several translation units"""
+    branch_files = {
+        "a.branchProfile.yaml": ['file.c:10,5', 'file.c:20,5'],
+        "b.branchProfile.yaml": ['file.c:20,5', 'other.c:3,1'],
+        "c.branchProfile.yaml": [],
+        "d.branchProfile.yaml": ['sub/file.c:20,5'],
+    }
+    for filename, positions in branch_files.items():
+        with open(os.path.join(tmpdir, filename), "w") as f:
+            f.write(yaml.dump([fake_branch_elem(pos) for pos in positions]))
+
+    branch_profiles = list(data_loader.iter_all_branch_profiles(str(tmpdir), jobs))
+
+    # Branches in files with the same name are not duplicates
+    assert sorted(bp.branch_pos for bp in branch_profiles) == [
+        'file.c:10,5', 'file.c:20,5', 'file.c:20,5', 'other.c:3,1'
+    ]
+    assert data_loader.load_all_branch_profiles(str(tmpdir), jobs).keys() == {
+        '/src/project/file.c:10,5',
+        '/src/project/file.c:20,5',
+        '/src/project/sub/file.c:20,5',
+        '/src/project/other.c:3,1'
+    }
+
+
+def test_iter_pool_results_is_bounded():
+    """Test only a bounded number of results are pending for the consumer"""
+    class FakeResult:
+        def __init__(self, value):
+            self.value = value
+
+        def get(self):
+            pool.pending -= 1
+            return self.value
+
+    class FakePool:
+        def __init__(self):
+            self.pending = 0
+            self.max_pending = 0
+
+        def apply_async(self, func, args):
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+            return FakeResult(func(*args))
+
+    pool = FakePool()
+    results = data_loader.iter_pool_results(pool, lambda x: x * 2, range(100), 3)
+    assert next(results) == 0
+    assert pool.pending == 3
+    assert list(results) == [x * 2 for x in range(1, 100)]
+    assert pool.max_pending == 3
+    assert pool.pending == 0
+
+
+def test_load_exclusion_config(tmpdir, monkeypatch):
+    """Test a config is only loaded if its file is given"""
+    config_path = os.path.join(tmpdir, "config")
+    with open(config_path, "w") as f:
+        f.write("FUNCS_TO_AVOID\nparse\n")
+    monkeypatch.setenv("FUZZ_INTROSPECTOR_CONFIG", config_path)
+    assert data_loader.load_exclusion_config() is None
+    exclusion_config = data_loader.load_exclusion_config(config_path)
+    assert exclusion_config is not None
+    assert exclusion_config.is_function_excluded("parse")
+    with pytest.raises(data_loader.DataLoaderError):
+        data_loader.load_exclusion_config(os.path.join(tmpdir, "missing"))
+
+
+def test_exclusion_does_not_depend_on_load_order(tmpdir, fake_func_elem):
+    """Test functions excluded because of their file are only excluded in
+    the fuzzer they belong to, whichever fuzzer is loaded first"""
+    def write_fuzzer(name, helper_file):
+        entrypoint = fake_func_elem('LLVMFuzzerTestOneInput', functionsReached=['helper'],
+                                    functionSourceFile=f'/src/project/{name}.c')
+        helper = fake_func_elem('helper', functionSourceFile=helper_file)
+        data_file = os.path.join(tmpdir, f"fuzzerLogFile-{name}.data")
+        with open(data_file + ".yaml", "w") as f:
+            yaml.dump({
+                "Fuzzer filename": f"/src/project/{name}.c",
+                "All functions": {"Elements": [entrypoint, helper]}
+            }, f)
+        with open(data_file, "w") as f:
+            f.write("Call tree\n"
+                    f"LLVMFuzzerTestOneInput /src/project/{name}.c linenumber=-1\n"
+                    f"  helper {helper_file} linenumber=3\n")
+        return data_file
+
+    data_files = [
+        write_fuzzer("vendored", "/src/third_party/helper.c"),
+        write_fuzzer("project", "/src/project/helper.c")
+    ]
+    exclusion_config = utils.ExclusionConfig([], ["third_party"])
+
+    for order in [data_files, data_files[::-1]]:
+        function_table = function_profile.FunctionProfileTable(exclusion_config)
+        profiles = {
+            data_file: data_loader.read_fuzzer_data_file_to_profile(
+                data_file,
+                "c-cpp",
+                function_table,
+                exclusion_config
+            )
+            for data_file in order
+        }
+        vendored, project = profiles[data_files[0]], profiles[data_files[1]]
+        assert 'helper' not in vendored.all_class_functions
+        assert vendored.all_class_functions[
+            'LLVMFuzzerTestOneInput'].functions_reached == []
+        assert len(cfg_load.extract_all_callsites(vendored.function_call_depths)) == 1
+        assert 'helper' in project.all_class_functions
+        assert project.all_class_functions[
+            'LLVMFuzzerTestOneInput'].functions_reached == ['helper']
+        assert len(cfg_load.extract_all_callsites(project.function_call_depths)) == 2
+    assert not exclusion_config.is_function_excluded('helper')
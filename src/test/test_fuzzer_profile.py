@@ -13,12 +13,17 @@
 # limitations under the License.
 """Test datatypes/fuzzer_profile.py"""
 
+import json
 import os
 import sys
 import pytest
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
 
+from fuzz_introspector import cfg_load  # noqa: E402
+from fuzz_introspector import code_coverage  # noqa: E402
+from fuzz_introspector import json_report  # noqa: E402
+from fuzz_introspector.analyses import calltree_analysis as cta  # noqa: E402
 from fuzz_introspector.datatypes import fuzzer_profile  # noqa: E402
 
 
@@ -153,3 +158,113 @@ def test_reaches_func(tmpdir, sample_cfg1):
     assert fp.reaches_func('abc')
     assert not fp.reaches_func('stu')
     assert not fp.reaches_func('mno')
+
+
+def test_is_file_covered(tmpdir, sample_cfg1):
+    """Test for file coverage with and without the base folder"""
+    elem = [
+        generate_temp_elem("LLVMFuzzerTestOneInput", ["fuzz"]),
+        generate_temp_elem("fuzz", []),
+        generate_temp_elem("unhit", [])
+    ]
+    elem[0]["functionSourceFile"] = "/src/wuffs/fuzz/c/fuzzlib/fuzzlib.c"
+    elem[1]["functionSourceFile"] = "/src/wuffs/fuzz/c/std/bmp_fuzzer.c"
+    elem[2]["functionSourceFile"] = "/src/wuffs/fuzz/...-snapshot.c"
+
+    fp = base_cpp_profile(tmpdir, sample_cfg1, elem)
+    fp._set_file_targets()
+    fp.coverage = code_coverage.CoverageProfile()
+    fp.coverage.covmap["LLVMFuzzerTestOneInput"] = [(1, 10), (2, 0)]
+    fp.coverage.covmap["fuzz"] = [(1, 10)]
+    fp.coverage.covmap["unhit"] = [(1, 0)]
+    fp.refine_paths('/src/wuffs/fuzz/c')
+
+    file_index = fp.get_file_index('/src/wuffs/fuzz/c')
+    assert file_index.functions_by_normalized_file["/std/bmp_fuzzer.c"] == ["fuzz"]
+    assert fp.is_file_covered('/src/wuffs/fuzz/c/std/bmp_fuzzer.c', '/src/wuffs/fuzz/c')
+    assert fp.is_file_covered('/src/wuffs/fuzz/c/fuzzlib/fuzzlib.c', '/src/wuffs/fuzz/c')
+    assert not fp.is_file_covered('/src/wuffs/fuzz/...-snapshot.c', '/src/wuffs/fuzz/c')
+    assert not fp.is_file_covered('/src/other.c', '/src/wuffs/fuzz/c')
+
+    # The index is kept until the coverage or the functions are set
+    assert fp.get_file_index('/src/wuffs/fuzz/c') is file_index
+    coverage = code_coverage.CoverageProfile()
+    coverage.covmap["unhit"] = [(1, 5)]
+    fp.coverage = coverage
+    assert fp.get_file_index('/src/wuffs/fuzz/c') is not file_index
+    assert fp.is_file_covered('/src/wuffs/fuzz/...-snapshot.c', '/src/wuffs/fuzz/c')
+    assert not fp.is_file_covered('/src/wuffs/fuzz/c/std/bmp_fuzzer.c', '/src/wuffs/fuzz/c')
+
+    file_index = fp.get_file_index('/src/wuffs/fuzz/c')
+    fp.all_class_functions = {"fuzz": fp.all_class_functions["fuzz"]}
+    assert fp.get_file_index('/src/wuffs/fuzz/c') is not file_index
+    assert not fp.is_file_covered('/src/wuffs/fuzz/...-snapshot.c', '/src/wuffs/fuzz/c')
+
+
+def test_get_fuzz_blockers(tmpdir, sample_cfg1):
+    """Test fuzz blockers are the nodes with most forward reds"""
+    elem = [generate_temp_elem("LLVMFuzzerTestOneInput", [])]
+    fp = base_cpp_profile(tmpdir, sample_cfg1, elem)
+    nodes = cfg_load.extract_all_callsites(fp.function_call_depths)
+    for node, forward_reds in zip(nodes, [0, 3, 1, 3, 0, 2]):
+        node.cov_forward_reds = forward_reds
+
+    assert fp.get_fuzz_blockers(2) == [nodes[1], nodes[3]]
+    assert fp.get_fuzz_blockers(10) == [nodes[1], nodes[3], nodes[5], nodes[2]]
+    assert fp.get_fuzz_blockers(1) == [nodes[1]]
+
+    # Blockers are kept until reset
+    nodes[4].cov_forward_reds = 5
+    assert fp.get_fuzz_blockers(1) == [nodes[1]]
+    fp.reset_fuzz_blockers()
+    assert fp.get_fuzz_blockers(1) == [nodes[4]]
+
+
+def test_get_project_fuzz_blockers(tmpdir, sample_cfg1):
+    """Test the top fuzz blockers of several fuzzers are merged"""
+    profiles = []
+    for idx, all_forward_reds in enumerate([[0, 3, 1, 3, 0, 2], [0, 4, 0, 2, 0, 0]]):
+        profile_dir = tmpdir.mkdir(f"fuzzer{idx}")
+        fp = base_cpp_profile(profile_dir, sample_cfg1, [
+            generate_temp_elem("LLVMFuzzerTestOneInput", [])
+        ])
+        fp.binary_executable = f"fuzzer{idx}"
+        nodes = cfg_load.extract_all_callsites(fp.function_call_depths)
+        for node, forward_reds in zip(nodes, all_forward_reds):
+            node.cov_forward_reds = forward_reds
+        profiles.append((fp, nodes))
+    (fp0, nodes0), (fp1, nodes1) = profiles
+
+    project_blockers = cta.get_project_fuzz_blockers([fp0, fp1], 4)
+    assert project_blockers == [
+        (fp1, nodes1[1]), (fp0, nodes0[1]), (fp0, nodes0[3]), (fp0, nodes0[5])
+    ]
+
+    records = json_report.get_project_fuzz_blockers([fp0, fp1])
+    assert [(r["fuzzer"], r["blocked-callsites"]) for r in records] == [
+        ("fuzzer1", 4), ("fuzzer0", 3), ("fuzzer0", 3), ("fuzzer0", 2), ("fuzzer1", 2),
+        ("fuzzer0", 1)
+    ]
+
+
+def test_python_coverage_link(tmpdir, sample_cfg1):
+    """Test python coverage links use the html index of the current run"""
+    def python_profile():
+        fp = base_cpp_profile(tmpdir, sample_cfg1, [])
+        fp._target_lang = "python"
+        return fp
+
+    with tmpdir.as_cwd():
+        assert python_profile().resolve_coverage_link(
+            "/cov", "", 10, "yaml.reader.Reader.peek"
+        ) == "#"
+
+        with open("html_status.json", "w") as f:
+            json.dump({
+                "files": {
+                    "d_1_reader_py": {"index": {"relative_filename": "lib/yaml/reader.py"}}
+                }
+            }, f)
+        assert python_profile().resolve_coverage_link(
+            "/cov", "", 10, "yaml.reader.Reader.peek"
+        ) == "/cov/d_1_reader_py.html#t10"
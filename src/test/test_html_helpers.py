@@ -0,0 +1,58 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test html_helpers.py"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import html_helpers  # noqa: E402
+
+
+def test_html_writer(tmpdir):
+    """Test the HTML is indented the same regardless of how it is written"""
+    html = (
+        "<html><body><a id=\"x\"><h1>Title</h1>"
+        "<div class=\"a\">text<br><b>bold</b></div>"
+        "<pre><code>  a < b\n  c</code></pre></body></html>"
+    )
+    html_path = os.path.join(tmpdir, "test.html")
+    with html_helpers.HtmlWriter(html_path) as html_writer:
+        for idx in range(0, len(html), 5):
+            html_writer.write(html[idx:idx + 5])
+    with open(html_path) as f:
+        assert f.read() == (
+            "<html>\n"
+            " <body>\n"
+            "  <a id=\"x\">\n"
+            "   <h1>\n"
+            "    Title\n"
+            "   </h1>\n"
+            "   <div class=\"a\">\n"
+            "    text\n"
+            "    <br>\n"
+            "    <b>\n"
+            "     bold\n"
+            "    </b>\n"
+            "   </div>\n"
+            "   <pre><code>  a < b\n  c</code></pre>\n"
+            " </body>\n"
+            "</html>\n"
+        )
+
+    with html_helpers.HtmlWriter(html_path, pretty=False) as html_writer:
+        html_writer.write(html)
+    with open(html_path) as f:
+        assert f.read() == html
@@ -0,0 +1,83 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test html_report.py"""
+
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import html_report  # noqa: E402
+from fuzz_introspector.datatypes import fuzzer_profile  # noqa: E402
+
+
+@pytest.mark.parametrize("use_matplotlib,with_matplotlib", [
+    (False, True),
+    (True, True),
+    (True, False)
+])
+def test_create_horisontal_calltree_image(tmpdir, monkeypatch, use_matplotlib, with_matplotlib):
+    """Test calltree images are drawn without matplotlib unless it is asked
+    for and installed"""
+    if use_matplotlib and with_matplotlib:
+        pytest.importorskip("matplotlib")
+    if not with_matplotlib:
+        # Importing a module set to None raises ImportError
+        monkeypatch.setitem(sys.modules, "matplotlib.figure", None)
+    pixel_images = []
+    save_calltree_pixel_image = html_report.save_calltree_pixel_image
+    monkeypatch.setattr(
+        html_report,
+        "save_calltree_pixel_image",
+        lambda image_name, *args: (
+            pixel_images.append(image_name),
+            save_calltree_pixel_image(image_name, *args)
+        )
+    )
+
+    cfg_path = os.path.join(tmpdir, "fuzzer.data")
+    with open(cfg_path, "w") as f:
+        f.write("Call tree\n"
+                "LLVMFuzzerTestOneInput /src/project/fuzzer.c linenumber=-1\n"
+                "  parse /src/project/lib.c linenumber=7\n"
+                "  helper /src/project/lib.c linenumber=8\n")
+    profile = fuzzer_profile.FuzzerProfile(
+        cfg_path,
+        {"Fuzzer filename": "/src/project/fuzzer.c", "All functions": {"Elements": []}}
+    )
+    for node, color in zip(profile.function_call_depths.children, ["gold", "red"]):
+        node.cov_color = color
+    profile.function_call_depths.cov_color = "lawngreen"
+
+    image_path = os.path.join(tmpdir, "fuzzer_colormap.png")
+    color_list = html_report.create_horisontal_calltree_image(
+        image_path,
+        profile,
+        use_matplotlib
+    )
+    assert color_list == ["lawngreen", "gold", "red"]
+    with open(image_path, "rb") as f:
+        png_data = f.read()
+    assert png_data[:8] == b"\x89PNG\r\n\x1a\n"
+    assert struct.unpack(">II", png_data[16:24]) == (
+        html_report.CALLTREE_IMAGE_WIDTH,
+        html_report.CALLTREE_IMAGE_HEIGHT
+    )
+    if use_matplotlib and with_matplotlib:
+        assert pixel_images == []
+    else:
+        assert pixel_images == [image_path]
@@ -0,0 +1,141 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Memory benchmarks and pickling of the core datatypes"""
+
+import os
+import pickle
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import analysis  # noqa: E402
+from fuzz_introspector import cfg_load  # noqa: E402
+from fuzz_introspector.datatypes import (  # noqa: E402
+    branch_profile,
+    bug,
+    function_profile
+)
+
+# Upper bounds on the memory used by a single object, including the objects
+# it owns, with some headroom for differences between Python versions.
+MAX_BYTES_PER_FUNCTION = 1000
+MAX_BYTES_PER_CALLSITE = 400
+
+BENCHMARK_COUNT = 2000
+
+
+def fake_function_elems(fake_func_elem, count):
+    return [
+        fake_func_elem(
+            f'function_{idx}',
+            functionLinenumber=idx,
+            linkageType='externalLinkage',
+            argCount=1,
+            argTypes=['int'],
+            argNames=['a']
+        )
+        for idx in range(count)
+    ]
+
+
+def measure_bytes_per_object(elems, create_object):
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        objects = [create_object(idx, elems[idx]) for idx in range(BENCHMARK_COUNT)]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(objects) == BENCHMARK_COUNT
+    return (after - before) / BENCHMARK_COUNT
+
+
+def test_function_profile_memory(fake_func_elem):
+    """Benchmark the memory used per function"""
+    bytes_per_function = measure_bytes_per_object(
+        fake_function_elems(fake_func_elem, BENCHMARK_COUNT),
+        lambda idx, elem: function_profile.FunctionProfile(elem)
+    )
+    assert bytes_per_function < MAX_BYTES_PER_FUNCTION
+
+
+def test_calltree_callsite_memory(fake_func_elem):
+    """Benchmark the memory used per calltree callsite"""
+    bytes_per_callsite = measure_bytes_per_object(
+        fake_function_elems(fake_func_elem, BENCHMARK_COUNT),
+        lambda idx, elem: cfg_load.CalltreeCallsite(
+            elem['functionName'],
+            elem['functionSourceFile'],
+            1,
+            idx,
+            None
+        )
+    )
+    assert bytes_per_callsite < MAX_BYTES_PER_CALLSITE
+
+
+def test_datatypes_are_slotted(fake_func_elem):
+    """Test the core datatypes do not have a per-instance __dict__"""
+    elem = fake_func_elem('function_1')
+    objects = [
+        function_profile.FunctionProfile(elem),
+        branch_profile.BranchProfile(),
+        cfg_load.CalltreeCallsite('f', 'file.c', 0, 1, None),
+        analysis.FuzzBranchBlocker(None, 0, 0, [], 0, 0, 0, '', '', '', '', ''),
+        bug.Bug('file.c', '10', 'f', 'fuzzer', 'description', 'type')
+    ]
+    for obj in objects:
+        assert not hasattr(obj, '__dict__')
+
+
+def test_datatypes_pickle(fake_func_elem):
+    """Test the slotted datatypes survive pickling"""
+    elem = fake_func_elem('function_1')
+    elem['BranchProfiles'] = [{
+        'Branch String': '/src/project/file.c:10,5',
+        'Branch Sides': {
+            'TrueSide': 'file.c:11,7',
+            'FalseSide': 'file.c:13,7',
+            'TrueSideFuncs': ['a'],
+            'FalseSideFuncs': ['b']
+        }
+    }]
+    fd = function_profile.FunctionProfile(elem)
+    fd.hitcount = 3
+    fd2 = pickle.loads(pickle.dumps(fd))
+    assert fd2.function_name == 'function_1'
+    assert fd2.hitcount == 3
+    assert fd2.get_branch_profile('file.c', 10, 5).branch_true_side_funcs == ['a']
+    assert fd2.branch_profiles['file.c:10,5'].get_side_unique_reachable_funcnames(
+        branch_profile.BranchSide.TRUE
+    ) == {'a'}
+
+    root = cfg_load.CalltreeCallsite('LLVMFuzzerTestOneInput', 'fuzzer.c', 0, -1, None)
+    child = cfg_load.CalltreeCallsite('parse', 'parse.c', 1, 10, root)
+    root.children.append(child)
+    root2 = pickle.loads(pickle.dumps(root))
+    assert root2.children[0].parent_calltree_callsite is root2
+    assert root2.children[0].src_linenumber == 10
+
+    blk = analysis.FuzzBranchBlocker(
+        branch_profile.BranchSide.TRUE, 1, 2, ['a'], 3, 4, 5,
+        'file.c', '10', '11', 'function_1', '#'
+    )
+    blk2 = pickle.loads(pickle.dumps(blk))
+    assert blk2.blocked_side == branch_profile.BranchSide.TRUE
+    assert blk2.coverage_report_link == '#'
+
+    b = bug.Bug('file.c', '10', 'function_1', 'fuzzer', 'description', 'type')
+    assert pickle.loads(pickle.dumps(b)).bug_type == 'type'
@@ -0,0 +1,57 @@
+# Copyright 2022 Fuzz Introspector Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test table_data.py"""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
+
+from fuzz_introspector import table_data  # noqa: E402
+
+
+def test_encode_columns():
+    """Test text columns share one table of strings"""
+    rows = [
+        {"name": "f1", "file": "/src/a.c", "count": 1, "hit": 0.5},
+        {"name": "f2", "file": "/src/a.c", "count": 2**40, "hit": 1},
+        {"name": "f1", "file": "/src/b.c", "count": 3, "hit": "n/a"},
+    ]
+    columns = table_data.encode_columns(rows)
+    assert columns["row_count"] == 3
+    assert columns["strings"] == ["f1", "f2", "/src/a.c", "/src/b.c", "0.5", "1", "n/a"]
+    assert columns["columns"] == {
+        "name": {"type": "str", "values": [0, 1, 0]},
+        "file": {"type": "str", "values": [2, 2, 3]},
+        "count": {"type": "float", "values": [1, 2**40, 3]},
+        "hit": {"type": "str", "values": [4, 5, 6]},
+    }
+
+
+def test_write_table_data(tmpdir, monkeypatch):
+    """Test rows are split into shards"""
+    monkeypatch.chdir(tmpdir)
+    rows = [{"idx": idx} for idx in range(5)]
+    assert table_data.write_table_data("myTable0", rows, shard_size=2) == 3
+
+    shard_values = []
+    for shard_idx in range(3):
+        with open(table_data.get_shard_filename("myTable0", shard_idx)) as shard_file:
+            shard_js = shard_file.read()
+        prefix = f"addTableDataShard(\"myTable0\", {shard_idx}, "
+        assert shard_js.startswith(prefix)
+        shard = json.loads(shard_js[len(prefix):-len(");\n")])
+        shard_values.append(shard["columns"]["idx"]["values"])
+    assert shard_values == [[0, 1], [2, 3], [4]]
@@ -17,10 +17,15 @@ import re
 import os
 import sys
 import configparser
+import glob
+import pytest
+import yaml
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
 
 from fuzz_introspector import commands  # noqa: E402
+from fuzz_introspector import constants  # noqa: E402
+from fuzz_introspector import data_loader  # noqa: E402
 
 
 def is_valid_gcloud_link(link):
@@ -124,3 +129,61 @@ def test_run_analysis_on_dir():
             os.remove(file)
         os.chdir("..")
         os.rmdir("./tmpdir")
+
+
+def test_run_analysis_on_dir_unchanged_inputs(tmpdir, monkeypatch, fake_func_elem):
+    """Test a rerun with unchanged inputs returns before loading the profiles,
+    unless an output of the earlier run is missing"""
+    target_dir = os.path.join(tmpdir, "data")
+    os.mkdir(target_dir)
+    entrypoint = fake_func_elem('LLVMFuzzerTestOneInput', functionsReached=['parse'],
+                                functionSourceFile='/src/project/fuzzer.c')
+    parse = fake_func_elem('parse', constantsTouched=['MAGIC'])
+    with open(os.path.join(target_dir, "fuzzerLogFile-fuzzer.data.yaml"), "w") as f:
+        yaml.dump({
+            "Fuzzer filename": "/src/project/fuzzer.c",
+            "All functions": {"Elements": [entrypoint, parse]}
+        }, f)
+    with open(os.path.join(target_dir, "fuzzerLogFile-fuzzer.data"), "w") as f:
+        f.write("Call tree\n"
+                "LLVMFuzzerTestOneInput /src/project/fuzzer.c linenumber=-1\n"
+                "  parse /src/project/file.c linenumber=3\n")
+    with open(os.path.join(target_dir, "fuzzer.covreport"), "w") as f:
+        f.write("LLVMFuzzerTestOneInput:\n"
+                "    1|     5|int LLVMFuzzerTestOneInput() {\n"
+                "parse:\n"
+                "    1|     0|int parse() {\n")
+    output_dir = os.path.join(tmpdir, "out")
+    os.mkdir(output_dir)
+    monkeypatch.chdir(output_dir)
+
+    def run_report():
+        return commands.run_analysis_on_dir(
+            target_dir,
+            "/covreport/linux",
+            ["FuzzEngineInputAnalysis"],
+            "",
+            False,
+            "Dummy Name",
+            "c-cpp",
+            cache_dir=os.path.join(tmpdir, "cache")
+        )
+
+    assert run_report() == constants.APP_EXIT_SUCCESS
+    dictionary_files = glob.glob("*" + constants.DICTIONARY_FILE_SUFFIX)
+    assert len(dictionary_files) == 1
+    assert os.path.isfile(constants.SUMMARY_FILE)
+
+    def fail_load(*args):
+        raise AssertionError("profiles should not be loaded")
+
+    with monkeypatch.context() as m:
+        m.setattr(data_loader, "load_all_profiles", fail_load)
+        assert run_report() == constants.APP_EXIT_SUCCESS
+
+        # A missing output is created again
+        os.remove(dictionary_files[0])
+        with pytest.raises(AssertionError):
+            run_report()
+    assert run_report() == constants.APP_EXIT_SUCCESS
+    assert os.path.isfile(dictionary_files[0])
@@ -11,8 +11,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 import os
+import struct
+import subprocess
 import sys
+import zlib
+
+import numpy as np
 import pytest
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
@@ -67,3 +73,90 @@ def test_normalise_str(s1: str, should_change: bool):
 def test_longest_common_prefix(strs: str, expected: str):
     longest_prefix = utils.longest_common_prefix(strs)
     assert longest_prefix == expected
+
+
+def test_path_suffix_index():
+    """Test lookup of paths by suffix"""
+    index = utils.PathSuffixIndex(["/a/b/c.py", "/d/b/c.py"])
+    assert index.lookup("c.py") == "/d/b/c.py"
+    assert index.lookup("a/b/c.py") == "/a/b/c.py"
+    assert index.lookup("/a/b/c.py") == "/a/b/c.py"
+    assert index.lookup("b/c") is None
+    assert utils.get_python_module_file_candidates("a.b") == [
+        "a.py", "a/b.py"
+    ]
+
+
+def test_json_report_file(tmpdir):
+    """Test buffered json values are merged into the file on flush"""
+    json_path = os.path.join(tmpdir, "summary.json")
+    with open(json_path, "w") as f:
+        json.dump({"fuzzer1": {"a": 1, "b": 2}}, f)
+
+    json_report_file = utils.JsonReportFile(json_path)
+    json_report_file.set_value(("fuzzer1", "b"), 3)
+    json_report_file.set_value(("fuzzer2", "c"), [4])
+    with open(json_path) as f:
+        assert json.load(f) == {"fuzzer1": {"a": 1, "b": 2}}
+
+    json_report_file.flush()
+    with open(json_path) as f:
+        assert json.load(f) == {"fuzzer1": {"a": 1, "b": 3}, "fuzzer2": {"c": [4]}}
+
+    jsonl_path = os.path.join(tmpdir, "records.jsonl")
+    assert utils.append_to_json_lines_file(jsonl_path, iter([{"x": 1}, {"x": 2}])) == 2
+    with open(jsonl_path) as f:
+        assert [json.loads(line) for line in f] == [{"x": 1}, {"x": 2}]
+
+
+def test_pop_json_report_values(tmpdir):
+    """Test buffered json values can be moved and written in order"""
+    json_path = os.path.join(tmpdir, "moved.json")
+    utils.get_json_report_file(json_path).set_value(("fuzzer1", "a"), 1)
+    utils.get_json_report_file(json_path).set_value(("fuzzer1", "b"), 2)
+
+    values = utils.pop_json_report_values()
+    assert [v for v in values if v[0] == json_path] == [
+        (json_path, ("fuzzer1", "a"), 1),
+        (json_path, ("fuzzer1", "b"), 2)
+    ]
+    utils.flush_json_report_files()
+    assert not os.path.isfile(json_path)
+
+    utils.set_json_report_values(values)
+    utils.flush_json_report_files()
+    with open(json_path) as f:
+        assert list(json.load(f)["fuzzer1"].items()) == [("a", 1), ("b", 2)]
+
+
+def test_json_report_files_not_written_at_exit(tmpdir):
+    """Test buffered json values are only written when flushed"""
+    src_dir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from fuzz_introspector import utils; "
+            "utils.write_to_summary_file('fuzzer1', 'key', 1)"
+        ],
+        cwd=tmpdir,
+        env=dict(os.environ, PYTHONPATH=src_dir),
+        check=True
+    )
+    assert not os.path.isfile(os.path.join(tmpdir, "summary.json"))
+
+
+def test_write_png(tmpdir):
+    """Test the image data of a written PNG file"""
+    pixels = np.zeros((2, 3, 3), dtype=np.uint8)
+    pixels[1, 2] = [255, 0, 127]
+    png_path = os.path.join(tmpdir, "test.png")
+    utils.write_png(png_path, pixels)
+
+    with open(png_path, "rb") as f:
+        png_data = f.read()
+    assert png_data[:8] == b"\x89PNG\r\n\x1a\n"
+    assert struct.unpack(">II", png_data[16:24]) == (3, 2)
+    idat_len = struct.unpack(">I", png_data[33:37])[0]
+    scanlines = zlib.decompress(png_data[41:41 + idat_len])
+    assert scanlines == b"\x00" + b"\x00" * 9 + b"\x00" + b"\x00" * 6 + b"\xff\x00\x7f"